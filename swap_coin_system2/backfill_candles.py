@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+历史K线回填脚本 - 把 OKX history-candles 写入本地K线归档
+
+可随时中断，重跑时从归档中最早的K线继续向前翻页。
+
+用法:
+    python backfill_candles.py BTC-USDT-SWAP ETH-USDT-SWAP --bars 1H 4H --days 180
+    python backfill_candles.py --selected --bars 1H        # 回填选币结果
+"""
+import os
+import sys
+import logging
+import argparse
+
+# 归档、状态文件都是相对项目根目录的路径，与 main.py 一样切换到项目根目录
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, PROJECT_ROOT)
+os.chdir(PROJECT_ROOT)
+
+from config.settings import initialize_environment
+from core.api_client import initialize_okx_api
+from core.candle_backfill import CandleBackfill
+
+def main():
+    parser = argparse.ArgumentParser(description="OKX 历史K线回填")
+    parser.add_argument("symbols", nargs="*", help="合约标的，如 BTC-USDT-SWAP")
+    parser.add_argument("--bars", nargs="+", default=["1H"], help="K线周期")
+    parser.add_argument("--days", type=float, default=None, help="回溯天数，默认回填到上市首日")
+    parser.add_argument("--max-bars", type=int, default=None, help="每个标的每个周期最多回填的K线数")
+    parser.add_argument("--selected", action="store_true", help="回填选币模块选出的标的")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if not initialize_environment() or not initialize_okx_api():
+        return 1
+
+    symbols = list(args.symbols)
+    if args.selected:
+        from modules.symbol_selection import select_symbols
+        symbols += [s for s in select_symbols() if "SWAP" in s and s not in symbols]
+    if not symbols:
+        parser.error("请指定标的或使用 --selected")
+
+    CandleBackfill().run(symbols, args.bars, days=args.days, max_bars=args.max_bars)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
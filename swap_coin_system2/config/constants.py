@@ -95,6 +95,21 @@ MONITOR_INTERVALS = {
     "low_frequency": 180
 }
 
+# 标的处理线程池：每组标的并发处理，请求速率由 RATE_LIMIT_CONFIG 控制
+SYMBOL_POOL_CONFIG = {
+    "enabled": True,              # False 时退回逐个串行处理
+    "max_workers": 8,
+    "symbol_timeout": 45,         # 单个标的最长等待秒数
+    "group_timeout": 120,         # 未指定时整组的最长等待秒数（监控组使用各自的间隔）
+}
+
+# 任务调度器配置
+SCHEDULER_CONFIG = {
+    "max_workers": 6,             # 同时执行的任务数（慢任务不阻塞平仓/风控）
+    "min_timeout": 60,            # 任务超时下限，默认超时为 max(间隔, 该值)
+    "max_wait": 5,                # 主循环最长阻塞秒数（检查运行状态）
+}
+
 # 新增缓存时间
 CACHE_EXPIRES = {
     "chain": 1800,
@@ -107,10 +122,176 @@ CACHE_EXPIRES = {
     "taker_volume": 180
 }
 
+# 共享K线存储配置
+KLINE_STORE_CONFIG = {
+    "ttl": 20,            # 同一轮监控内复用（小于高频间隔30秒）
+    "base_limit": 100,    # 超集请求的最小条数，覆盖技术分析的100条需求
+    "max_limit": 300,     # OKX candles 接口单次上限
+    "incremental": True,          # 缓存过期后只拉取新K线
+    "incremental_limit": 10,      # 增量请求条数，返回满额视为缺口过大改走全量
+    "buffer_capacity": 500,       # 每个 (symbol, timeframe) 环形缓冲保留的K线数
+    # 高周期由基础周期在本地聚合，不单独请求（基础历史不够时才退回REST）
+    "resample": {"4H": "1H", "1D": "1H"},
+    # 本地聚合的最大条数，基础周期缓冲按此扩容（1D 30根需要 31*24=744 根1H）；
+    # 单次REST只有 max_limit 根，超过的历史要靠归档预热（先回填），否则退回REST
+    "resample_max_limit": {"4H": 100, "1D": 30},
+    "resample_offsets": {"1D": 8 * 3600 * 1000},  # OKX 日线按北京时间 0 点切分
+    "retry_backoff": 0.5,         # K线请求异常 / 空响应后首次重试等待，之后指数退避
+}
+
+# 本地K线归档配置（重启后从磁盘预热 kline_store）
+CANDLE_ARCHIVE_CONFIG = {
+    "enabled": True,
+    "path": "data/candles",       # 每个 (symbol, timeframe) 一个二进制文件
+}
+
+# 历史K线回填配置（请求速率由 RATE_LIMIT_CONFIG 的 history 分组控制）
+BACKFILL_CONFIG = {
+    "page_limit": 100,            # history-candles 单页上限
+    "max_retries": 5,
+    "retry_backoff": 1,           # 限流/异常后首次等待，之后指数退避
+    "flush_pages": 10,            # 每累计多少页写一次归档，中断后从归档最早K线续传
+    "state_file": "data/candles/backfill_state.json",
+}
+
+# 异步 REST 客户端配置（连接池供所有同步门面共享）
+ASYNC_CLIENT_CONFIG = {
+    "enabled": True,
+    "base_url": "https://www.okx.com",
+    "timeout": 10,                # 单个请求超时（秒）
+    "connect_timeout": 5,
+    "max_connections": 20,
+    "max_keepalive": 10,
+    "keepalive_expiry": 30,
+    "max_retries": 3,             # 网络异常 / 429 / 5xx 重试次数
+    "retry_backoff": 0.5,         # 首次重试等待，之后指数退避
+    "run_timeout": 60,            # 同步门面等待结果的上限
+}
+
+# 接口限流配置（OKX 官方限速，rate 次 / per 秒）
+RATE_LIMIT_CONFIG = {
+    "groups": {
+        "market": {"rate": 20, "per": 2},     # tickers / ticker / books 等行情接口
+        "candles": {"rate": 40, "per": 2},    # /market/candles
+        "history": {"rate": 20, "per": 2},    # /market/history-candles
+        "trade": {"rate": 60, "per": 2},      # 下单 / 撤单 / 订单查询
+        "account": {"rate": 10, "per": 2},    # 余额 / 持仓 / 杠杆设置
+        "public": {"rate": 20, "per": 2},     # 资金费率 / 标记价格 / 持仓量
+        "rubik": {"rate": 5, "per": 2},       # 交易大数据（主动买卖量、杠杆多空比）
+    },
+    "endpoints": {
+        "/api/v5/market/candles": "candles",
+        "/api/v5/market/history-candles": "history",
+    },
+    "sections": {"market": "market", "trade": "trade", "account": "account",
+                 "public": "public", "rubik": "rubik"},
+    "default_group": "public",
+    "throttle_seconds": 2,        # 收到 429 / 50011 后该分组暂停的秒数
+}
+
+# 全量行情快照配置
+TICKER_SNAPSHOT_CONFIG = {
+    "ttl": 10,            # 一次 get_tickers 在该秒数内服务所有标的
+}
+
+# WebSocket 行情配置
+MARKET_STREAM_CONFIG = {
+    "enabled": True,
+    "public_url": "wss://ws.okx.com:8443/ws/v5/public",
+    "business_url": "wss://ws.okx.com:8443/ws/v5/business",   # K线频道在 business 地址
+    "public_channels": ["tickers", "books"],   # books: 400档快照 + 增量，带校验和
+    "business_channels": ["candle1H"],
+    "ping_interval": 25,          # 空闲超过该秒数发送 ping（服务端30秒无消息断开）
+    "reconnect_delay": 1,         # 首次重连等待，之后指数退避
+    "max_reconnect_delay": 30,
+    "stale_seconds": 30,          # 推送数据超过该秒数视为过期，退回REST
+    "record_path": "",            # 非空时把原始推送写入该文件，供回放服务器使用
+}
+
+# 本地订单簿配置
+ORDER_BOOK_CONFIG = {
+    "stale_seconds": 30,          # 推送盘口超过该秒数未更新视为不可用
+    "signal_depth": 20,           # 信号计算读取的档位数
+    "rest_fallback": True,        # 推送不可用时使用 REST 快照
+    "rest_depth": 20,
+    "rest_ttl": 30,               # REST 快照缓存秒数，同一轮信号计算共享
+}
+
+# 信号数据流图：check_enhanced_multi_signal 各组件并发执行
+SIGNAL_GRAPH_CONFIG = {
+    "max_workers": 16,
+    "default_timeout": 10,        # 单个组件的时间预算（秒），超时使用中性值
+    "timeouts": {
+        "technical": 10, "chain": 8, "sentiment": 12,
+        "funding": 8, "market_sentiment": 8, "depth": 5, "enhanced": 8,
+    },
+}
+
+# 信号组件缓存：1H K线收盘前复用慢速组件结果
+SIGNAL_MEMO_CONFIG = {
+    "enabled": True,
+    "price_band": 0.005,          # 价格偏离上次完整计算超过该比例时全部重算
+    "max_age": 300,               # 缓存最长保留秒数（与资金费率/多空比缓存一致）
+}
+
+# 交易大数据预取：杠杆多空比 / 主动买卖量只在周期边界更新，后台按边界刷新
+TRADING_DATA_PREFETCH_CONFIG = {
+    "enabled": True,
+    "period": 3600,               # 数据周期（秒），与 api_period 对应
+    "api_period": "1H",
+    "delay": 60,                  # 周期开始后多少秒刷新（等交易所生成新数据）
+    "retry": 120,                 # 获取失败后多少秒重试
+    "budget_share": 0.6,          # 最多使用 rubik 分组限速的比例
+}
+
+# 全市场上下文：与标的无关的数据每个窗口只取一次，所有标的共享同一快照
+MARKET_CONTEXT_CONFIG = {
+    "ttl": 300,                   # 快照刷新窗口（秒），与情绪缓存一致
+    "majors": ("BTC", "ETH"),     # 计算趋势的主流币
+    "trend_bars": 5,              # 趋势取最近几根1H K线的涨跌幅
+}
+
+# 全标的信号排名：每轮先为整组标的打分，只给最强的前N个开新仓（平仓/滚仓/加仓不受限）
+SIGNAL_RANKING_CONFIG = {
+    "enabled": True,
+    "top_n": 3,                   # 每组每轮最多允许开新仓的标的数
+}
+
+# 斐波那契波段拐点（ZigZag）参数
+SWING_PIVOT_CONFIG = {
+    "deviation": 0.03,            # 自段内极值反向运动超过该比例确认拐点
+    "max_pivots": 50,             # 每个标的保留的已确认拐点数
+}
+
+# 成交量分布（Volume Profile）参数
+VOLUME_PROFILE_CONFIG = {
+    "bin_pct": 0.0025,            # 分档价格步长（建档时现价的比例，之后固定，便于逐根增量更新）
+    "window": 100,                # 统计最近多少根K线
+    "spread": True,               # 每根K线的成交量按高低区间均匀分摊，False 时全部计入收盘价所在档
+    "half_life": 48,              # 时间衰减半衰期（根），None 表示不衰减
+    "value_area": 0.7,            # 价值区占总成交量比例
+}
+
 # 资金费率策略参数 - 合约特有
 FUNDING_RATE_THRESHOLD = 0.0005
 FUNDING_PREMIUM_THRESHOLD = 0.001
 
+# 资金费率存储：批量刷新当前费率，按结算时间安排刷新，已结算费率本地持久化
+FUNDING_STORE_CONFIG = {
+    "path": "data/funding",       # 每个标的一个二进制文件 (fundingTime, realizedRate)
+    "bulk_inst_id": "ANY",        # get_funding_rate 一次返回全部永续合约
+    "bulk_min_symbols": 2,        # 到期标的少于该数量时逐个请求
+    "bulk_retry": 3600,           # 批量请求失败后多少秒内改为逐个请求
+    "max_age": 1800,              # 两次结算之间预测费率的最长刷新间隔（秒）
+    "settle_grace": 30,           # 结算后多少秒刷新（等交易所切换到下一期）
+    "funding_interval": 8 * 3600, # 无 nextFundingTime 时假定的结算周期
+    "history_limit": 100,         # funding_rate_history 单次条数
+    "history_retry": 60,          # 历史费率请求失败后多少秒再重试
+    "stats_window": 90,           # 统计最近多少次结算（8小时一次约30天）
+    "min_history": 21,            # 至少多少次结算才使用相对统计
+    "z_threshold": 2.0,           # 相对历史的极端费率阈值
+}
+
 # constants.py 中添加以下参数
 
 # 智能止盈参数
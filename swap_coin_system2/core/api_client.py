@@ -2,6 +2,7 @@ import time
 import logging
 from okx import Account, MarketData, Trade, PublicData, TradingData
 from config.settings import OKX_API_KEY, OKX_SECRET_KEY, OKX_PASSWORD, FLAG
+from config.constants import ASYNC_CLIENT_CONFIG
 # 在 api_client.py 和 state_manager.py 的顶部添加导入
 from utils.common_utils import safe_float_convert, format_currency
 # 全局API对象
@@ -10,6 +11,7 @@ market_api = None
 trade_api = None
 public_data_api = None
 trading_data_api = None
+async_client = None
 
 
 
@@ -36,11 +38,9 @@ def get_account_balance_with_retry(max_retries=3, delay=2):
                 error_msg = response.get("msg", "未知错误")
                 logging.error(f"获取USDT余额信息失败: {error_msg}")
                 
-                # 如果是限流错误，等待后重试
+                # 如果是限流错误，account 分组已被暂停，重试时由限流器等待放行
                 if "Too Many Requests" in error_msg and attempt < max_retries - 1:
-                    wait_time = delay * (attempt + 1)
-                    logging.warning(f"API限流，等待{wait_time}秒后重试 ({attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
+                    logging.warning(f"API限流，等待限流器放行后重试 ({attempt + 1}/{max_retries})")
                     continue
                 return 0.0
                 
@@ -183,11 +183,16 @@ def get_swap_instruments():
     """获取永续合约产品信息"""
     return get_instruments_info("SWAP")
 
+def close_api_clients():
+    """关闭异步客户端连接池"""
+    if async_client is not None:
+        async_client.close()
+
 
 
 # 在 api_client.py 的 initialize_okx_api 函数中添加调试
 def initialize_okx_api():
-    global account_api, market_api, trade_api, public_data_api, trading_data_api
+    global account_api, market_api, trade_api, public_data_api, trading_data_api, async_client
     
     try:
         logging.info("开始初始化OKX API...")
@@ -209,6 +214,18 @@ def initialize_okx_api():
         trading_data_api = TradingData.TradingDataAPI(flag=FLAG)
         logging.info("✅ 交易数据API初始化成功")
 
+        # 只读接口改走共享连接池的异步客户端，写操作仍由SDK执行；所有调用统一限流
+        from core.async_client import (AsyncOKXClient, MarketFacade, PublicDataFacade,
+                                       TradingDataFacade, AccountFacade, TradeFacade)
+        if ASYNC_CLIENT_CONFIG["enabled"]:
+            async_client = AsyncOKXClient(OKX_API_KEY, OKX_SECRET_KEY, OKX_PASSWORD, FLAG)
+            logging.info("✅ 异步连接池客户端初始化成功")
+        account_api = AccountFacade(async_client, account_api)
+        trade_api = TradeFacade(async_client, trade_api)
+        market_api = MarketFacade(async_client, market_api)
+        public_data_api = PublicDataFacade(async_client, public_data_api)
+        trading_data_api = TradingDataFacade(async_client, trading_data_api)
+
         # 调试信息：检查各API是否真的初始化成功
         logging.debug(f"账户API类型: {type(account_api)}")
         logging.debug(f"交易API类型: {type(trade_api)}")
@@ -253,5 +270,6 @@ def test_market_api():
 __all__ = [
     'account_api', 'market_api', 'trade_api', 
     'public_data_api', 'trading_data_api',
-    'initialize_okx_api', 'get_account_balance', 'get_pending_orders'
+    'async_client', 'initialize_okx_api', 'close_api_clients',
+    'get_account_balance', 'get_pending_orders'
 ]
\ No newline at end of file
@@ -0,0 +1,259 @@
+import hmac
+import json
+import base64
+import asyncio
+import logging
+import threading
+from datetime import datetime, timezone
+import httpx
+from core.rate_limiter import rate_limiter
+from config.constants import ASYNC_CLIENT_CONFIG
+
+try:
+    import h2  # noqa: F401  安装 h2 时启用 HTTP/2 多路复用
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+RETRY_STATUS = {500, 502, 503, 504}
+
+class AsyncOKXClient:
+    """
+    异步 OKX REST 客户端 - 共享 keep-alive 连接池
+
+    - 签名方式与官方 SDK 一致（HMAC-SHA256 + base64）
+    - 每个请求单独超时，网络异常 / 5xx 按指数退避重试
+    - 请求前经 rate_limiter 按接口分组放行，429 时暂停该分组后重试
+    - 后台线程运行独立事件循环，同步代码通过 run() / run_all() 调用，
+      多个标的的请求可以在一次 run_all 中并发完成
+    """
+
+    def __init__(self, api_key="", secret_key="", passphrase="", flag="0", config=None, transport=None):
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.passphrase = passphrase
+        self.flag = flag
+        self.config = dict(ASYNC_CLIENT_CONFIG, **(config or {}))
+        self.stats = {"requests": 0, "retries": 0, "errors": 0}
+        self._transport = transport
+        self._client = None
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # ---------- 事件循环 ----------
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="okx-async-client", daemon=True)
+                self._thread.start()
+        return self._loop
+
+    def run(self, coro, timeout=None):
+        """在后台事件循环中执行协程并同步等待结果"""
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        return future.result(timeout if timeout is not None else self.config["run_timeout"])
+
+    def run_all(self, coros, timeout=None):
+        """并发执行一组协程，按顺序返回结果，单个失败时对应位置为异常对象"""
+        async def gather():
+            return await asyncio.gather(*coros, return_exceptions=True)
+        return self.run(gather(), timeout)
+
+    def close(self):
+        """关闭连接池和后台事件循环"""
+        if self._loop is None:
+            return
+        if self._client is not None:
+            self.run(self._client.aclose())
+            self._client = None
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+        self._thread = None
+
+    def _get_client(self):
+        # 必须在后台事件循环内创建，连接池绑定该循环
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.config["base_url"],
+                http2=HTTP2_AVAILABLE,
+                transport=self._transport,
+                timeout=httpx.Timeout(self.config["timeout"], connect=self.config["connect_timeout"]),
+                limits=httpx.Limits(max_connections=self.config["max_connections"],
+                                    max_keepalive_connections=self.config["max_keepalive"],
+                                    keepalive_expiry=self.config["keepalive_expiry"]),
+            )
+        return self._client
+
+    # ---------- 签名与请求 ----------
+
+    def _headers(self, method, request_path, body, auth):
+        headers = {"Content-Type": "application/json", "x-simulated-trading": self.flag}
+        if auth:
+            timestamp = datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+            message = f"{timestamp}{method.upper()}{request_path}{body}"
+            digest = hmac.new(self.secret_key.encode("utf-8"), message.encode("utf-8"), "sha256").digest()
+            headers.update({
+                "OK-ACCESS-KEY": self.api_key,
+                "OK-ACCESS-SIGN": base64.b64encode(digest).decode(),
+                "OK-ACCESS-TIMESTAMP": timestamp,
+                "OK-ACCESS-PASSPHRASE": self.passphrase,
+            })
+        return headers
+
+    @staticmethod
+    def build_path(path, params):
+        """与 SDK 相同的查询串拼接：跳过空参数，签名时使用同一字符串"""
+        query = "&".join(f"{k}={v}" for k, v in (params or {}).items() if v is not None and v != "")
+        return f"{path}?{query}" if query else path
+
+    async def request(self, method, path, params=None, auth=False, timeout=None):
+        """
+        发送请求并返回 OKX 响应 JSON
+
+        重试耗尽后抛出最后一次异常，与 SDK 行为一致，由调用方捕获。
+        """
+        method = method.upper()
+        request_path = self.build_path(path, params) if method == "GET" else path
+        body = json.dumps(params or {}) if method == "POST" else ""
+        group = rate_limiter.group_for_path(path)
+        delay = self.config["retry_backoff"]
+        last_error = None
+
+        for attempt in range(self.config["max_retries"]):
+            await rate_limiter.acquire_async(group)
+            try:
+                self.stats["requests"] += 1
+                response = await self._get_client().request(
+                    method, request_path, content=body or None,
+                    headers=self._headers(method, request_path, body, auth),
+                    timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+                )
+                if response.status_code == 429:
+                    # 限流不额外退避，由限流器暂停该分组后按令牌放行
+                    rate_limiter.throttle(group)
+                    last_error = httpx.HTTPStatusError("HTTP 429", request=response.request, response=response)
+                    self.stats["retries"] += 1
+                    continue
+                if response.status_code in RETRY_STATUS:
+                    raise httpx.HTTPStatusError(f"HTTP {response.status_code}", request=response.request, response=response)
+                return response.json()
+            except (httpx.TransportError, httpx.HTTPStatusError) as e:
+                last_error = e
+                logging.debug(f"请求失败 {method} {request_path} (尝试 {attempt + 1}): {e}")
+
+            if attempt < self.config["max_retries"] - 1:
+                self.stats["retries"] += 1
+                await asyncio.sleep(delay)
+                delay *= 2
+
+        self.stats["errors"] += 1
+        raise last_error
+
+    async def get(self, path, params=None, auth=False, timeout=None):
+        return await self.request("GET", path, params, auth, timeout)
+
+    # ---------- 行情 / 公共数据（无需签名） ----------
+
+    async def get_candlesticks(self, instId, after="", before="", bar="", limit=""):
+        return await self.get("/api/v5/market/candles",
+                              {"instId": instId, "after": after, "before": before, "bar": bar, "limit": limit})
+
+    async def get_history_candlesticks(self, instId, after="", before="", bar="", limit=""):
+        return await self.get("/api/v5/market/history-candles",
+                              {"instId": instId, "after": after, "before": before, "bar": bar, "limit": limit})
+
+    async def get_tickers(self, instType, uly="", instFamily=""):
+        return await self.get("/api/v5/market/tickers", {"instType": instType, "uly": uly, "instFamily": instFamily})
+
+    async def get_ticker(self, instId):
+        return await self.get("/api/v5/market/ticker", {"instId": instId})
+
+    async def get_orderbook(self, instId, sz=""):
+        return await self.get("/api/v5/market/books", {"instId": instId, "sz": sz})
+
+    async def get_funding_rate(self, instId):
+        return await self.get("/api/v5/public/funding-rate", {"instId": instId})
+
+    async def get_open_interest(self, instType, uly="", instId="", instFamily=""):
+        return await self.get("/api/v5/public/open-interest",
+                              {"instType": instType, "uly": uly, "instId": instId, "instFamily": instFamily})
+
+    async def get_taker_volume(self, ccy, instType, begin="", end="", period=""):
+        return await self.get("/api/v5/rubik/stat/taker-volume",
+                              {"ccy": ccy, "instType": instType, "begin": begin, "end": end, "period": period})
+
+    async def get_margin_lending_ratio(self, ccy, begin="", end="", period=""):
+        return await self.get("/api/v5/rubik/stat/margin/loan-ratio",
+                              {"ccy": ccy, "begin": begin, "end": end, "period": period})
+
+    # ---------- 账户 / 交易查询（需要签名） ----------
+
+    async def get_account_balance(self, ccy=""):
+        return await self.get("/api/v5/account/balance", {"ccy": ccy}, auth=True)
+
+    async def get_positions(self, instType="", instId="", posId=""):
+        return await self.get("/api/v5/account/positions",
+                              {"instType": instType, "instId": instId, "posId": posId}, auth=True)
+
+    async def get_order_list(self, instType="", uly="", instId="", ordType="", state="", after="", before="",
+                             limit="", instFamily=""):
+        return await self.get("/api/v5/trade/orders-pending",
+                              {"instType": instType, "uly": uly, "instId": instId, "ordType": ordType,
+                               "state": state, "after": after, "before": before, "limit": limit,
+                               "instFamily": instFamily}, auth=True)
+
+class SyncAPIFacade:
+    """
+    同步门面 - 与 SDK 对象同名同参，现有模块无需修改
+
+    methods 中列出的只读接口走异步连接池（client 为空时也交给 SDK），其余方法
+    （下单、撤单、设置杠杆等写操作）委托给 SDK 对象，调用前按 group 限流。
+    """
+
+    methods = ()
+    group = "public"
+
+    def __init__(self, client, sdk_api):
+        self._client = client
+        self._sdk = sdk_api
+
+    def __getattr__(self, name):
+        if self._client is not None and name in type(self).methods:
+            coroutine_function = getattr(self._client, name)
+            return lambda *args, **kwargs: self._client.run(coroutine_function(*args, **kwargs))
+
+        attr = getattr(self._sdk, name)
+        if not callable(attr):
+            return attr
+
+        def limited(*args, **kwargs):
+            rate_limiter.acquire(self.group)
+            result = attr(*args, **kwargs)
+            if rate_limiter.is_rate_limited(result):
+                rate_limiter.throttle(self.group)
+            return result
+        return limited
+
+class MarketFacade(SyncAPIFacade):
+    methods = ("get_candlesticks", "get_history_candlesticks", "get_tickers", "get_ticker", "get_orderbook")
+    group = "market"
+
+class PublicDataFacade(SyncAPIFacade):
+    methods = ("get_funding_rate", "get_open_interest")
+    group = "public"
+
+class TradingDataFacade(SyncAPIFacade):
+    methods = ("get_taker_volume", "get_margin_lending_ratio")
+    group = "rubik"
+
+class AccountFacade(SyncAPIFacade):
+    methods = ("get_account_balance", "get_positions")
+    group = "account"
+
+class TradeFacade(SyncAPIFacade):
+    methods = ("get_order_list",)
+    group = "trade"
@@ -0,0 +1,130 @@
+import os
+import logging
+import threading
+import numpy as np
+from config.constants import CANDLE_ARCHIVE_CONFIG
+
+ROW_WIDTH = 6
+ROW_BYTES = ROW_WIDTH * 8
+
+class CandleArchive:
+    """
+    本地K线归档 - 每个 (symbol, timeframe) 一个只追加的二进制文件
+
+    每根K线存为 6 个小端 float64（time/open/high/low/close/volume），只写入
+    已收盘K线且时间严格递增。读取时用 np.memmap 映射文件，只拷贝需要的尾部，
+    重启后 kline_store 可以直接从这里预热，再只向交易所请求停机期间的缺口。
+
+    停机太久、全量请求拿不回缺口时，新K线与归档末尾不连续，作为新的一段
+    接着写入；传入 bar_ms 读取时只返回末尾连续的一段，不会跨过缺口。
+    """
+
+    def __init__(self, root=None):
+        self.root = root or CANDLE_ARCHIVE_CONFIG["path"]
+        self._last_times = {}
+        self._lock = threading.Lock()
+
+    def _path(self, symbol, timeframe):
+        return os.path.join(self.root, f"{symbol}_{timeframe}.bin")
+
+    def count(self, symbol, timeframe):
+        path = self._path(symbol, timeframe)
+        return os.path.getsize(path) // ROW_BYTES if os.path.exists(path) else 0
+
+    def _map(self, symbol, timeframe):
+        rows = self.count(symbol, timeframe)
+        if rows == 0:
+            return None
+        return np.memmap(self._path(symbol, timeframe), dtype="<f8", mode="r", shape=(rows, ROW_WIDTH))
+
+    def last_time(self, symbol, timeframe):
+        """归档中最后一根K线的时间戳，无归档时返回 None"""
+        key = (symbol, timeframe)
+        if key not in self._last_times:
+            mapped = self._map(symbol, timeframe)
+            self._last_times[key] = int(mapped[-1, 0]) if mapped is not None else None
+        return self._last_times[key]
+
+    @staticmethod
+    def _last_segment(rows, bar_ms):
+        """截取末尾连续的一段：相邻K线间隔不等于 bar_ms 处视为缺口"""
+        if bar_ms is None or len(rows) < 2:
+            return rows
+        holes = np.flatnonzero(np.diff(rows[:, 0]) != bar_ms)
+        return rows[holes[-1] + 1:] if len(holes) else rows
+
+    def load(self, symbol, timeframe, limit=None, end_time=None, bar_ms=None):
+        """
+        读取最近 limit 根（按时间升序），end_time 非空时只取早于该时间的K线
+
+        bar_ms 非空时只返回末尾连续的一段（可能少于 limit 根）。
+        返回 (n, 6) 数组的拷贝，无数据时返回空数组。
+        """
+        mapped = self._map(symbol, timeframe)
+        if mapped is None:
+            return np.empty((0, ROW_WIDTH), dtype=np.float64)
+        end = len(mapped)
+        if end_time is not None:
+            end = int(np.searchsorted(mapped[:, 0], end_time, side="left"))
+        start = 0 if limit is None else max(0, end - int(limit))
+        return np.array(self._last_segment(mapped[start:end], bar_ms), dtype=np.float64)
+
+    def append(self, symbol, timeframe, rows, bar_ms=None):
+        """
+        追加已收盘K线，只写入晚于归档末尾的部分，返回写入条数
+
+        bar_ms 非空时检查与归档末尾是否连续，不连续时记录缺口，新K线作为新的一段写入。
+        """
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, ROW_WIDTH)
+        with self._lock:
+            last_ts = self.last_time(symbol, timeframe)
+            if last_ts is not None:
+                rows = rows[rows[:, 0] > last_ts]
+            if not len(rows):
+                return 0
+            if bar_ms and last_ts is not None and int(rows[0, 0]) != last_ts + bar_ms:
+                missing = (int(rows[0, 0]) - last_ts) // bar_ms - 1
+                logging.warning(f"⚠️ K线归档 {symbol} {timeframe} 缺口 {missing} 根，之后的K线作为新分段写入")
+            os.makedirs(self.root, exist_ok=True)
+            with open(self._path(symbol, timeframe), "ab") as f:
+                f.write(rows.astype("<f8").tobytes())
+            self._last_times[(symbol, timeframe)] = int(rows[-1, 0])
+        logging.debug(f"K线归档 {symbol} {timeframe} 写入 {len(rows)} 条")
+        return len(rows)
+
+    def merge(self, symbol, timeframe, rows):
+        """
+        合并任意时间段的K线（历史回填用），按时间去重排序后整体重写文件
+
+        已有K线优先保留。先写临时文件再替换，中途中断不会损坏归档。返回新增条数。
+        """
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, ROW_WIDTH)
+        if not len(rows):
+            return 0
+        with self._lock:
+            existing = self.load(symbol, timeframe)
+            combined = np.concatenate([existing, rows])
+            _, index = np.unique(combined[:, 0], return_index=True)
+            merged = combined[index]
+            added = len(merged) - len(existing)
+            if added == 0:
+                return 0
+            os.makedirs(self.root, exist_ok=True)
+            path = self._path(symbol, timeframe)
+            with open(path + ".tmp", "wb") as f:
+                f.write(merged.astype("<f8").tobytes())
+            os.replace(path + ".tmp", path)
+            self._last_times[(symbol, timeframe)] = int(merged[-1, 0])
+        logging.debug(f"K线归档 {symbol} {timeframe} 合并 {added} 条")
+        return added
+
+    def first_time(self, symbol, timeframe):
+        """归档中最早一根K线的时间戳，无归档时返回 None"""
+        mapped = self._map(symbol, timeframe)
+        return int(mapped[0, 0]) if mapped is not None else None
+
+    def has_archive(self, symbol, timeframe):
+        return self.count(symbol, timeframe) > 0
+
+# 全局实例
+candle_archive = CandleArchive()
@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import logging
+import numpy as np
+from core.candle_archive import candle_archive
+from core.kline_store import BAR_MILLISECONDS, normalize_timeframe
+from config.constants import BACKFILL_CONFIG
+
+EMPTY_PAGE = np.empty((0, 6), dtype=np.float64)
+
+class CandleBackfill:
+    """
+    历史K线回填 - 沿 OKX history-candles 分页向过去遍历，写入本地归档
+
+    - 从归档中最早的K线继续向前翻页（after=最早时间），中断后重跑即可续传
+    - 请求经 market_api 按 history 分组限流，失败时指数退避重试
+    - 翻到上市首日（返回空页）后记入状态文件，之后不再重复请求
+    """
+
+    def __init__(self, archive=None, config=None):
+        self.archive = archive or candle_archive
+        self.config = dict(BACKFILL_CONFIG, **(config or {}))
+        self.state_file = self.config["state_file"]
+        self.state = self._load_state()
+        self.stats = {"requests": 0, "bars": 0, "retries": 0}
+
+    # ---------- 状态 ----------
+
+    def _load_state(self):
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            logging.warning(f"⚠️ 回填状态文件损坏，重新开始: {e}")
+            return {}
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+        with open(self.state_file + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(self.state_file + ".tmp", self.state_file)
+
+    def _state_key(self, symbol, timeframe):
+        return f"{symbol}|{timeframe}"
+
+    def is_complete(self, symbol, timeframe):
+        """是否已回填到上市首日"""
+        key = self._state_key(symbol, normalize_timeframe(timeframe))
+        return self.state.get(key, {}).get("complete", False)
+
+    # ---------- 请求 ----------
+
+    def _request_page(self, symbol, timeframe, after):
+        """请求 after 之前的一页K线，返回 OKX 原始响应"""
+        import core.api_client
+        market_api = core.api_client.market_api
+        if market_api is None:
+            logging.error("市场API未初始化")
+            return None
+
+        from utils.performance_monitor import performance_monitor
+        performance_monitor.record_api_call("market_data")
+
+        return market_api.get_history_candlesticks(instId=symbol, bar=timeframe,
+                                                   after=str(after) if after else "",
+                                                   limit=str(self.config["page_limit"]))
+
+    def fetch_page(self, symbol, timeframe, after):
+        """
+        获取一页历史K线，返回按时间升序的 (n, 6) 数组
+
+        空数组表示已到上市首日；连续失败返回 None。
+        """
+        delay = self.config["retry_backoff"]
+        for attempt in range(self.config["max_retries"]):
+            try:
+                self.stats["requests"] += 1
+                response = self._request_page(symbol, timeframe, after)
+                if response and response.get("code") == "0":
+                    data = response.get("data") or []
+                    if not data:
+                        return EMPTY_PAGE
+                    rows = np.array([item[:6] for item in data], dtype=np.float64)
+                    return rows[np.argsort(rows[:, 0], kind="stable")]
+
+                error_msg = response.get("msg", "") if response else "无响应"
+                logging.warning(f"⚠️ 回填 {symbol} 请求失败: {error_msg}")
+            except Exception as e:
+                logging.error(f"❌ 回填 {symbol} 请求异常: {e}")
+
+            if attempt < self.config["max_retries"] - 1:
+                self.stats["retries"] += 1
+                time.sleep(delay)
+                delay *= 2
+        return None
+
+    # ---------- 回填 ----------
+
+    def backfill(self, symbol, timeframe="1H", start_time=None, max_bars=None):
+        """
+        回填单个标的，直到 start_time（毫秒）、max_bars 根或上市首日
+
+        返回本次新增写入归档的K线条数。
+        """
+        timeframe = normalize_timeframe(timeframe)
+        key = self._state_key(symbol, timeframe)
+        if self.is_complete(symbol, timeframe):
+            logging.info(f"{symbol} {timeframe} 已回填到上市首日，跳过")
+            return 0
+
+        bar_ms = BAR_MILLISECONDS.get(timeframe)
+        cursor = self.archive.first_time(symbol, timeframe)
+        if cursor is not None and start_time is not None and cursor <= start_time:
+            return 0
+
+        pending = []
+        added = 0
+        fetched = 0
+        complete = False
+        while True:
+            rows = self.fetch_page(symbol, timeframe, cursor)
+            if rows is None:
+                logging.warning(f"⚠️ {symbol} {timeframe} 回填中断，下次从 {cursor} 继续")
+                break
+            if not len(rows):
+                complete = True
+                break
+
+            first_page = cursor is None
+            cursor = int(rows[0, 0])
+            if first_page and bar_ms:
+                # 首页可能包含未收盘K线，只归档已收盘部分
+                rows = rows[rows[:, 0] + bar_ms <= time.time() * 1000]
+            pending.append(rows)
+            fetched += len(rows)
+
+            if len(pending) >= self.config["flush_pages"]:
+                added += self._flush(symbol, timeframe, pending)
+            if (start_time is not None and cursor <= start_time) or \
+                    (max_bars is not None and fetched >= max_bars):
+                break
+
+        added += self._flush(symbol, timeframe, pending)
+        self.stats["bars"] += added
+        self.state[key] = {"complete": complete, "oldest": self.archive.first_time(symbol, timeframe),
+                           "updated": int(time.time())}
+        self._save_state()
+        logging.info(f"📥 {symbol} {timeframe} 回填 {added} 根{'（已到上市首日）' if complete else ''}")
+        return added
+
+    def _flush(self, symbol, timeframe, pending):
+        if not pending:
+            return 0
+        rows = np.concatenate(pending)
+        pending.clear()
+        return self.archive.merge(symbol, timeframe, rows)
+
+    def run(self, symbols, timeframes=("1H",), days=None, max_bars=None):
+        """批量回填，days 为回溯天数（空则回填到上市首日）"""
+        start_time = int((time.time() - days * 86400) * 1000) if days else None
+        results = {}
+        for symbol in symbols:
+            for timeframe in timeframes:
+                results[(symbol, normalize_timeframe(timeframe))] = self.backfill(symbol, timeframe, start_time, max_bars)
+        logging.info(f"✅ 回填完成: {len(results)} 个任务，共 {sum(results.values())} 根，请求 {self.stats['requests']} 次")
+        return results
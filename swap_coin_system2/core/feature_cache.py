@@ -0,0 +1,101 @@
+import logging
+import threading
+
+class FeatureCache:
+    """
+    特征缓存 - 同一根K线上的同一特征只计算一次
+
+    check_enhanced_multi_signal 中多个分析器会在同一个 DataFrame 上重复计算
+    RSI(14)、20周期均值/标准差/高低点。get_technical_signals 用 tag() 在
+    DataFrame.attrs 里标记 symbol / timeframe / 行数 / 最后一根K线，分析器通过
+    本缓存读取特征：键为 (symbol, timeframe, 行数, 特征描述)，最后一根K线的时间
+    和 OHLCV 作为指纹，新K线或实时K线修正后自动重算。未标记或行数与标记不符
+    （切片得到）的 DataFrame 直接计算不缓存。
+    """
+
+    def __init__(self, max_entries=5000):
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "uncached": 0}
+
+    @staticmethod
+    def tag(df, symbol, timeframe):
+        """标记 DataFrame 所属的标的和周期，返回同一个 DataFrame"""
+        if df is None or df.empty:
+            return df
+        df.attrs["symbol"] = symbol
+        df.attrs["timeframe"] = timeframe
+        df.attrs["rows"] = len(df)
+        df.attrs["last_bar"] = tuple(float(df[c].to_numpy()[-1]) if c in df.columns else None
+                                     for c in ("time", "open", "high", "low", "close", "volume"))
+        return df
+
+    def get(self, df, spec, compute):
+        """
+        读取特征，未命中时调用 compute(df) 计算并缓存
+
+        spec 为可哈希的特征描述，如 ("rsi", 14)、("tail", "high", 20, "max")。
+        """
+        attrs = df.attrs if df is not None else {}
+        if attrs.get("symbol") is None or attrs.get("rows") != len(df):
+            self.stats["uncached"] += 1
+            return compute(df)
+
+        key = (attrs["symbol"], attrs.get("timeframe"), len(df), spec)
+        fingerprint = attrs["last_bar"]
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            self.stats["hits"] += 1
+            return entry[1]
+
+        value = compute(df)
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+                logging.debug("特征缓存已满，清空重建")
+            self._entries[key] = (fingerprint, value)
+        self.stats["misses"] += 1
+        return value
+
+    def put(self, df, spec, value):
+        """写入外部已算好的特征（批量指标预填），df 未标记时忽略"""
+        attrs = df.attrs if df is not None else {}
+        if attrs.get("symbol") is None or attrs.get("rows") != len(df):
+            return False
+        key = (attrs["symbol"], attrs.get("timeframe"), len(df), spec)
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (attrs["last_bar"], value)
+        return True
+
+    # ---------- 常用特征 ----------
+
+    def rsi(self, df, period=14):
+        """RSI 序列（简单移动平均版本，与 calculate_indicators 相同）"""
+        def compute(frame):
+            delta = frame["close"].diff()
+            gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+            loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+            rs = gain / loss
+            return 100 - (100 / (1 + rs))
+        return self.get(df, ("rsi", period), compute)
+
+    def rolling(self, df, column, window, stat="mean"):
+        """滚动统计序列，stat 为 mean / std / max / min"""
+        return self.get(df, ("rolling", column, window, stat),
+                        lambda frame: getattr(frame[column].rolling(window=window), stat)())
+
+    def tail_stat(self, df, column, window, stat="mean"):
+        """最近 window 根的统计值，等同 df[column].tail(window).<stat>()"""
+        return self.get(df, ("tail", column, window, stat),
+                        lambda frame: getattr(frame[column].tail(window), stat)())
+
+    def get_stats(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return {**self.stats, "hit_rate": self.stats["hits"] / total if total else 0.0,
+                "entries": len(self._entries)}
+
+# 全局实例
+feature_cache = FeatureCache()
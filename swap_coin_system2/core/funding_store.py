@@ -0,0 +1,246 @@
+import os
+import time
+import logging
+import threading
+import numpy as np
+from config.constants import FUNDING_STORE_CONFIG
+from utils.common_utils import safe_float_convert
+
+ROW_WIDTH = 2        # (fundingTime, realizedRate)
+ROW_BYTES = ROW_WIDTH * 8
+
+def parse_funding(item):
+    """把 get_funding_rate 的一条数据转换为分析器使用的格式"""
+    next_rate = item.get("nextFundingRate")
+    return {
+        "funding_rate": safe_float_convert(item.get("fundingRate")),
+        "next_funding_rate": safe_float_convert(next_rate) if next_rate else None,
+        "funding_time": int(item.get("fundingTime") or 0),
+        "next_funding_time": int(item.get("nextFundingTime") or 0),
+        "premium": safe_float_convert(item.get("premium")),
+        "settlement_state": item.get("settState", ""),
+    }
+
+def funding_statistics(history, current_rate):
+    """当前费率相对历史已结算费率的统计：均值、标准差、z-score、百分位"""
+    history = np.asarray(history, dtype=np.float64)
+    if len(history) == 0:
+        return None
+    mean = float(history.mean())
+    std = float(history.std())
+    return {
+        "count": len(history),
+        "mean": mean,
+        "std": std,
+        "zscore": (current_rate - mean) / std if std > 0 else 0.0,
+        "percentile": float((history < current_rate).mean() + (history == current_rate).mean() / 2),
+    }
+
+class FundingStore:
+    """
+    资金费率存储 - 当前费率批量刷新、已结算费率本地持久化
+
+    当前费率：一次 get_funding_rate(instId="ANY") 取得全部永续合约，按各合约的
+    fundingTime（本期结算时间）安排下次刷新：结算后 settle_grace 秒内刷新一次，
+    期间最多 max_age 秒刷新一次预测费率；批量接口不可用时逐个请求到期的标的。
+    历史费率：每个标的一个只追加的二进制文件（fundingTime, realizedRate），
+    有新的结算后才调用 funding_rate_history 补齐。
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(FUNDING_STORE_CONFIG, **(config or {}))
+        self.watched = set()         # 需要维护的永续合约
+        self.current = {}            # symbol -> parse_funding 结果
+        self._refreshed = {}         # symbol -> 最近刷新时间
+        self._history = {}           # symbol -> (n, 2) 数组
+        self._history_checked = {}   # symbol -> 已补齐到的结算时间（请求成功后才记录）
+        self._history_retry_at = {}  # symbol -> 请求失败后的重试时间
+        self._history_fetching = set()
+        self._current_fetching = set()   # 当前费率正在请求中的标的
+        self._bulk_retry_at = 0.0     # 批量接口失败后暂停使用到该时间
+        self._lock = threading.Lock()
+        self.stats = {"bulk_refreshes": 0, "single_refreshes": 0, "history_requests": 0, "hits": 0}
+
+    # ---------- 当前费率 ----------
+
+    def next_refresh(self, symbol):
+        """该标的下次需要刷新的时间（秒）"""
+        data = self.current.get(symbol)
+        refreshed = self._refreshed.get(symbol)
+        if data is None or refreshed is None:
+            return 0.0
+        due = refreshed + self.config["max_age"]
+        settle = data["funding_time"] / 1000 + self.config["settle_grace"]
+        if refreshed < settle:
+            due = min(due, settle)
+        return due
+
+    def _request(self, inst_id):
+        from core.api_client import public_data_api
+        if public_data_api is None:
+            logging.error("公共数据API未初始化")
+            return None
+        from utils.performance_monitor import performance_monitor
+        performance_monitor.record_api_call("public_data")
+        result = public_data_api.get_funding_rate(instId=inst_id)
+        if result and result.get("code") == "0":
+            return result.get("data", [])
+        logging.debug(f"获取{inst_id}资金费率失败: {result.get('msg') if result else '无响应'}")
+        return None
+
+    def _ingest(self, data):
+        now = time.time()
+        for item in data:
+            inst_id = item.get("instId")
+            if inst_id:
+                self.current[inst_id] = parse_funding(item)
+                self._refreshed[inst_id] = now
+
+    def refresh(self, symbols=None, force=False):
+        """
+        刷新到期标的的当前费率（symbols 会加入维护列表），有到期标的时整体只发一次批量请求
+
+        请求在锁外进行，只在写入结果时加锁；正在其他线程请求中的标的不重复请求，
+        直接沿用已有数据。
+        """
+        now = time.time()
+        with self._lock:
+            self.watched.update(symbols or ())
+            due = [s for s in self.watched
+                   if s not in self._current_fetching and (force or now >= self.next_refresh(s))]
+            if not due:
+                return 0
+            claimed = set(due)
+            self._current_fetching.update(claimed)
+            use_bulk = now >= self._bulk_retry_at and len(due) >= self.config["bulk_min_symbols"]
+
+        try:
+            if use_bulk:
+                try:
+                    data = self._request(self.config["bulk_inst_id"])
+                except Exception as e:
+                    logging.debug(f"批量获取资金费率异常: {e}")
+                    data = None
+                with self._lock:
+                    if data:
+                        self._ingest(data)
+                        self.stats["bulk_refreshes"] += 1
+                        due = [s for s in due if self._refreshed.get(s, 0) < now]
+                    else:
+                        self._bulk_retry_at = now + self.config["bulk_retry"]
+                        logging.info(f"ℹ️ 资金费率批量接口不可用，{self.config['bulk_retry']}秒内改为逐个刷新")
+            for symbol in due:
+                try:
+                    data = self._request(symbol)
+                except Exception as e:
+                    logging.error(f"获取{symbol}资金费率失败: {e}")
+                    data = None
+                if data:
+                    with self._lock:
+                        self._ingest(data)
+                        self.stats["single_refreshes"] += 1
+            return len(due)
+        finally:
+            with self._lock:
+                self._current_fetching.difference_update(claimed)
+    def get_current(self, symbol):
+        """当前资金费率（格式同 FundingRateAnalyzer.get_current_funding_rate），失败时返回 None"""
+        if time.time() < self.next_refresh(symbol):
+            self.stats["hits"] += 1
+        else:
+            self.refresh([symbol])
+        return self.current.get(symbol)
+
+    # ---------- 历史费率 ----------
+
+    def _path(self, symbol):
+        return os.path.join(self.config["path"], f"{symbol}.bin")
+
+    def _load(self, symbol):
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return np.empty((0, ROW_WIDTH), dtype=np.float64)
+        rows = os.path.getsize(path) // ROW_BYTES
+        return np.fromfile(path, dtype="<f8", count=rows * ROW_WIDTH).reshape(rows, ROW_WIDTH)
+
+    def _append(self, symbol, rows):
+        os.makedirs(self.config["path"], exist_ok=True)
+        with open(self._path(symbol), "ab") as f:
+            f.write(np.asarray(rows, dtype="<f8").tobytes())
+
+    def _fetch_history(self, symbol):
+        from core.api_client import public_data_api
+        if public_data_api is None:
+            return None
+        self.stats["history_requests"] += 1
+        result = public_data_api.funding_rate_history(instId=symbol, limit=str(self.config["history_limit"]))
+        if result and result.get("code") == "0":
+            return result.get("data", [])
+        return None
+
+    def get_history(self, symbol):
+        """
+        已结算资金费率 (n, 2) 数组 [fundingTime, realizedRate]，按时间升序
+
+        最近一次结算（当前 fundingTime 的上一期）已在本地时直接返回，否则请求一次补齐。
+        请求在锁外进行，同一标的同时只有一个请求；失败时 history_retry 秒后再试。
+        """
+        with self._lock:
+            if symbol not in self._history:
+                self._history[symbol] = self._load(symbol)
+            history = self._history[symbol]
+
+            data = self.current.get(symbol)
+            last_settled = None
+            if data and data["funding_time"]:
+                interval = data["next_funding_time"] - data["funding_time"]
+                if interval <= 0:
+                    interval = self.config["funding_interval"] * 1000
+                last_settled = data["funding_time"] - interval
+            stored_until = history[-1, 0] if len(history) else 0
+            if last_settled is None or stored_until >= last_settled or \
+                    self._history_checked.get(symbol) == last_settled or \
+                    symbol in self._history_fetching or time.time() < self._history_retry_at.get(symbol, 0):
+                return history
+            self._history_fetching.add(symbol)
+
+        try:
+            records = self._fetch_history(symbol)
+        except Exception as e:
+            logging.debug(f"获取{symbol}历史资金费率失败: {e}")
+            records = None
+
+        with self._lock:
+            self._history_fetching.discard(symbol)
+            history = self._history[symbol]
+            if records is None:
+                self._history_retry_at[symbol] = time.time() + self.config["history_retry"]
+                return history
+            self._history_checked[symbol] = last_settled
+            self._history_retry_at.pop(symbol, None)
+
+            stored_until = history[-1, 0] if len(history) else 0
+            rows = sorted(
+                (int(r["fundingTime"]), safe_float_convert(r.get("realizedRate") or r.get("fundingRate")))
+                for r in records if r.get("fundingTime")
+            )
+            rows = np.array([row for row in rows if row[0] > stored_until], dtype=np.float64).reshape(-1, ROW_WIDTH)
+            if len(rows):
+                self._append(symbol, rows)
+                history = np.vstack([history, rows])
+                self._history[symbol] = history
+            return history
+
+    def get_statistics(self, symbol):
+        """当前费率相对最近 stats_window 次结算的统计，数据不足时返回 None"""
+        data = self.get_current(symbol)
+        if data is None:
+            return None
+        history = self.get_history(symbol)[-self.config["stats_window"]:, 1]
+        return funding_statistics(history, data["funding_rate"])
+
+    def get_stats(self):
+        return dict(self.stats)
+
+# 全局实例
+funding_store = FundingStore()
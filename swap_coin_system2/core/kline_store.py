@@ -0,0 +1,355 @@
+import time
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from core.ohlcv_buffer import OHLCVRingBuffer, OHLCV_COLUMNS
+from core.candle_archive import candle_archive
+from core.resampler import ResampledSeries
+from config.constants import KLINE_STORE_CONFIG, CANDLE_ARCHIVE_CONFIG
+
+# 与 get_kline_data 保持一致的周期映射
+TIMEFRAME_MAP = {"1h": "1H", "4h": "4H", "1d": "1D", "15m": "15m", "30m": "30m"}
+
+# 各周期毫秒数，用于判断增量缺口是否超出单次请求范围
+BAR_MILLISECONDS = {
+    "1m": 60000, "3m": 180000, "5m": 300000, "15m": 900000, "30m": 1800000,
+    "1H": 3600000, "2H": 7200000, "4H": 14400000, "1D": 86400000,
+}
+
+def normalize_timeframe(timeframe):
+    """统一周期写法，保证 "1h" 和 "1H" 命中同一份缓存"""
+    return TIMEFRAME_MAP.get(timeframe.lower(), timeframe)
+
+class KlineStore:
+    """
+    共享K线存储 - 每个 (symbol, timeframe) 只请求一次超集数据
+
+    同一轮 process_symbol 中技术分析、链上替代指标、平仓检查都会请求
+    同一个交易对的1H K线，这里按最大需求量拉取一次，存入列式环形缓冲，
+    再按 limit 返回 NumPy 视图或按需构建的 DataFrame。
+    配置在 resample 中的高周期（4H / 1D）由基础周期缓冲本地聚合，不额外请求。
+    """
+
+    def __init__(self, ttl=None, base_limit=None, max_limit=None, incremental=None, archive=None):
+        self.ttl = ttl if ttl is not None else KLINE_STORE_CONFIG["ttl"]
+        self.base_limit = base_limit or KLINE_STORE_CONFIG["base_limit"]
+        self.max_limit = max_limit or KLINE_STORE_CONFIG["max_limit"]
+        self.incremental = KLINE_STORE_CONFIG["incremental"] if incremental is None else incremental
+        self.incremental_limit = KLINE_STORE_CONFIG["incremental_limit"]
+        self.buffer_capacity = KLINE_STORE_CONFIG["buffer_capacity"]
+        self.resample = KLINE_STORE_CONFIG.get("resample", {})
+        self.resample_offsets = KLINE_STORE_CONFIG.get("resample_offsets", {})
+        self.resample_max_limit = KLINE_STORE_CONFIG.get("resample_max_limit", {})
+        self.capacities = self._resample_capacities()
+        self._resampled = {}
+        self._resample_warned = set()
+        self.archive = candle_archive if archive is None else archive
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}         # (symbol, timeframe) -> 请求锁，同一缓冲同时只有一个线程请求
+        self.stats = {"hits": 0, "fetches": 0, "incremental_fetches": 0, "resampled": 0}
+
+    def _resample_capacities(self):
+        """基础周期的缓冲容量：放得下各高周期 resample_max_limit 根（外加开头丢弃的一个周期）"""
+        capacities = {}
+        for timeframe, base_timeframe in self.resample.items():
+            period_ms = BAR_MILLISECONDS.get(timeframe)
+            base_ms = BAR_MILLISECONDS.get(base_timeframe)
+            if period_ms is None or base_ms is None or period_ms % base_ms:
+                continue
+            needed = (self.resample_max_limit.get(timeframe, 0) + 1) * (period_ms // base_ms)
+            capacities[base_timeframe] = max(capacities.get(base_timeframe, self.buffer_capacity), needed)
+        return capacities
+
+    def capacity(self, timeframe):
+        return self.capacities.get(timeframe, self.buffer_capacity)
+
+    def _fetch(self, symbol, timeframe, limit, before=""):
+        """请求K线，返回按时间升序的 (n, 6) 数组"""
+        # 延迟导入，避免 core -> modules 的循环引用
+        from modules.technical_analysis import fetch_kline_array
+        if before:
+            self.stats["incremental_fetches"] += 1
+        else:
+            self.stats["fetches"] += 1
+        return fetch_kline_array(symbol, timeframe, limit, before=before)
+
+    def get_klines(self, symbol, timeframe="1H", limit=100):
+        """获取最近 limit 根K线 DataFrame（兼容旧调用方）"""
+        buffer = self.get_buffer(symbol, timeframe, limit)
+        if buffer is None:
+            return pd.DataFrame()
+        return buffer.to_dataframe(min(int(limit), self.max_limit))
+
+    def get_arrays(self, symbol, timeframe="1H", limit=100):
+        """获取最近 limit 根K线的只读 NumPy 视图字典，无数据时返回 None"""
+        buffer = self.get_buffer(symbol, timeframe, limit)
+        if buffer is None:
+            return None
+        return buffer.arrays(min(int(limit), self.max_limit))
+
+    def peek_arrays(self, symbol, timeframe="1H", limit=100):
+        """读取已缓存且未过期的K线视图，不发起请求，没有时返回 None"""
+        timeframe = normalize_timeframe(timeframe)
+        with self._lock:
+            entry = self._entries.get((symbol, timeframe))
+            if entry is None or time.time() - entry["time"] >= self.ttl:
+                return None
+            return entry["buffer"].arrays(min(int(limit), self.max_limit))
+
+    def get_buffer(self, symbol, timeframe="1H", limit=100):
+        """获取保证至少请求过 limit 根的环形缓冲，必要时请求REST"""
+        timeframe = normalize_timeframe(timeframe)
+        if timeframe in self.resample:
+            buffer = self._get_resampled(symbol, timeframe, int(limit))
+            if buffer is not None:
+                return buffer
+
+        key = (symbol, timeframe)
+        limit = min(int(limit), self.max_limit)
+        # 并发未命中时只有第一个线程请求，其余等它完成后直接命中刚写入的缓存
+        with self._key_lock(key):
+            return self._load_buffer(symbol, timeframe, key, limit)
+
+    def _key_lock(self, key):
+        with self._lock:
+            if key not in self._key_locks:
+                self._key_locks[key] = threading.Lock()
+            return self._key_locks[key]
+
+    def _load_buffer(self, symbol, timeframe, key, limit):
+        """命中缓存或增量 / 预热 / 完整请求（调用方持有该 key 的请求锁）"""
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.time()
+            fresh = entry is not None and now - entry["time"] < self.ttl
+            if fresh and entry["limit"] >= limit:
+                self.stats["hits"] += 1
+                return entry["buffer"]
+
+            # 超集请求：取历史最大需求量，后续更小的 limit 直接切片
+            fetch_limit = max(limit, self.base_limit, entry["limit"] if entry else 0)
+            fetch_limit = min(fetch_limit, self.max_limit)
+
+        if self.incremental and entry is not None and entry["limit"] >= limit:
+            if self._fetch_incremental(symbol, timeframe, entry):
+                self._archive_closed(symbol, timeframe, entry["buffer"])
+                return entry["buffer"]
+
+        if entry is None:
+            buffer = self._warm_start(symbol, timeframe, fetch_limit)
+            if buffer is not None:
+                with self._lock:
+                    self._entries[key] = {"buffer": buffer, "time": time.time(),
+                                          "limit": max(fetch_limit, min(len(buffer), self.max_limit))}
+                self._archive_closed(symbol, timeframe, buffer)
+                return buffer
+
+        rows = self._fetch(symbol, timeframe, fetch_limit)
+        if rows is None or not len(rows):
+            return None
+
+        buffer = OHLCVRingBuffer(max(self.capacity(timeframe), fetch_limit))
+        buffer.extend(rows)
+        with self._lock:
+            self._entries[key] = {"buffer": buffer, "limit": fetch_limit, "time": time.time()}
+        self._archive_closed(symbol, timeframe, buffer)
+        return buffer
+
+    def _get_resampled(self, symbol, timeframe, limit):
+        """
+        由基础周期聚合高周期K线
+
+        本地聚合最多 resample_max_limit 根，基础周期缓冲按此扩容；超过上限或基础
+        历史（单次REST的 max_limit 根，加上归档预热的部分）不足时记录告警并返回
+        None，由调用方直接请求该周期。
+        """
+        base_timeframe = self.resample[timeframe]
+        period_ms = BAR_MILLISECONDS.get(timeframe)
+        base_ms = BAR_MILLISECONDS.get(base_timeframe)
+        if period_ms is None or base_ms is None or period_ms % base_ms:
+            return None
+
+        max_local = self.resample_max_limit.get(timeframe, 0)
+        if limit > max_local:
+            self._warn_resample(symbol, timeframe, "limit",
+                                f"请求 {limit} 根超过本地聚合上限 {max_local}，直接请求REST")
+            return None
+
+        # 多取一个周期：历史开头不完整的那个周期会被丢弃
+        needed = (limit + 1) * (period_ms // base_ms)
+        base = self.get_buffer(symbol, base_timeframe, min(needed, self.max_limit))
+        if base is None:
+            return None
+        if len(base) < needed:
+            self._warn_resample(symbol, timeframe, "history",
+                                f"需要 {needed} 根{base_timeframe}，缓存只有 {len(base)} 根"
+                                f"（回填归档后可本地聚合），直接请求REST")
+            return None
+        with self._lock:
+            series = self._resampled.get((symbol, timeframe))
+            if series is None:
+                series = ResampledSeries(period_ms, self.resample_offsets.get(timeframe, 0), self.buffer_capacity)
+                self._resampled[(symbol, timeframe)] = series
+            buffer = series.sync(base)
+        if len(buffer) < limit:
+            return None
+        self.stats["resampled"] += 1
+        return buffer
+
+    def _warn_resample(self, symbol, timeframe, reason, message):
+        """本地聚合退回REST时告警（每个标的每种原因只记一次）"""
+        key = (symbol, timeframe, reason)
+        if key not in self._resample_warned:
+            self._resample_warned.add(key)
+            logging.warning(f"⚠️ {symbol} {timeframe} 本地聚合不可用: {message}")
+
+    def _archive_enabled(self):
+        return self.archive is not None and CANDLE_ARCHIVE_CONFIG["enabled"]
+
+    def _warm_start(self, symbol, timeframe, fetch_limit):
+        """
+        从本地归档预热：加载归档尾部，只请求停机期间的缺口
+
+        归档末尾连续的一段不足 fetch_limit 根或缺口超过单次请求上限时返回 None，
+        退回全量请求。
+        """
+        if not self._archive_enabled():
+            return None
+        bar_ms = BAR_MILLISECONDS.get(timeframe)
+        try:
+            last_ts = self.archive.last_time(symbol, timeframe)
+            if bar_ms is None or last_ts is None or self.archive.count(symbol, timeframe) < fetch_limit:
+                return None
+
+            missing_bars = int((time.time() * 1000 - last_ts) // bar_ms) + 1
+            if missing_bars >= self.max_limit:
+                return None
+
+            history = self.archive.load(symbol, timeframe, self.capacity(timeframe), bar_ms=bar_ms)
+            if len(history) < fetch_limit:
+                return None
+        except Exception as e:
+            logging.warning(f"⚠️ 读取K线归档失败 {symbol} {timeframe}: {e}")
+            return None
+
+        rows = self._fetch(symbol, timeframe, self.max_limit, before=last_ts - 1)
+        if rows is None or not len(rows):
+            return None
+
+        buffer = OHLCVRingBuffer(self.capacity(timeframe))
+        buffer.extend(history)
+        if not buffer.upsert(rows):
+            return None
+        logging.info(f"♻️ {symbol} {timeframe} 从归档预热 {len(history)} 根，补齐缺口 {len(rows)} 根")
+        return buffer
+
+    def _archive_closed(self, symbol, timeframe, buffer):
+        """把缓冲中已收盘的K线追加到本地归档"""
+        if not self._archive_enabled():
+            return
+        bar_ms = BAR_MILLISECONDS.get(timeframe)
+        if bar_ms is None:
+            return
+        try:
+            with self._lock:
+                arrays = buffer.arrays()
+                times = arrays["time"]
+                archived = self.archive.last_time(symbol, timeframe)
+                start = 0 if archived is None else int(times.searchsorted(archived, side="right"))
+                end = int(times.searchsorted(time.time() * 1000 - bar_ms, side="right"))
+                if end <= start:
+                    return
+                rows = np.column_stack([arrays[name][start:end] for name in OHLCV_COLUMNS])
+            self.archive.append(symbol, timeframe, rows, bar_ms=bar_ms)
+        except Exception as e:
+            logging.warning(f"⚠️ 写入K线归档失败 {symbol} {timeframe}: {e}")
+
+    def warm_start(self, symbols, timeframe="1H", limit=None):
+        """启动时为监控标的预热K线缓存"""
+        limit = limit or self.base_limit
+        loaded = 0
+        for symbol in symbols:
+            if self.get_buffer(symbol, timeframe, limit) is not None:
+                loaded += 1
+        logging.info(f"K线缓存预热完成: {loaded}/{len(symbols)} 个标的")
+        return loaded
+
+    def _fetch_incremental(self, symbol, timeframe, entry):
+        """
+        增量拉取：只请求最后一根K线及之后的数据
+
+        最后一根通常是未收盘K线，同时间戳的新数据原地覆盖它。
+        返回 False 表示无法增量（缺口过大或请求失败），由调用方退回全量请求。
+        """
+        buffer = entry["buffer"]
+        last_ts = buffer.last_time
+        bar_ms = BAR_MILLISECONDS.get(timeframe)
+        if last_ts is None or bar_ms is None:
+            return False
+
+        # 停机时间过长，缺口超过单次增量条数，直接全量
+        missing_bars = (time.time() * 1000 - last_ts) // bar_ms + 1
+        if missing_bars >= self.incremental_limit:
+            return False
+
+        # before 为开区间，减1毫秒以包含未收盘的最后一根
+        rows = self._fetch(symbol, timeframe, self.incremental_limit, before=last_ts - 1)
+        if rows is None or not len(rows) or len(rows) >= self.incremental_limit:
+            return False
+
+        with self._lock:
+            if not buffer.upsert(rows):
+                return False
+            entry["time"] = time.time()
+        return True
+
+    def apply_candle(self, symbol, timeframe, row):
+        """
+        合并一根推送K线（来自 WebSocket candle 频道）
+
+        row 为 [time, open, high, low, close, volume]。只更新已有缓存；
+        出现缺口时作废缓存，下次读取走REST补齐。
+        """
+        timeframe = normalize_timeframe(timeframe)
+        key = (symbol, timeframe)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            buffer = entry["buffer"]
+            last_ts = buffer.last_time
+            ts = int(row[0])
+            bar_ms = BAR_MILLISECONDS.get(timeframe)
+            if last_ts is None or ts < last_ts:
+                return False
+            if ts > last_ts and (bar_ms is None or ts - last_ts != bar_ms):
+                del self._entries[key]
+                return False
+
+            buffer.upsert([row])
+            entry["time"] = time.time()
+        if ts > last_ts:
+            self._archive_closed(symbol, timeframe, buffer)
+        return True
+
+    def invalidate(self, symbol=None, timeframe=None):
+        """清除缓存，symbol 为空时清空全部"""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+                self._resampled.clear()
+                return
+            for entries in (self._entries, self._resampled):
+                for key in list(entries):
+                    if key[0] == symbol and (timeframe is None or key[1] == normalize_timeframe(timeframe)):
+                        del entries[key]
+
+    def get_stats(self):
+        total = self.stats["hits"] + self.stats["fetches"] + self.stats["incremental_fetches"]
+        hit_rate = self.stats["hits"] / total if total else 0.0
+        return {**self.stats, "hit_rate": hit_rate, "entries": len(self._entries)}
+
+# 全局实例
+kline_store = KlineStore()
@@ -0,0 +1,276 @@
+import json
+import time
+import asyncio
+import logging
+import threading
+from config.constants import MARKET_STREAM_CONFIG
+from utils.common_utils import safe_float_convert
+
+try:
+    import websockets
+except ImportError:  # 未安装时退回REST轮询
+    websockets = None
+
+class MarketDataStream:
+    """
+    WebSocket 行情引擎 - 订阅 OKX 公共频道并在内存中维护最新状态
+
+    - tickers / books 走 public 地址，candle 频道走 business 地址
+    - 后台线程运行独立事件循环，断线自动重连并重新订阅
+    - K线推送直接合并进 kline_store，盘口增量合并进 order_book_manager，
+      校验失败时单独重新订阅该标的以获取新快照；等待快照期间忽略该标的的增量，
+      每个标的同时只安排一次重新订阅
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(MARKET_STREAM_CONFIG, **(config or {}))
+        self.symbols = set()
+        self.tickers = {}
+        self.candles = {}
+        self.resyncing = set()       # 已安排重新订阅、等待新快照的标的
+        self.running = False
+        self.connected = {}
+        self.stats = {"messages": 0, "reconnects": 0, "errors": 0, "resyncs": 0}
+        self._loop = None
+        self._thread = None
+        self._sockets = {}
+        self._record_file = None
+        self._lock = threading.Lock()
+
+    # ---------- 生命周期 ----------
+
+    def start(self, symbols):
+        """启动后台行情线程"""
+        if not self.config.get("enabled", True):
+            logging.info("WebSocket 行情已禁用，使用REST轮询")
+            return False
+        if websockets is None:
+            logging.warning("⚠️ 未安装 websockets，WebSocket 行情不可用，使用REST轮询")
+            return False
+        if self.running:
+            self.update_symbols(symbols)
+            return True
+
+        self.symbols = set(symbols)
+        self.running = True
+        if self.config.get("record_path"):
+            self._record_file = open(self.config["record_path"], "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._thread_main, name="market-stream", daemon=True)
+        self._thread.start()
+        logging.info(f"✅ WebSocket 行情启动，订阅 {len(self.symbols)} 个标的")
+        return True
+
+    def stop(self):
+        """停止行情线程"""
+        self.running = False
+        if self._loop is not None:
+            for ws in list(self._sockets.values()):
+                asyncio.run_coroutine_threadsafe(ws.close(), self._loop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._record_file is not None:
+            self._record_file.close()
+            self._record_file = None
+
+    def update_symbols(self, symbols):
+        """更新订阅列表，已连接时增量订阅/退订"""
+        new_symbols = set(symbols)
+        added = new_symbols - self.symbols
+        removed = self.symbols - new_symbols
+        self.symbols = new_symbols
+        if self._loop is None:
+            return
+        for url in self._sockets:
+            if added:
+                asyncio.run_coroutine_threadsafe(self._send_op(url, "subscribe", added), self._loop)
+            if removed:
+                asyncio.run_coroutine_threadsafe(self._send_op(url, "unsubscribe", removed), self._loop)
+
+    def _thread_main(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(asyncio.gather(
+                self._connection_loop(self.config["public_url"], self.config["public_channels"]),
+                self._connection_loop(self.config["business_url"], self.config["business_channels"]),
+            ))
+        except Exception as e:
+            logging.error(f"❌ WebSocket 行情线程异常退出: {e}")
+        finally:
+            self._loop.close()
+            self._loop = None
+
+    # ---------- 连接与订阅 ----------
+
+    def _build_args(self, channels, symbols):
+        return [{"channel": channel, "instId": symbol} for channel in channels for symbol in sorted(symbols)]
+
+    async def _send_op(self, url, op, symbols):
+        ws = self._sockets.get(url)
+        if ws is None:
+            return
+        channels = self.config["public_channels"] if url == self.config["public_url"] else self.config["business_channels"]
+        args = self._build_args(channels, symbols)
+        if args:
+            await ws.send(json.dumps({"op": op, "args": args}))
+
+    async def _connection_loop(self, url, channels):
+        """单个地址的连接循环：断线后指数退避重连并重新订阅"""
+        if not channels:
+            return
+        delay = self.config["reconnect_delay"]
+        while self.running:
+            try:
+                async with websockets.connect(url, ping_interval=None, open_timeout=10) as ws:
+                    self._sockets[url] = ws
+                    self.connected[url] = True
+                    delay = self.config["reconnect_delay"]
+                    logging.info(f"🔌 WebSocket 已连接: {url}")
+
+                    args = self._build_args(channels, self.symbols)
+                    if args:
+                        await ws.send(json.dumps({"op": "subscribe", "args": args}))
+                    await self._consume(ws)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logging.warning(f"⚠️ WebSocket 连接中断 {url}: {e}")
+            finally:
+                self._sockets.pop(url, None)
+                self.connected[url] = False
+                self._on_disconnect(channels)
+
+            if self.running:
+                self.stats["reconnects"] += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.config["max_reconnect_delay"])
+
+    async def _consume(self, ws):
+        """读取消息，空闲超时发送 ping 保活"""
+        while self.running:
+            try:
+                raw = await asyncio.wait_for(ws.recv(), timeout=self.config["ping_interval"])
+            except asyncio.TimeoutError:
+                await ws.send("ping")
+                continue
+            self.handle_message(raw)
+
+    async def _resync_book(self, symbol):
+        """盘口校验失败：退订再订阅，交易所会重新推送快照"""
+        url = self.config["public_url"]
+        ws = self._sockets.get(url)
+        if ws is None:
+            with self._lock:
+                self.resyncing.discard(symbol)
+            return
+        args = [{"channel": channel, "instId": symbol}
+                for channel in self.config["public_channels"] if channel.startswith("books")]
+        if args:
+            await ws.send(json.dumps({"op": "unsubscribe", "args": args}))
+            await ws.send(json.dumps({"op": "subscribe", "args": args}))
+
+    def _on_disconnect(self, channels):
+        if any(channel.startswith("books") for channel in channels):
+            from core.order_book import order_book_manager
+            order_book_manager.discard()
+            # 重连后重新订阅会推送快照
+            with self._lock:
+                self.resyncing.clear()
+        # 断线期间可能漏掉K线推送，作废对应缓存让下次读取走REST补齐
+        if any(channel.startswith("candle") for channel in channels):
+            from core.kline_store import kline_store
+            for symbol, bar in list(self.candles):
+                kline_store.invalidate(symbol, bar)
+            self.candles.clear()
+
+    # ---------- 消息处理 ----------
+
+    def handle_message(self, raw):
+        """解析一条推送消息并更新内存状态"""
+        if raw == "pong":
+            return
+        self.stats["messages"] += 1
+        if self._record_file is not None:
+            self._record_file.write(raw + "\n")
+
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            logging.debug(f"无法解析WebSocket消息: {raw[:100]}")
+            return
+
+        if "event" in message:
+            if message["event"] == "error":
+                self.stats["errors"] += 1
+                logging.warning(f"⚠️ WebSocket 订阅错误: {message.get('msg')}")
+            return
+
+        arg = message.get("arg", {})
+        channel = arg.get("channel", "")
+        symbol = arg.get("instId")
+        data = message.get("data") or []
+        if not symbol or not data:
+            return
+
+        now = time.time()
+        if channel == "tickers":
+            self._on_ticker(symbol, data[0], now)
+        elif channel.startswith("books"):
+            self._on_book(symbol, message.get("action"), data[0])
+        elif channel.startswith("candle"):
+            self._on_candles(symbol, channel[len("candle"):], data, now)
+
+    def _on_ticker(self, symbol, item, now):
+        with self._lock:
+            self.tickers[symbol] = {
+                "last": safe_float_convert(item.get("last")),
+                "bid": safe_float_convert(item.get("bidPx")),
+                "ask": safe_float_convert(item.get("askPx")),
+                "ts": int(item.get("ts", 0)),
+                "received": now,
+            }
+
+    def _on_book(self, symbol, action, item):
+        from core.order_book import order_book_manager
+        with self._lock:
+            if symbol in self.resyncing:
+                if action == "update":
+                    return
+                self.resyncing.discard(symbol)
+        if order_book_manager.apply(symbol, action, item) or self._loop is None:
+            return
+        with self._lock:
+            if symbol in self.resyncing:
+                return
+            self.resyncing.add(symbol)
+        self.stats["resyncs"] += 1
+        asyncio.run_coroutine_threadsafe(self._resync_book(symbol), self._loop)
+
+    def _on_candles(self, symbol, bar, rows, now):
+        from core.kline_store import kline_store
+        for item in rows:
+            row = [int(item[0]), float(item[1]), float(item[2]), float(item[3]), float(item[4]), float(item[5])]
+            self.candles[(symbol, bar)] = {"row": row, "received": now}
+            kline_store.apply_candle(symbol, bar, row)
+
+    # ---------- 读取接口 ----------
+
+    def _is_fresh(self, item):
+        return item is not None and time.time() - item["received"] < self.config["stale_seconds"]
+
+    def get_last_price(self, symbol):
+        """最新成交价，数据过期或未订阅时返回 None"""
+        ticker = self.tickers.get(symbol)
+        return ticker["last"] if self._is_fresh(ticker) and ticker["last"] > 0 else None
+
+    def get_book(self, symbol, depth=5):
+        """推送维护的前 depth 档盘口，格式与 REST get_orderbook 的 data[0] 一致"""
+        from core.order_book import order_book_manager
+        return order_book_manager.get_book(symbol, depth, allow_rest=False)
+
+    def get_stats(self):
+        from core.order_book import order_book_manager
+        return {**self.stats, "tickers": len(self.tickers), "books": len(order_book_manager.books),
+                "connected": sum(1 for v in self.connected.values() if v)}
+
+# 全局实例
+market_stream = MarketDataStream()
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+OHLCV_COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+
+class OHLCVRingBuffer:
+    """
+    列式 OHLCV 环形缓冲 - 单个 (symbol, timeframe) 的K线存储
+
+    数据保存在一块预分配的 float64 数组 (6 列 x 2*capacity) 中，写满后把最近
+    的K线搬到一块新数组的开头（均摊 O(1)），因此任意最近 n 根都是连续内存，
+    可以直接返回零拷贝的只读 NumPy 视图。追加只写视图范围之外的位置；搬迁和
+    覆盖已有K线（未收盘K线更新）都换用新数组，已发出的视图是不变的快照，不会
+    被改写或读到半行。DataFrame 只在旧调用方需要时才构建。
+    """
+
+    def __init__(self, capacity=500):
+        self.capacity = int(capacity)
+        self._data = np.zeros((len(OHLCV_COLUMNS), 2 * self.capacity), dtype=np.float64)
+        self._start = 0
+        self._end = 0
+        self.version = 0
+        self._frame_cache = None
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def last_time(self):
+        return int(self._data[0, self._end - 1]) if len(self) else None
+
+    @property
+    def first_time(self):
+        return int(self._data[0, self._start]) if len(self) else None
+
+    def _reserve(self, count):
+        """保证尾部还能写入 count 根"""
+        if self._end + count <= self._data.shape[1]:
+            return
+        keep = min(len(self), self.capacity - count) if count < self.capacity else 0
+        data = np.zeros_like(self._data)
+        data[:, :keep] = self._data[:, self._end - keep:self._end]
+        self._data = data
+        self._start, self._end = 0, keep
+
+    def extend(self, rows):
+        """追加按时间升序排列的K线，rows 形状为 (n, 6)"""
+        rows = np.asarray(rows, dtype=np.float64)
+        if rows.ndim != 2 or len(rows) == 0:
+            return
+        if len(rows) > self.capacity:
+            rows = rows[-self.capacity:]
+        self._reserve(len(rows))
+        self._data[:, self._end:self._end + len(rows)] = rows.T
+        self._end += len(rows)
+        if len(self) > self.capacity:
+            self._start = self._end - self.capacity
+        self._touch()
+
+    def upsert(self, rows):
+        """
+        合并新K线：时间戳相同及之后的K线整体替换，更晚的追加
+
+        覆盖已有K线时先把之前的K线复制到新数组再写入（写时复制，只复制保留的
+        部分），已发出的视图仍指向旧数组。rows 必须按时间升序。返回 False 表示
+        新数据早于缓冲起点，无法合并。
+        """
+        rows = np.asarray(rows, dtype=np.float64)
+        if rows.ndim != 2 or len(rows) == 0:
+            return True
+        if not len(self):
+            self.extend(rows)
+            return True
+
+        first_ts = rows[0, 0]
+        if first_ts < self._data[0, self._start]:
+            return False
+
+        times = self._data[0, self._start:self._end]
+        cut = self._start + int(np.searchsorted(times, first_ts, side="left"))
+        if cut < self._end:
+            keep = cut - self._start
+            data = np.empty_like(self._data)
+            data[:, :keep] = self._data[:, self._start:cut]
+            self._data = data
+            self._start, self._end = 0, keep
+        self.extend(rows)
+        return True
+
+    def _touch(self):
+        self.version += 1
+        self._frame_cache = None
+
+    def column(self, name, limit=None):
+        """某一列最近 limit 根的只读视图"""
+        return self._view(OHLCV_COLUMNS.index(name), limit)
+
+    def arrays(self, limit=None):
+        """全部列最近 limit 根的只读视图字典"""
+        return {name: self._view(i, limit) for i, name in enumerate(OHLCV_COLUMNS)}
+
+    def _view(self, index, limit):
+        start = self._start if limit is None else max(self._start, self._end - int(limit))
+        view = self._data[index, start:self._end]
+        view.flags.writeable = False
+        return view
+
+    def to_dataframe(self, limit=None):
+        """
+        兼容旧调用方的 DataFrame
+
+        按版本缓存完整 DataFrame，每次返回浅拷贝：调用方追加指标列不影响缓存。
+        """
+        if self._frame_cache is None:
+            frame = pd.DataFrame({name: self._view(i, None).copy() for i, name in enumerate(OHLCV_COLUMNS)})
+            frame["time"] = frame["time"].astype(np.int64)
+            self._frame_cache = frame
+        frame = self._frame_cache if limit is None else self._frame_cache.tail(int(limit))
+        return frame.reset_index(drop=True).copy(deep=False)
@@ -0,0 +1,253 @@
+import time
+import zlib
+import bisect
+import logging
+import threading
+from config.constants import ORDER_BOOK_CONFIG
+
+CHECKSUM_LEVELS = 25
+
+class OrderBook:
+    """
+    单个标的的本地订单簿 - 快照 + 增量合并
+
+    价格按浮点数维护有序列表（bisect 插入/删除），同时保留交易所原始的价格
+    和数量字符串，用于计算 OKX 校验和。数量为 "0" 的档位表示删除。
+    """
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.bids = {}            # price -> [px_str, sz_str]
+        self.asks = {}
+        self._bid_prices = []     # 升序，最优买价在末尾
+        self._ask_prices = []     # 升序，最优卖价在开头
+        self.seq_id = None
+        self.ts = 0
+        self.received = 0
+
+    def __len__(self):
+        return len(self.bids) + len(self.asks)
+
+    def _apply_levels(self, levels, book, prices):
+        for level in levels:
+            px_str, sz_str = level[0], level[1]
+            price = float(px_str)
+            if float(sz_str) == 0:
+                if book.pop(price, None) is not None:
+                    del prices[bisect.bisect_left(prices, price)]
+                continue
+            if price not in book:
+                bisect.insort(prices, price)
+            book[price] = [px_str, sz_str]
+
+    def apply_snapshot(self, data):
+        self.bids.clear()
+        self.asks.clear()
+        self._bid_prices.clear()
+        self._ask_prices.clear()
+        self._apply_levels(data.get("bids", []), self.bids, self._bid_prices)
+        self._apply_levels(data.get("asks", []), self.asks, self._ask_prices)
+        self._stamp(data)
+
+    def apply_update(self, data):
+        """
+        合并一条增量推送，返回 False 表示序号不连续或校验和不一致，需要重新订阅
+        """
+        prev_seq = data.get("prevSeqId")
+        if self.seq_id is not None and prev_seq not in (None, "", -1) and int(prev_seq) != self.seq_id:
+            logging.warning(f"⚠️ {self.symbol} 订单簿序号不连续: {prev_seq} != {self.seq_id}")
+            return False
+        self._apply_levels(data.get("bids", []), self.bids, self._bid_prices)
+        self._apply_levels(data.get("asks", []), self.asks, self._ask_prices)
+        self._stamp(data)
+        return self.verify(data.get("checksum"))
+
+    def _stamp(self, data):
+        if data.get("seqId") not in (None, ""):
+            self.seq_id = int(data["seqId"])
+        self.ts = int(data.get("ts") or 0)
+        self.received = time.time()
+
+    def checksum(self):
+        """OKX 校验和：前25档买卖交替拼接 价格:数量 后取 CRC32（有符号）"""
+        bids = self.top_bids(CHECKSUM_LEVELS)
+        asks = self.top_asks(CHECKSUM_LEVELS)
+        parts = []
+        for i in range(max(len(bids), len(asks))):
+            if i < len(bids):
+                parts.extend(bids[i][:2])
+            if i < len(asks):
+                parts.extend(asks[i][:2])
+        value = zlib.crc32(":".join(parts).encode())
+        return value - (1 << 32) if value >= (1 << 31) else value
+
+    def verify(self, expected):
+        if expected in (None, ""):
+            return True
+        ok = self.checksum() == int(expected)
+        if not ok:
+            logging.warning(f"⚠️ {self.symbol} 订单簿校验和不一致，丢弃本地盘口")
+        return ok
+
+    # ---------- 查询 ----------
+
+    def top_bids(self, n):
+        return [self.bids[p] for p in reversed(self._bid_prices[-n:])] if n > 0 else []
+
+    def top_asks(self, n):
+        return [self.asks[p] for p in self._ask_prices[:n]]
+
+    def top(self, n=5):
+        """前 n 档盘口，格式与 REST get_orderbook 的 data[0] 一致"""
+        return {"bids": self.top_bids(n), "asks": self.top_asks(n), "ts": self.ts, "received": self.received}
+
+    @property
+    def best_bid(self):
+        return self._bid_prices[-1] if self._bid_prices else None
+
+    @property
+    def best_ask(self):
+        return self._ask_prices[0] if self._ask_prices else None
+
+    @property
+    def mid_price(self):
+        if self.best_bid is None or self.best_ask is None:
+            return None
+        return (self.best_bid + self.best_ask) / 2
+
+    def cumulative_depth(self, side, levels=None, within_pct=None):
+        """
+        累计挂单量
+
+        levels: 只统计前 N 档；within_pct: 只统计距最优价该比例以内的档位
+        """
+        if side == "bids":
+            prices = self._bid_prices[::-1]
+            book = self.bids
+        else:
+            prices = self._ask_prices
+            book = self.asks
+        if levels is not None:
+            prices = prices[:levels]
+        if within_pct is not None and prices:
+            best = prices[0]
+            limit = best * (1 - within_pct) if side == "bids" else best * (1 + within_pct)
+            prices = [p for p in prices if (p >= limit if side == "bids" else p <= limit)]
+        return sum(float(book[p][1]) for p in prices)
+
+    def imbalance(self, levels=5):
+        """买卖盘失衡度 (bid - ask) / (bid + ask)，范围 [-1, 1]"""
+        bid = self.cumulative_depth("bids", levels)
+        ask = self.cumulative_depth("asks", levels)
+        return (bid - ask) / (bid + ask) if bid + ask > 0 else 0.0
+
+class OrderBookManager:
+    """
+    订单簿管理 - WebSocket books 频道维护的本地盘口，REST 快照兜底
+
+    market_stream 把 snapshot/update 推送交给 apply；信号计算通过
+    get_depth_data 读取，推送不可用时按 rest_ttl 缓存 REST 快照，避免每次都请求。
+    下单定价用 fresh=True 读取：没有推送盘口时直接请求 REST，不用缓存的快照。
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(ORDER_BOOK_CONFIG, **(config or {}))
+        self.books = {}
+        self._rest_books = {}
+        self._lock = threading.Lock()
+        self.stats = {"snapshots": 0, "updates": 0, "resyncs": 0, "rest_fetches": 0}
+
+    def apply(self, symbol, action, data):
+        """
+        合并一条推送，action 为 snapshot / update（books5 等无 action 的频道视为快照）
+
+        返回 False 表示本地盘口已失效，调用方应重新订阅获取快照。
+        """
+        with self._lock:
+            if action == "update":
+                book = self.books.get(symbol)
+                if book is None:
+                    return False
+                self.stats["updates"] += 1
+                if not book.apply_update(data):
+                    del self.books[symbol]
+                    self.stats["resyncs"] += 1
+                    return False
+                return True
+
+            book = self.books.get(symbol) or OrderBook(symbol)
+            book.apply_snapshot(data)
+            self.stats["snapshots"] += 1
+            if not book.verify(data.get("checksum")):
+                self.books.pop(symbol, None)
+                self.stats["resyncs"] += 1
+                return False
+            self.books[symbol] = book
+            return True
+
+    def discard(self, symbol=None):
+        """丢弃本地盘口（断线时调用）"""
+        with self._lock:
+            if symbol is None:
+                self.books.clear()
+            else:
+                self.books.pop(symbol, None)
+
+    def _is_fresh(self, book):
+        return book is not None and len(book) > 0 and time.time() - book.received < self.config["stale_seconds"]
+
+    def get_order_book(self, symbol, allow_rest=True, fresh=False):
+        """
+        返回可用的 OrderBook（推送优先，其次 REST 快照缓存），都不可用时返回 None
+
+        fresh=True 时跳过 REST 快照缓存，推送不可用就重新请求。
+        """
+        book = self.books.get(symbol)
+        if self._is_fresh(book):
+            return book
+        if not allow_rest or not self.config["rest_fallback"]:
+            return None
+
+        cached = self._rest_books.get(symbol)
+        if not fresh and cached is not None and time.time() - cached.received < self.config["rest_ttl"]:
+            return cached
+        return self._fetch_rest(symbol)
+
+    def _fetch_rest(self, symbol):
+        import core.api_client
+        market_api = core.api_client.market_api
+        if market_api is None:
+            return None
+        try:
+            from utils.performance_monitor import performance_monitor
+            performance_monitor.record_api_call("market_data")
+            result = market_api.get_orderbook(instId=symbol, sz=self.config["rest_depth"])
+            if not result or result.get("code") != "0" or not result.get("data"):
+                return None
+        except Exception as e:
+            logging.debug(f"获取{symbol}盘口快照失败: {e}")
+            return None
+
+        book = OrderBook(symbol)
+        book.apply_snapshot(result["data"][0])
+        self._rest_books[symbol] = book
+        self.stats["rest_fetches"] += 1
+        return book
+
+    def get_book(self, symbol, depth=5, allow_rest=True, fresh=False):
+        """前 depth 档盘口字典，格式与 REST get_orderbook 的 data[0] 一致"""
+        book = self.get_order_book(symbol, allow_rest, fresh)
+        if book is None:
+            return None
+        with self._lock:
+            return book.top(depth)
+
+    def get_depth_data(self, symbol):
+        """信号计算使用的深度数据（前 signal_depth 档）"""
+        return self.get_book(symbol, self.config["signal_depth"])
+
+    def get_stats(self):
+        return {**self.stats, "books": len(self.books)}
+
+# 全局实例
+order_book_manager = OrderBookManager()
@@ -0,0 +1,111 @@
+import time
+import asyncio
+import logging
+import threading
+from config.constants import RATE_LIMIT_CONFIG
+
+class TokenBucket:
+    """
+    令牌桶 - 以 rate 个/秒 匀速补充，最多积累 capacity 个
+
+    reserve() 立即扣除令牌并返回需要等待的秒数（令牌可以透支为负数，
+    相当于排队预约），因此多个线程/协程同时请求也能按到达顺序均匀放行。
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, tokens=1):
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= tokens
+            wait = max(0.0, -self.tokens / self.rate)
+            return max(wait, self.blocked_until - now)
+
+    def block(self, seconds):
+        """清空令牌并暂停放行 seconds 秒（收到限流响应时调用）"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens = min(self.tokens, 0.0)
+            self.blocked_until = max(self.blocked_until, now + seconds)
+
+class RateLimiter:
+    """
+    按 OKX 接口分组的限流器
+
+    每个分组一个令牌桶，速率取自官方公布的限速；请求前 acquire 只在令牌
+    耗尽时等待。收到 429 / 50011 时 throttle 对应分组，暂停一段时间。
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(RATE_LIMIT_CONFIG, **(config or {}))
+        self.buckets = {
+            group: TokenBucket(spec["rate"] / spec["per"], spec.get("burst", spec["rate"]))
+            for group, spec in self.config["groups"].items()
+        }
+        self.stats = {group: {"calls": 0, "waits": 0, "wait_time": 0.0, "throttles": 0} for group in self.buckets}
+
+    def group_for_path(self, path):
+        """根据请求路径确定限流分组"""
+        path = path.split("?", 1)[0]
+        if path in self.config["endpoints"]:
+            return self.config["endpoints"][path]
+        parts = path.strip("/").split("/")
+        section = parts[2] if len(parts) > 2 else ""
+        return self.config["sections"].get(section, self.config["default_group"])
+
+    def _reserve(self, group, tokens):
+        bucket = self.buckets.get(group) or self.buckets[self.config["default_group"]]
+        wait = bucket.reserve(tokens)
+        stats = self.stats.get(group) or self.stats[self.config["default_group"]]
+        stats["calls"] += 1
+        if wait > 0:
+            stats["waits"] += 1
+            stats["wait_time"] += wait
+        return wait
+
+    def acquire(self, group, tokens=1):
+        """阻塞直到分组放行，返回等待秒数"""
+        wait = self._reserve(group, tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, group, tokens=1):
+        """协程版 acquire，等待期间不阻塞事件循环"""
+        wait = self._reserve(group, tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def throttle(self, group, seconds=None):
+        """收到限流响应后暂停该分组"""
+        seconds = self.config["throttle_seconds"] if seconds is None else seconds
+        bucket = self.buckets.get(group) or self.buckets[self.config["default_group"]]
+        bucket.block(seconds)
+        if group in self.stats:
+            self.stats[group]["throttles"] += 1
+        logging.warning(f"⚠️ {group} 接口触发限流，暂停 {seconds} 秒")
+
+    @staticmethod
+    def is_rate_limited(response):
+        """OKX 响应是否为限流错误"""
+        return isinstance(response, dict) and (
+            response.get("code") == "50011" or "Too Many Requests" in str(response.get("msg", "")))
+
+    def get_stats(self):
+        return {group: dict(stats) for group, stats in self.stats.items()}
+
+# 全局实例
+rate_limiter = RateLimiter()
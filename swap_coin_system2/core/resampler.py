@@ -0,0 +1,70 @@
+import numpy as np
+from core.ohlcv_buffer import OHLCVRingBuffer
+
+def bucket_start(times, period_ms, offset_ms=0):
+    """K线所属高周期的起始时间戳；offset_ms 为周期切分点相对 UTC 的提前量"""
+    times = np.asarray(times, dtype=np.int64)
+    return (times + offset_ms) // period_ms * period_ms - offset_ms
+
+def resample_arrays(arrays, period_ms, offset_ms=0):
+    """
+    把按时间升序的基础K线聚合为高周期，返回 (n, 6) 数组
+
+    开盘取周期内第一根、收盘取最后一根，最高/最低/成交量用 reduceat 一次算完。
+    """
+    times = arrays["time"]
+    if not len(times):
+        return np.empty((0, 6), dtype=np.float64)
+    buckets = bucket_start(times, period_ms, offset_ms)
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(times)] - 1
+    return np.column_stack([
+        buckets[starts].astype(np.float64),
+        arrays["open"][starts],
+        np.maximum.reduceat(arrays["high"], starts),
+        np.minimum.reduceat(arrays["low"], starts),
+        arrays["close"][ends],
+        np.add.reduceat(arrays["volume"], starts),
+    ])
+
+class ResampledSeries:
+    """
+    单个 (symbol, 高周期) 的聚合K线 - 跟随基础周期缓冲增量更新
+
+    基础缓冲有新数据时，只从最后一根（可能未走完的）高周期K线的起点重新聚合
+    并 upsert；基础缓冲被整体替换（全量重拉）时重建。历史开头不完整的周期丢弃。
+    """
+
+    def __init__(self, period_ms, offset_ms=0, capacity=500):
+        self.period_ms = period_ms
+        self.offset_ms = offset_ms
+        self.capacity = capacity
+        self.buffer = OHLCVRingBuffer(capacity)
+        self._base = None
+        self._base_version = None
+
+    def _rebuild(self, arrays):
+        rows = resample_arrays(arrays, self.period_ms, self.offset_ms)
+        if len(rows) and arrays["time"][0] > rows[0, 0]:
+            rows = rows[1:]
+        self.buffer = OHLCVRingBuffer(self.capacity)
+        self.buffer.extend(rows)
+
+    def sync(self, base):
+        """从基础周期缓冲同步，返回聚合后的缓冲"""
+        if base is self._base and base.version == self._base_version:
+            return self.buffer
+
+        arrays = base.arrays()
+        last = self.buffer.last_time
+        if base is not self._base or last is None or base.first_time > last:
+            self._rebuild(arrays)
+        else:
+            start = int(np.searchsorted(arrays["time"], last, side="left"))
+            tail = {name: values[start:] for name, values in arrays.items()}
+            if not self.buffer.upsert(resample_arrays(tail, self.period_ms, self.offset_ms)):
+                self._rebuild(arrays)
+
+        self._base = base
+        self._base_version = base.version
+        return self.buffer
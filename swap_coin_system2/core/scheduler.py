@@ -1,38 +1,184 @@
 import time
+import heapq
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config.constants import SCHEDULER_CONFIG
 
-class SmartScheduler:
-    def __init__(self):
+# 任务优先级：数值越小越先执行（同时到期时）
+PRIORITY_CRITICAL = 0      # 平仓 / 风控
+PRIORITY_HIGH = 10         # 高频监控、余额同步
+PRIORITY_NORMAL = 20
+PRIORITY_LOW = 30          # 报告、清理等
+
+FIXED_RATE = "fixed_rate"      # 按计划时间等间隔执行，不随执行耗时漂移
+FIXED_DELAY = "fixed_delay"    # 上次执行结束后间隔 interval 再执行
+
+class ScheduledTask:
+    def __init__(self, name, function, interval, priority, mode, timeout, api_type=None):
+        self.name = name
+        self.function = function
+        self.interval = interval
+        self.priority = priority
+        self.mode = mode
+        self.timeout = timeout
+        self.api_type = api_type
+        self.next_run = 0.0
+        self.started = None          # 正在执行时为开始时间
+        self.timed_out = False
+        self.stats = {"runs": 0, "failures": 0, "overruns": 0, "timeouts": 0,
+                      "total_time": 0.0, "max_time": 0.0, "max_lateness": 0.0}
+
+class DeadlineScheduler:
+    """
+    截止时间调度器 - 最小堆按下次执行时间排序，等待到最近的截止时间再唤醒
+
+    - fixed_rate 任务按计划时间推进，执行耗时不会让间隔漂移；fixed_delay 任务
+      在上次结束后再等 interval
+    - 任务在线程池中执行，慢任务（如40秒的高频监控）不会推迟平仓、风控等任务；
+      同时到期时按优先级提交
+    - 同一任务不重叠执行：到期时上次还没结束记为 overrun 并跳到下一个计划时间
+    - 超过 timeout 的任务记录告警（线程无法强制中断，结束前不会再次启动）
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(SCHEDULER_CONFIG, **(config or {}))
         self.tasks = {}
-        
-    def add_task(self, name, function, interval, api_type=None):
-        self.tasks[name] = {
-            "function": function,
-            "interval": interval,
-            "last_run": 0,
-            "api_type": api_type
-        }
-        logging.info(f"添加调度任务: {name} (间隔 {interval}s)")
-    
+        self._heap = []              # (next_run, priority, seq, name)
+        self._seq = 0
+        self._executor = None
+        self._cond = threading.Condition()
+
+    def _push(self, task):
+        self._seq += 1
+        heapq.heappush(self._heap, (task.next_run, task.priority, self._seq, task.name))
+
+    def add_task(self, name, function, interval, api_type=None, priority=PRIORITY_NORMAL,
+                 mode=FIXED_RATE, timeout=None, delay=0):
+        """登记任务，delay 秒后首次执行（默认立即）"""
+        if timeout is None:
+            timeout = max(interval, self.config["min_timeout"])
+        with self._cond:
+            task = ScheduledTask(name, function, interval, priority, mode, timeout, api_type)
+            task.next_run = time.time() + delay
+            self.tasks[name] = task
+            self._push(task)
+            self._cond.notify()
+        logging.info(f"添加调度任务: {name} (间隔 {interval}s, 优先级 {priority}, {mode})")
+
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.config["max_workers"],
+                                                thread_name_prefix="scheduler")
+        return self._executor
+
+    # ---------- 执行 ----------
+
+    def _execute(self, task):
+        start_t = time.time()
+        try:
+            logging.info(f"▶️ 开始执行任务: {task.name}")
+            task.function()
+            logging.info(f"✅ 任务完成: {task.name} (耗时 {time.time() - start_t:.2f}s)")
+        except Exception as e:
+            task.stats["failures"] += 1
+            logging.error(f"❌ 任务 {task.name} 执行崩溃: {e}")
+            import traceback
+            logging.error(traceback.format_exc())
+        finally:
+            cost = time.time() - start_t
+            with self._cond:
+                task.stats["runs"] += 1
+                task.stats["total_time"] += cost
+                task.stats["max_time"] = max(task.stats["max_time"], cost)
+                task.started = None
+                if task.mode == FIXED_DELAY and self.tasks.get(task.name) is task:
+                    task.next_run = time.time() + task.interval
+                    self._push(task)
+                self._cond.notify()
+
+    def _reschedule(self, task, now):
+        """fixed_rate：推进到 now 之后的下一个计划时间，跳过的周期记为 overrun"""
+        task.next_run += task.interval
+        if task.next_run <= now:
+            skipped = int((now - task.next_run) // task.interval) + 1
+            task.stats["overruns"] += skipped
+            task.next_run += skipped * task.interval
+        self._push(task)
+
+    def run_pending(self, now=None):
+        """提交所有已到期的任务（按优先级），返回提交数量"""
+        now = time.time() if now is None else now
+        due = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                _, _, _, name = heapq.heappop(self._heap)
+                task = self.tasks.get(name)
+                if task is not None:
+                    due.append(task)
+            due.sort(key=lambda t: (t.priority, t.next_run))
+
+            submitted = []
+            for task in due:
+                if task.started is not None:
+                    task.stats["overruns"] += 1
+                    logging.warning(f"⚠️ 任务 {task.name} 上次执行尚未结束，跳过本次")
+                    if task.mode == FIXED_RATE:
+                        self._reschedule(task, now)
+                    continue
+                task.stats["max_lateness"] = max(task.stats["max_lateness"], now - task.next_run)
+                task.started = now
+                task.timed_out = False
+                if task.mode == FIXED_RATE:
+                    self._reschedule(task, now)
+                submitted.append(task)
+
+        for task in submitted:
+            self.executor().submit(self._execute, task)
+        return len(submitted)
+
+    def check_timeouts(self, now=None):
+        """记录超时仍在执行的任务，返回本次新发现的数量"""
+        now = time.time() if now is None else now
+        found = 0
+        with self._cond:
+            for task in self.tasks.values():
+                if task.started is not None and not task.timed_out and now - task.started > task.timeout:
+                    task.timed_out = True
+                    task.stats["timeouts"] += 1
+                    found += 1
+                    logging.warning(f"⚠️ 任务 {task.name} 已执行 {now - task.started:.0f}s，超过 {task.timeout}s")
+        return found
+
+    def next_deadline(self):
+        """最近的截止时间：下一个任务到期或正在执行的任务超时"""
+        with self._cond:
+            deadlines = [self._heap[0][0]] if self._heap else []
+            deadlines += [t.started + t.timeout for t in self.tasks.values()
+                          if t.started is not None and not t.timed_out]
+        return min(deadlines) if deadlines else None
+
+    def wait(self, max_wait=None):
+        """阻塞到最近的截止时间（新任务登记或 fixed_delay 任务结束时提前唤醒）"""
+        max_wait = self.config["max_wait"] if max_wait is None else max_wait
+        with self._cond:
+            deadline = self.next_deadline()
+            timeout = max_wait if deadline is None else min(max_wait, max(0.0, deadline - time.time()))
+            if timeout > 0:
+                self._cond.wait(timeout)
+
     def run(self):
-        current_time = time.time()
-        
-        for name, task in self.tasks.items():
-            if current_time - task["last_run"] >= task["interval"]:
-                try:
-                    logging.info(f"▶️ 开始执行任务: {name}")
-                    start_t = time.time()
-                    
-                    task["function"]()
-                    
-                    cost = time.time() - start_t
-                    logging.info(f"✅ 任务完成: {name} (耗时 {cost:.2f}s)")
-                    
-                    task["last_run"] = current_time
-                except Exception as e:
-                    logging.error(f"❌ 任务 {name} 执行崩溃: {e}")
-                    import traceback
-                    logging.error(traceback.format_exc())
-                    task["last_run"] = current_time 
-
-scheduler = SmartScheduler()
\ No newline at end of file
+        """执行一轮：提交到期任务并检查超时（不阻塞）"""
+        self.run_pending()
+        self.check_timeouts()
+
+    def shutdown(self, wait=False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def get_stats(self):
+        return {name: dict(task.stats, running=task.started is not None) for name, task in self.tasks.items()}
+
+# 全局实例
+scheduler = DeadlineScheduler()
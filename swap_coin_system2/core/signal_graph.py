@@ -0,0 +1,107 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config.constants import SIGNAL_GRAPH_CONFIG
+
+# 有节点还在线程池中排队时的轮询间隔：排队节点开始执行后才开始计时
+START_POLL = 0.05
+
+class SignalNode:
+    def __init__(self, name, func, deps=(), timeout=None, fallback=None):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.timeout = timeout
+        self.fallback = fallback
+
+class SignalGraph:
+    """
+    信号数据流图 - 各信号组件声明依赖，无依赖的请求并发执行
+
+    add() 登记组件：func 按 deps 顺序接收依赖的结果；同一个输入（如K线）作为
+    单独节点只请求一次，被多个组件共享。每个节点从开始执行起计时，超时或异常
+    时使用 fallback（中性值），不影响其他组件。超时的线程无法强制中断，其结果
+    被丢弃，线程执行完后自然回收。
+    """
+
+    _executor = None
+    _executor_lock = threading.Lock()
+    stats = {"runs": 0, "timeouts": {}, "errors": {}}
+
+    def __init__(self, config=None):
+        self.config = dict(SIGNAL_GRAPH_CONFIG, **(config or {}))
+        self.nodes = {}
+        self.fallbacks = set()       # 本次执行中取了中性值的节点
+
+    @classmethod
+    def executor(cls):
+        """所有信号图共用的线程池（与监控的标的级线程池分开，避免互相等待）"""
+        with cls._executor_lock:
+            if cls._executor is None:
+                cls._executor = ThreadPoolExecutor(max_workers=SIGNAL_GRAPH_CONFIG["max_workers"],
+                                                   thread_name_prefix="signal")
+            return cls._executor
+
+    def add(self, name, func, deps=(), timeout=None, fallback=None):
+        for dep in deps:
+            if dep not in self.nodes:
+                raise ValueError(f"信号节点 {name} 依赖未登记的节点 {dep}")
+        if timeout is None:
+            timeout = self.config["timeouts"].get(name, self.config["default_timeout"])
+        self.nodes[name] = SignalNode(name, func, deps, timeout, fallback)
+        return self
+
+    @staticmethod
+    def _call(node, started, args):
+        started[node.name] = time.monotonic()
+        return node.func(*args)
+
+    def _record(self, kind, name):
+        counts = SignalGraph.stats[kind]
+        counts[name] = counts.get(name, 0) + 1
+
+    def run(self):
+        """执行全部节点，返回 {节点名: 结果}"""
+        executor = self.executor()
+        results = {}
+        running = {}                 # future -> node
+        started = {}                 # 节点名 -> 开始执行时间（线程池排队时间不计入超时）
+        pending = dict(self.nodes)
+        self.fallbacks = set()
+        SignalGraph.stats["runs"] += 1
+
+        while pending or running:
+            for name, node in list(pending.items()):
+                if all(dep in results for dep in node.deps):
+                    args = [results[dep] for dep in node.deps]
+                    running[executor.submit(self._call, node, started, args)] = node
+                    del pending[name]
+            if not running:
+                break
+
+            now = time.monotonic()
+            deadlines = [started[node.name] + node.timeout for node in running.values() if node.name in started]
+            if len(deadlines) < len(running):
+                deadlines.append(now + START_POLL)
+            done, _ = wait(list(running), timeout=max(0.0, min(deadlines) - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                node = running.pop(future)
+                try:
+                    results[node.name] = future.result()
+                except Exception as e:
+                    logging.debug(f"信号组件 {node.name} 失败，使用中性值: {e}")
+                    self._record("errors", node.name)
+                    self.fallbacks.add(node.name)
+                    results[node.name] = node.fallback
+
+            now = time.monotonic()
+            for future, node in list(running.items()):
+                if node.name in started and now - started[node.name] >= node.timeout and not future.done():
+                    logging.warning(f"⚠️ 信号组件 {node.name} 超过 {node.timeout}s，使用中性值")
+                    self._record("timeouts", node.name)
+                    self.fallbacks.add(node.name)
+                    results[node.name] = node.fallback
+                    del running[future]
+        return results
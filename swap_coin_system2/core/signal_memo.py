@@ -0,0 +1,89 @@
+import time
+import threading
+from config.constants import SIGNAL_MEMO_CONFIG
+
+# 只依赖低频外部数据的组件，同一根K线内可以复用；盘口和依赖实时K线与盘口的
+# 增强评分每轮都重算
+REUSABLE_COMPONENTS = ("chain", "sentiment", "funding", "market_sentiment")
+
+class SignalMemo:
+    """
+    信号组件缓存 - 按标的和当前K线记忆慢速组件的结果
+
+    高频组每30秒运行一次，而1H K线收盘前链上、情绪、资金费率和多空比几乎
+    不变。命中条件：当前（未收盘）K线与上次相同、价格偏离上次不超过
+    price_band、缓存未超过 max_age。命中时只复用这几项，技术指标、盘口和增强
+    评分照常重算；新K线收盘或价格大幅波动时全部重算。有组件取了中性值的结果
+    不缓存。
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(SIGNAL_MEMO_CONFIG, **(config or {}))
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "new_bar": 0, "price_move": 0, "expired": 0}
+
+    @staticmethod
+    def _bar_key(df):
+        latest = df.iloc[-1]
+        return (latest["time"] if "time" in df.columns else len(df)), float(latest["close"])
+
+    def lookup(self, symbol, df):
+        """
+        返回可复用的组件结果 {组件名: 结果}，不可复用时返回 None
+
+        df 为本轮刚取得的技术面K线（含实时K线）。
+        """
+        if not self.config["enabled"] or df is None or df.empty:
+            return None
+        with self._lock:
+            entry = self._entries.get(symbol)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        bar_time, price = self._bar_key(df)
+        reason = None
+        if bar_time != entry["bar_time"]:
+            reason = "new_bar"
+        elif entry["price"] and abs(price - entry["price"]) / entry["price"] > self.config["price_band"]:
+            reason = "price_move"
+        elif time.time() - entry["time"] > self.config["max_age"]:
+            reason = "expired"
+        if reason is not None:
+            self.stats[reason] += 1
+            self.stats["misses"] += 1
+            return None
+
+        self.stats["hits"] += 1
+        return dict(entry["signals"])
+
+    def store(self, symbol, df, signals, fallbacks=()):
+        """保存本轮完整计算的组件结果"""
+        if not self.config["enabled"] or df is None or df.empty:
+            return
+        if any(name in fallbacks for name in REUSABLE_COMPONENTS):
+            self.invalidate(symbol)
+            return
+        bar_time, price = self._bar_key(df)
+        with self._lock:
+            self._entries[symbol] = {
+                "bar_time": bar_time,
+                "price": price,
+                "time": time.time(),
+                "signals": {name: signals[name] for name in REUSABLE_COMPONENTS if name in signals},
+            }
+
+    def invalidate(self, symbol=None):
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(symbol, None)
+
+    def get_stats(self):
+        total = self.stats["hits"] + self.stats["misses"]
+        return {**self.stats, "hit_rate": self.stats["hits"] / total if total else 0.0}
+
+# 全局实例
+signal_memo = SignalMemo()
@@ -1,5 +1,6 @@
 import time
 import logging
+import threading
 from config.constants import STOP_LOSS_ON_50_PERCENT_LOSS, MAX_ACCOUNT_DD
 from utils.common_utils import safe_float_convert, format_currency, calculate_percentage_change,format_percentage
 
@@ -22,6 +23,11 @@ strategy_state = {
     "low_balance_threshold": 3.0
 }
 
+# 账户状态锁：仓位增删、资产分配重算、开仓的余额检查到下单都在锁内进行，
+# 调度线程池的风控/同步任务与标的并发处理不会同时改写 strategy_state。
+# 可重入：开仓下单后在锁内调用 recalculate_asset_allocation
+state_lock = threading.RLock()
+
 def save_pending_orders():
     from modules.trading_execution import pending_orders
     strategy_state["pending_orders"] = pending_orders
@@ -91,13 +97,14 @@ def sync_manual_positions():
                     logging.warning(f"处理仓位数据错误 {position.get('instId')}: {e}")
                     continue
             
-            strategy_state["positions"] = manual_positions # 更新
-            strategy_state["manual_positions_value"] = manual_value
-            
-            if manual_positions:
-                logging.info(f"✅ 同步 {len(manual_positions)} 个手动仓位，保证金: {manual_value:.2f} USDT")
-            
-            recalculate_asset_allocation()
+            with state_lock:
+                strategy_state["positions"] = manual_positions # 更新
+                strategy_state["manual_positions_value"] = manual_value
+                
+                if manual_positions:
+                    logging.info(f"✅ 同步 {len(manual_positions)} 个手动仓位，保证金: {manual_value:.2f} USDT")
+                
+                recalculate_asset_allocation()
                 
     except Exception as e:
         logging.error(f"同步手动仓位失败: {e}")
@@ -126,40 +133,42 @@ def get_pending_orders_margin():
         return 0.0
 
 def recalculate_asset_allocation():
-    try:
-        import core.api_client
-        current_balance = core.api_client.get_account_balance()
+    """重新计算资产分配（在 state_lock 内执行，与开仓和仓位增删互斥）"""
+    with state_lock:
+        try:
+            import core.api_client
+            current_balance = core.api_client.get_account_balance()
         
-        # 重新计算仓位保证金
-        manual_value = 0.0
-        auto_value = 0.0
-        total_position_margin = 0.0
+            # 重新计算仓位保证金
+            manual_value = 0.0
+            auto_value = 0.0
+            total_position_margin = 0.0
         
-        for symbol, position in strategy_state["positions"].items():
-            margin = position.get("margin", 0)
-            if position.get("manual", False):
-                manual_value += margin
-            else:
-                auto_value += margin
-            total_position_margin += margin
+            for symbol, position in list(strategy_state["positions"].items()):
+                margin = position.get("margin", 0)
+                if position.get("manual", False):
+                    manual_value += margin
+                else:
+                    auto_value += margin
+                total_position_margin += margin
         
-        strategy_state["manual_positions_value"] = manual_value
-        strategy_state["auto_positions_value"] = auto_value
+            strategy_state["manual_positions_value"] = manual_value
+            strategy_state["auto_positions_value"] = auto_value
         
-        pending_orders_value = get_pending_orders_margin()
+            pending_orders_value = get_pending_orders_margin()
         
-        total_occupied = total_position_margin + pending_orders_value
-        strategy_state["position_value"] = total_occupied
-        strategy_state["tradable_balance"] = max(0.0, current_balance - total_occupied)
-        strategy_state["last_equity"] = current_balance
+            total_occupied = total_position_margin + pending_orders_value
+            strategy_state["position_value"] = total_occupied
+            strategy_state["tradable_balance"] = max(0.0, current_balance - total_occupied)
+            strategy_state["last_equity"] = current_balance
         
-        if strategy_state["initial_equity"] is None and current_balance > 0:
-            strategy_state["initial_equity"] = current_balance
+            if strategy_state["initial_equity"] is None and current_balance > 0:
+                strategy_state["initial_equity"] = current_balance
             
-        logging.info(f"资产分配 - 总余额: {current_balance:.2f}, 可交易: {strategy_state['tradable_balance']:.2f}, 仓位保证金: {total_position_margin:.2f}")
+            logging.info(f"资产分配 - 总余额: {current_balance:.2f}, 可交易: {strategy_state['tradable_balance']:.2f}, 仓位保证金: {total_position_margin:.2f}")
                     
-    except Exception as e:
-        logging.error(f"计算资产分配失败: {e}")
+        except Exception as e:
+            logging.error(f"计算资产分配失败: {e}")
 
 def calculate_total_equity(current_balance):
     """计算总权益（余额 + 浮动盈亏）"""
@@ -204,13 +213,15 @@ def check_account_drawdown():
 def get_positions(): return strategy_state["positions"]
 
 def update_position(symbol, position_data):
-    strategy_state["positions"][symbol] = position_data
-    recalculate_asset_allocation()
+    with state_lock:
+        strategy_state["positions"][symbol] = position_data
+        recalculate_asset_allocation()
 
 def remove_position(symbol):
-    if symbol in strategy_state["positions"]:
-        del strategy_state["positions"][symbol]
-        recalculate_asset_allocation()
+    with state_lock:
+        if symbol in strategy_state["positions"]:
+            del strategy_state["positions"][symbol]
+            recalculate_asset_allocation()
 
 def get_tradable_balance():
     """安全获取可交易余额，确保返回浮点数"""
@@ -224,20 +235,21 @@ def get_total_equity():
     return float(strategy_state.get("last_equity") or 0.0)
 
 def check_low_balance_mode():
-    tradable = get_tradable_balance()
-    threshold = strategy_state.get("low_balance_threshold", 3.0)
+    with state_lock:
+        tradable = get_tradable_balance()
+        threshold = strategy_state.get("low_balance_threshold", 3.0)
     
-    is_low = tradable < threshold
-    prev_is_low = strategy_state.get("low_balance_mode", False)
+        is_low = tradable < threshold
+        prev_is_low = strategy_state.get("low_balance_mode", False)
     
-    if is_low != prev_is_low:
-        if is_low:
-            logging.info(f"💰 进入低余额模式 (余额: {tradable:.2f} < {threshold})")
-        else:
-            logging.info(f"💰 退出低余额模式 (余额: {tradable:.2f})")
+        if is_low != prev_is_low:
+            if is_low:
+                logging.info(f"💰 进入低余额模式 (余额: {tradable:.2f} < {threshold})")
+            else:
+                logging.info(f"💰 退出低余额模式 (余额: {tradable:.2f})")
             
-    strategy_state["low_balance_mode"] = is_low
-    return is_low
+        strategy_state["low_balance_mode"] = is_low
+        return is_low
 
 def get_position_symbols():
     return list(strategy_state.get("positions", {}).keys())
@@ -250,5 +262,5 @@ __all__ = [
     'check_50_percent_loss', 'check_account_drawdown', 'get_positions',
     'update_position', 'remove_position', 'get_tradable_balance',
     'get_position_value', 'get_total_equity', 'check_low_balance_mode',
-    'get_position_symbols', 'is_in_low_balance_mode'
+    'get_position_symbols', 'is_in_low_balance_mode', 'state_lock'
 ]
\ No newline at end of file
@@ -0,0 +1,119 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from config.constants import SYMBOL_POOL_CONFIG
+
+class SymbolWorkerPool:
+    """
+    标的处理线程池 - 有界并发，每个标的单独超时
+
+    - 并发数由 max_workers 限定；请求速率不靠 sleep 控制，所有接口调用都经过
+      rate_limiter 的令牌桶，预算用尽时工作线程在令牌上排队
+    - 每个标的开始执行后计时，超过 symbol_timeout 放弃等待（线程无法强制中断，
+      结果被丢弃），整组超过 group_timeout 时取消尚未开始的标的
+    - 每个标的一把锁：另一组正在处理同一标的时直接跳过，不会重复下单
+    - 单个标的异常只记录日志，不影响同组其他标的
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(SYMBOL_POOL_CONFIG, **(config or {}))
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self.stats = {"completed": 0, "errors": 0, "timeouts": 0, "cancelled": 0, "busy": 0}
+
+    def executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.config["max_workers"],
+                                                    thread_name_prefix="symbol")
+            return self._executor
+
+    def symbol_lock(self, symbol):
+        with self._locks_guard:
+            if symbol not in self._locks:
+                self._locks[symbol] = threading.Lock()
+            return self._locks[symbol]
+
+    def _call(self, symbol, func, started):
+        lock = self.symbol_lock(symbol)
+        if not lock.acquire(blocking=False):
+            self.stats["busy"] += 1
+            logging.info(f"   ⏭️ {symbol} 正在其他组处理，跳过")
+            return None
+        started[symbol] = time.monotonic()
+        try:
+            return func(symbol)
+        finally:
+            lock.release()
+
+    def map(self, symbols, func, group_timeout=None):
+        """
+        并发执行 func(symbol)，返回 {symbol: 结果}
+
+        异常、超时、被取消的标的不在结果中；因另一组正在处理而跳过的结果为 None。
+        按 symbols 顺序提交，线程不足时靠前的标的先执行。
+        """
+        symbol_timeout = self.config["symbol_timeout"]
+        group_deadline = time.monotonic() + (group_timeout or self.config["group_timeout"])
+        started = {}
+        results = {}
+
+        if not self.config["enabled"]:
+            for symbol in symbols:
+                try:
+                    results[symbol] = self._call(symbol, func, started)
+                    self.stats["completed"] += 1
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    logging.error(f"   ❌ 处理 {symbol} 异常: {e}")
+            return results
+
+        executor = self.executor()
+        futures = {executor.submit(self._call, symbol, func, started): symbol for symbol in symbols}
+        pending = set(futures)
+        while pending:
+            now = time.monotonic()
+            deadlines = [started[futures[f]] + symbol_timeout for f in pending if futures[f] in started]
+            next_deadline = min(deadlines + [group_deadline])
+            done, pending = wait(pending, timeout=max(0.0, next_deadline - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                symbol = futures[future]
+                try:
+                    results[symbol] = future.result()
+                    self.stats["completed"] += 1
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    logging.error(f"   ❌ 处理 {symbol} 异常: {e}")
+
+            now = time.monotonic()
+            for future in list(pending):
+                symbol = futures[future]
+                if symbol in started and now - started[symbol] > symbol_timeout:
+                    self.stats["timeouts"] += 1
+                    logging.warning(f"   ⚠️ {symbol} 处理超过 {symbol_timeout}s，放弃等待")
+                    pending.discard(future)
+                elif now >= group_deadline:
+                    if future.cancel():
+                        self.stats["cancelled"] += 1
+                        logging.warning(f"   ⚠️ 本组超时，取消尚未开始的 {symbol}")
+                    else:
+                        self.stats["timeouts"] += 1
+                        logging.warning(f"   ⚠️ 本组超时，放弃等待 {symbol}")
+                    pending.discard(future)
+        return results
+
+    def shutdown(self, wait=False):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+    def get_stats(self):
+        return dict(self.stats)
+
+# 全局实例
+symbol_pool = SymbolWorkerPool()
@@ -0,0 +1,97 @@
+import time
+import logging
+import threading
+from config.constants import TICKER_SNAPSHOT_CONFIG
+from utils.common_utils import safe_float_convert
+
+class TickerSnapshot:
+    """
+    全量永续合约行情快照 - 一次 get_tickers(instType="SWAP") 服务所有标的
+
+    取代逐个标的调用 get_ticker，短TTL内所有调用方共享同一份快照。刷新失败时
+    不返回过期的快照，调用方退回逐个请求。
+    """
+
+    def __init__(self, inst_type="SWAP", ttl=None):
+        self.inst_type = inst_type
+        self.ttl = ttl if ttl is not None else TICKER_SNAPSHOT_CONFIG["ttl"]
+        self.tickers = {}
+        self.raw_tickers = []
+        self.last_refresh = 0
+        self._lock = threading.Lock()
+        self.stats = {"refreshes": 0, "hits": 0, "misses": 0}
+
+    def _request(self):
+        import core.api_client
+        market_api = core.api_client.market_api
+        if market_api is None:
+            logging.error("市场API未初始化")
+            return None
+
+        from utils.performance_monitor import performance_monitor
+        performance_monitor.record_api_call("market_data")
+
+        result = market_api.get_tickers(instType=self.inst_type)
+        if result and result.get("code") == "0":
+            return result.get("data", [])
+        logging.warning(f"⚠️ 获取{self.inst_type}行情快照失败: {result.get('msg') if result else '无响应'}")
+        return None
+
+    def refresh(self, force=False):
+        """刷新快照，未过期时直接返回"""
+        with self._lock:
+            if not force and time.time() - self.last_refresh < self.ttl:
+                return True
+            try:
+                data = self._request()
+            except Exception as e:
+                logging.error(f"刷新行情快照异常: {e}")
+                data = None
+            if data is None:
+                return False
+            self.ingest(data)
+            return True
+
+    def ingest(self, data):
+        """写入一批原始 ticker 数据（也供 get_swap_tickers 复用其结果）"""
+        tickers = {}
+        for item in data:
+            inst_id = item.get("instId")
+            if not inst_id:
+                continue
+            tickers[inst_id] = {
+                "last": safe_float_convert(item.get("last")),
+                "bid": safe_float_convert(item.get("bidPx")),
+                "ask": safe_float_convert(item.get("askPx")),
+                "open24h": safe_float_convert(item.get("open24h")),
+                "high24h": safe_float_convert(item.get("high24h")),
+                "low24h": safe_float_convert(item.get("low24h")),
+                "vol24h": safe_float_convert(item.get("vol24h")),
+                "volCcy24h": safe_float_convert(item.get("volCcy24h")),
+                "ts": int(item.get("ts") or 0),
+            }
+        self.tickers = tickers
+        self.raw_tickers = data
+        self.last_refresh = time.time()
+        self.stats["refreshes"] += 1
+
+    def get_ticker(self, symbol):
+        """获取单个标的行情，不在快照中或快照已过期（刷新失败）时返回 None"""
+        fresh = self.refresh() and time.time() - self.last_refresh < self.ttl
+        ticker = self.tickers.get(symbol) if fresh else None
+        self.stats["hits" if ticker else "misses"] += 1
+        return ticker
+
+    def get_last_price(self, symbol):
+        ticker = self.get_ticker(symbol)
+        if ticker and ticker["last"] > 0:
+            return ticker["last"]
+        return None
+
+    def get_all(self, force=False):
+        """返回原始 ticker 列表，格式与 get_tickers 的 data 一致"""
+        self.refresh(force=force)
+        return self.raw_tickers
+
+# 全局实例
+ticker_snapshot = TickerSnapshot()
@@ -8,7 +8,7 @@ PROJECT_ROOT = '/www/python/swap_coin_system2'
 sys.path.insert(0, PROJECT_ROOT)
 os.chdir(PROJECT_ROOT)
 
-from core.api_client import initialize_okx_api
+from core.api_client import initialize_okx_api, close_api_clients
 from core.state_manager import (
     strategy_state, 
     sync_manual_positions, 
@@ -16,9 +16,10 @@ from core.state_manager import (
     check_account_drawdown, 
     get_tradable_balance, 
     get_position_value, 
-    get_total_equity
+    get_total_equity,
+    state_lock
 )
-from core.scheduler import scheduler
+from core.scheduler import scheduler, PRIORITY_CRITICAL, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW, FIXED_DELAY
 from utils.performance_monitor import performance_monitor
 from config.settings import initialize_environment
 from modules.symbol_selection import select_symbols
@@ -68,7 +69,7 @@ def initialize_strategy():
     from utils.instrument_utils import initialize_instrument_cache
     initialize_instrument_cache()
     
-    scheduler.add_task("monitor_pending_orders", monitor_pending_orders, 4 * 3600)
+    scheduler.add_task("monitor_pending_orders", monitor_pending_orders, 4 * 3600, priority=PRIORITY_LOW)
     
     from modules.trading_execution import initialize_trading_system
     if not initialize_trading_system():
@@ -84,21 +85,42 @@ def initialize_strategy():
     
     frequency_monitor.setup_monitor_groups()
     
-    # 注册监控任务
+    # 启动WebSocket行情，失败时各行情接口自动退回REST
+    from core.market_stream import market_stream
+    market_stream.start(strategy_state["selected_symbols"])
+
+    # 后台按周期边界预取杠杆多空比和主动买卖量
+    from modules.trading_data_prefetcher import trading_data_prefetcher
+    trading_data_prefetcher.start(strategy_state["selected_symbols"])
+
+    # 从本地归档预热K线，只请求停机期间的缺口
+    from core.kline_store import kline_store
+    from modules.technical_analysis import INDICATOR_HISTORY_LIMIT
+    kline_store.warm_start(strategy_state["selected_symbols"], "1H", INDICATOR_HISTORY_LIMIT)
+    
+    # 注册风控任务（优先级最高）
+    from core.state_manager import check_low_balance_mode
+    scheduler.add_task("check_low_balance", check_low_balance_mode, 30, priority=PRIORITY_CRITICAL)
+    scheduler.add_task("validate_positions", validate_existing_positions, 300, priority=PRIORITY_CRITICAL)
+    
+    # 注册监控任务（持仓的平仓/滚仓在各组监控中处理，高频组优先）
     scheduler.add_task("high_freq_monitor", frequency_monitor.monitor_high_frequency, 
-                        MONITOR_INTERVALS["high_frequency"], "market_data")
+                        MONITOR_INTERVALS["high_frequency"], "market_data", priority=PRIORITY_HIGH)
     scheduler.add_task("medium_freq_monitor", frequency_monitor.monitor_medium_frequency, 
-                        MONITOR_INTERVALS["medium_frequency"], "market_data")
+                        MONITOR_INTERVALS["medium_frequency"], "market_data", priority=PRIORITY_NORMAL)
     scheduler.add_task("low_freq_monitor", frequency_monitor.monitor_low_frequency, 
-                        MONITOR_INTERVALS["low_frequency"], "market_data")
+                        MONITOR_INTERVALS["low_frequency"], "market_data", priority=PRIORITY_NORMAL)
     
-    scheduler.add_task("performance_report", performance_monitor.generate_report, 600)
-    scheduler.add_task("update_balance", update_account_balance, 120)
-    scheduler.add_task("sync_positions", sync_manual_positions, 300)
-    scheduler.add_task("recalculate_assets", recalculate_asset_allocation, 120)
+    scheduler.add_task("performance_report", performance_monitor.generate_report, 600,
+                       priority=PRIORITY_LOW, mode=FIXED_DELAY)
+    scheduler.add_task("update_balance", update_account_balance, 120, priority=PRIORITY_HIGH)
+    scheduler.add_task("sync_positions", sync_manual_positions, 300, priority=PRIORITY_HIGH)
+    scheduler.add_task("recalculate_assets", recalculate_asset_allocation, 120, priority=PRIORITY_HIGH)
+    scheduler.add_task("heartbeat", lambda: logging.info("💓 系统运行中..."), 600, priority=PRIORITY_LOW)
     
     from modules.trading_execution import cleanup_old_leverage_settings
-    scheduler.add_task("cleanup_leverage", cleanup_old_leverage_settings, 3600)
+    scheduler.add_task("cleanup_leverage", cleanup_old_leverage_settings, 3600,
+                       priority=PRIORITY_LOW, mode=FIXED_DELAY)
     
     sync_manual_positions()
     recalculate_asset_allocation()
@@ -134,11 +156,12 @@ def validate_existing_positions():
         response = api.get_positions()
         if response and response.get("code") == "0":
             real_positions = {p["instId"] for p in response.get("data", []) if float(p.get("pos", 0)) != 0}
-            strategy_positions = list(strategy_state["positions"].keys())
-            for sym in strategy_positions:
-                if sym not in real_positions:
-                    logging.warning(f"⚠️ 移除失效仓位: {sym}")
-                    del strategy_state["positions"][sym]
+            with state_lock:
+                strategy_positions = list(strategy_state["positions"].keys())
+                for sym in strategy_positions:
+                    if sym not in real_positions:
+                        logging.warning(f"⚠️ 移除失效仓位: {sym}")
+                        del strategy_state["positions"][sym]
     except Exception as e:
         logging.error(f"验证仓位异常: {e}")
 
@@ -173,39 +196,15 @@ def main():
     
     logging.info("进入主循环")
     
-    last_pos_validate = 0
-    last_low_bal_check = 0
-    last_heartbeat = 0
-    
     # 测试打印
     from utils.instrument_utils import debug_quantity_format
     debug_quantity_format("TRX-USDT-SWAP", 10)
 
     while strategy_state["running"]:
         try:
-            now = time.time()
-            
-            # 定时任务: 验证仓位 (5分钟)
-            if now - last_pos_validate > 300:
-                logging.info("⚡ 执行定时仓位验证")
-                validate_existing_positions()
-                last_pos_validate = now
-            
-            # 定时任务: 检查低余额 (30秒)
-            if now - last_low_bal_check > 30:
-                from core.state_manager import check_low_balance_mode
-                check_low_balance_mode()
-                last_low_bal_check = now
-            
-            # 核心: 运行调度器 (监控行情)
+            # 核心: 提交到期任务，然后阻塞到下一个截止时间
             scheduler.run()
-            
-            # 心跳日志 (每10分钟)
-            if now - last_heartbeat > 600:
-                logging.info("💓 系统运行中...")
-                last_heartbeat = now
-            
-            time.sleep(1)
+            scheduler.wait()
             
         except KeyboardInterrupt:
             logging.info("用户停止程序")
@@ -213,6 +212,15 @@ def main():
         except Exception as e:
             logging.error(f"主循环未捕获异常: {e}")
             time.sleep(5)
+    
+    from core.market_stream import market_stream
+    market_stream.stop()
+    scheduler.shutdown()
+    from core.symbol_pool import symbol_pool
+    symbol_pool.shutdown()
+    from modules.trading_data_prefetcher import trading_data_prefetcher
+    trading_data_prefetcher.stop()
+    close_api_clients()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -62,6 +62,13 @@ class AdvancedMarketAnalyzer:
             logging.error(f"获取{ccy}主动买入/卖出情况失败: {e}")
             return None
     
+    def _series(self, kind, coin, fetch):
+        """读取预取的交易大数据；预取未运行时按原方式懒加载（5分钟缓存）"""
+        from modules.trading_data_prefetcher import trading_data_prefetcher
+        if trading_data_prefetcher.running:
+            return trading_data_prefetcher.get(kind, coin)
+        return get_cached_data(f"{kind}_{coin}", fetch, 300)
+    
     def analyze_market_sentiment(self, symbol):
         """分析市场情绪 - 简化版本，移除精英交易员数据"""
         coin = symbol.split("-")[0]
@@ -72,11 +79,7 @@ class AdvancedMarketAnalyzer:
         
         try:
             # 1. 杠杆多空比分析
-            leverage_data = get_cached_data(
-                f"leverage_ratio_{coin}",
-                lambda: self.get_leverage_ratio(ccy=coin),
-                300  # 5分钟缓存
-            )
+            leverage_data = self._series("leverage_ratio", coin, lambda: self.get_leverage_ratio(ccy=coin))
             
             if leverage_data and len(leverage_data) > 0:
                 latest_ratio = float(leverage_data[0][1])  # [ts, ratio]
@@ -91,11 +94,8 @@ class AdvancedMarketAnalyzer:
         
         try:
             # 2. 主动买卖分析
-            taker_data = get_cached_data(
-                f"taker_volume_{coin}",
-                lambda: self.get_taker_volume(ccy=coin, instType="SPOT"),
-                300
-            )
+            taker_data = self._series("taker_volume", coin,
+                                      lambda: self.get_taker_volume(ccy=coin, instType="SPOT"))
             
             if taker_data and len(taker_data) > 0:
                 latest_taker = taker_data[0]  # [ts, sellVol, buyVol]
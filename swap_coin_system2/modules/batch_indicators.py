@@ -0,0 +1,208 @@
+import logging
+import threading
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+RSI_PERIOD = 14
+ATR_PERIOD = 14
+RANGE_WINDOW = 20          # 高低点 / 波动率 / 量比窗口，与各分析器的 tail(20) 一致
+SHORT_VOLUME_WINDOW = 5
+
+def rolling_mean(values, window):
+    """按行滚动均值，窗口内含 NaN 时为 NaN（同 pandas rolling 默认 min_periods）"""
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] >= window:
+        out[:, window - 1:] = sliding_window_view(values, window, axis=1).mean(axis=-1)
+    return out
+
+def ema(values, span):
+    """按行递推 EMA（adjust=False），每行从第一个有效值开始"""
+    alpha = 2.0 / (span + 1.0)
+    out = np.empty(values.shape)
+    prev = np.full(values.shape[0], np.nan)
+    for t in range(values.shape[1]):
+        x = values[:, t]
+        prev = np.where(np.isnan(prev), x, alpha * x + (1 - alpha) * prev)
+        out[:, t] = prev
+    return out
+
+def tail_window(values, window):
+    """每行最后 window 个值，形状 (symbols, window)"""
+    return values[:, -window:] if values.shape[1] >= window else values
+
+class BatchIndicatorKernel:
+    """
+    横截面批量指标 - 一次计算整组标的
+
+    把每个标的最近 limit 根K线按各自的最新一根右对齐，放进 (symbols × bars)
+    的二维数组（历史不足的左侧补 NaN），RSI / MACD / ATR / 高低点 / 波动率 /
+    量比都是几次整体 NumPy 运算，Python 开销与标的数量无关。
+
+    结果按标的保存：get_latest 给出最新值，prime 把 RSI 和20根统计量预填进
+    feature_cache，之后各分析器在同一根K线上读取时直接命中。
+    """
+
+    def __init__(self):
+        self._results = {}
+        self._lock = threading.Lock()
+        self.stats = {"batches": 0, "symbols": 0, "primed": 0}
+
+    @staticmethod
+    def stack(arrays_by_symbol, limit):
+        """把 {symbol: {列: 一维数组}} 右对齐成 {列: 二维数组}"""
+        symbols = list(arrays_by_symbol)
+        width = min(int(limit), max(len(a["close"]) for a in arrays_by_symbol.values()))
+        matrix = {name: np.full((len(symbols), width), np.nan)
+                  for name in ("time", "open", "high", "low", "close", "volume")}
+        for row, symbol in enumerate(symbols):
+            arrays = arrays_by_symbol[symbol]
+            n = min(len(arrays["close"]), width)
+            for name, values in matrix.items():
+                values[row, width - n:] = arrays[name][-n:]
+        return symbols, matrix
+
+    @staticmethod
+    def compute_arrays(matrix):
+        """对二维 OHLCV 计算全部指标，返回 {指标: 二维数组}"""
+        close, high, low = matrix["close"], matrix["high"], matrix["low"]
+        padding = np.isnan(close)
+
+        prev_close = np.full(close.shape, np.nan)
+        prev_close[:, 1:] = close[:, :-1]
+        delta = close - prev_close
+        # 与 pandas where 一致：首根的 NaN 差值当作 0，补齐的位置保持 NaN
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+        gain[padding] = np.nan
+        loss[padding] = np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100 - (100 / (1 + rolling_mean(gain, RSI_PERIOD) / rolling_mean(loss, RSI_PERIOD)))
+
+            macd = ema(close, 12) - ema(close, 26)
+            macd_signal = ema(macd, 9)
+
+            true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+            atr = rolling_mean(true_range, ATR_PERIOD) / close
+
+        return {"rsi": rsi, "macd": macd, "macd_signal": macd_signal, "atr": atr}
+
+    @staticmethod
+    def compute_window_stats(matrix):
+        """最近 RANGE_WINDOW 根的统计量，每个标的一个值"""
+        close = tail_window(matrix["close"], RANGE_WINDOW)
+        volume = tail_window(matrix["volume"], RANGE_WINDOW)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            close_mean = close.mean(axis=1)
+            close_std = close.std(axis=1, ddof=1)
+            volume_mean = volume.mean(axis=1)
+            return {
+                "high_20": tail_window(matrix["high"], RANGE_WINDOW).max(axis=1),
+                "low_20": tail_window(matrix["low"], RANGE_WINDOW).min(axis=1),
+                "close_mean_20": close_mean,
+                "close_std_20": close_std,
+                "volatility_20": close_std / close_mean,
+                "volume_mean_20": volume_mean,
+                "volume_mean_5": tail_window(matrix["volume"], SHORT_VOLUME_WINDOW).mean(axis=1),
+                "volume_ratio_20": matrix["volume"][:, -1] / volume_mean,
+            }
+
+    def compute(self, symbols, timeframe="1H", limit=None):
+        """
+        对 kline_store 中已缓存的整组标的批量计算，返回成功计算的标的数
+
+        只读取未过期的缓冲，不发起请求：调用方先并发拉取本组K线（见
+        process_symbols_concurrently），拉取失败的标的跳过，由各分析器按需计算。
+        """
+        from core.kline_store import kline_store
+        from modules.technical_analysis import INDICATOR_HISTORY_LIMIT
+        limit = limit or INDICATOR_HISTORY_LIMIT
+
+        arrays_by_symbol = {}
+        for symbol in symbols:
+            try:
+                arrays = kline_store.peek_arrays(symbol, timeframe, limit)
+            except Exception as e:
+                logging.debug(f"批量指标读取{symbol}K线失败: {e}")
+                continue
+            if arrays is not None and len(arrays["close"]) >= RANGE_WINDOW:
+                arrays_by_symbol[symbol] = arrays
+        if not arrays_by_symbol:
+            return 0
+
+        self.update(arrays_by_symbol, timeframe, limit)
+        return len(arrays_by_symbol)
+
+    def update(self, arrays_by_symbol, timeframe="1H", limit=250):
+        """用已取得的数组计算并保存结果"""
+        symbols, matrix = self.stack(arrays_by_symbol, limit)
+        series = self.compute_arrays(matrix)
+        window_stats = self.compute_window_stats(matrix)
+
+        results = {}
+        for row, symbol in enumerate(symbols):
+            arrays = arrays_by_symbol[symbol]
+            latest = {name: float(values[row, -1]) for name, values in series.items()}
+            latest.update({name: float(values[row]) for name, values in window_stats.items()})
+            latest["close"] = float(matrix["close"][row, -1])
+            latest["time"] = float(matrix["time"][row, -1])
+            results[(symbol, timeframe)] = {
+                "latest": latest,
+                "rsi": series["rsi"][row].copy(),
+                "bars": min(len(arrays["close"]), matrix["close"].shape[1]),
+                "last_bar": tuple(float(matrix[name][row, -1])
+                                  for name in ("time", "open", "high", "low", "close", "volume")),
+            }
+        with self._lock:
+            self._results.update(results)
+        self.stats["batches"] += 1
+        self.stats["symbols"] += len(symbols)
+        return results
+
+    def get_latest(self, symbol, timeframe="1H"):
+        """某个标的最近一次批量计算的最新指标值，没有时返回 None"""
+        result = self._results.get((symbol, timeframe))
+        return dict(result["latest"]) if result else None
+
+    def prime(self, df):
+        """
+        把批量结果预填进 feature_cache
+
+        df 须已经 feature_cache.tag，且最后一根K线与批量计算时一致（否则说明
+        K线已更新，不预填，由分析器按需重算）。
+        """
+        from core.feature_cache import feature_cache
+        attrs = df.attrs if df is not None else {}
+        result = self._results.get((attrs.get("symbol"), attrs.get("timeframe")))
+        if result is None or attrs.get("last_bar") != result["last_bar"] or attrs.get("rows") != len(df):
+            return False
+
+        latest = result["latest"]
+        for spec, value in (
+            (("tail", "high", RANGE_WINDOW, "max"), latest["high_20"]),
+            (("tail", "low", RANGE_WINDOW, "min"), latest["low_20"]),
+            (("tail", "close", RANGE_WINDOW, "mean"), latest["close_mean_20"]),
+            (("tail", "close", RANGE_WINDOW, "std"), latest["close_std_20"]),
+            (("tail", "volume", RANGE_WINDOW, "mean"), latest["volume_mean_20"]),
+            (("tail", "volume", SHORT_VOLUME_WINDOW, "mean"), latest["volume_mean_5"]),
+        ):
+            feature_cache.put(df, spec, value)
+
+        if len(df) <= result["bars"]:
+            # RSI 只依赖最近 RSI_PERIOD 根；截取后开头按 df 自身重算（首根差值记为 0）
+            rsi = result["rsi"][-len(df):].copy()
+            rsi[:RSI_PERIOD - 1] = np.nan
+            if len(df) >= RSI_PERIOD:
+                delta = np.diff(df["close"].to_numpy(dtype=np.float64)[:RSI_PERIOD])
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    rs = np.float64(delta[delta > 0].sum() / RSI_PERIOD) / np.float64(-delta[delta < 0].sum() / RSI_PERIOD)
+                    rsi[RSI_PERIOD - 1] = 100 - (100 / (1 + rs))
+            feature_cache.put(df, ("rsi", RSI_PERIOD), pd.Series(rsi, index=df.index, name="close"))
+        self.stats["primed"] += 1
+        return True
+
+    def get_stats(self):
+        return {**self.stats, "cached": len(self._results)}
+
+# 全局实例
+batch_indicators = BatchIndicatorKernel()
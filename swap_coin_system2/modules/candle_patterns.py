@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+PATTERN_NAMES = [
+    "bullish_engulfing", "bearish_engulfing", "hammer", "hanging_man",
+    "shooting_star", "doji", "morning_star", "evening_star",
+    "three_white_soldiers", "three_black_crows",
+]
+
+# 形态方向：1 看涨，-1 看跌，0 中性
+PATTERN_DIRECTION = {
+    "bullish_engulfing": 1, "bearish_engulfing": -1, "hammer": 1, "hanging_man": -1,
+    "shooting_star": -1, "doji": 0, "morning_star": 1, "evening_star": -1,
+    "three_white_soldiers": 1, "three_black_crows": -1,
+}
+
+def _shift(values, periods):
+    """向后平移 periods 根，开头补 NaN（比较结果为 False）"""
+    out = np.full(values.shape, np.nan)
+    if periods < len(values):
+        out[periods:] = values[:len(values) - periods]
+    return out
+
+def scan_patterns(open_, high, low, close):
+    """
+    一次向量化计算全部K线形态，返回 {形态名: bool 数组}
+
+    每个位置只使用该K线及之前的数据；前几根数据不足时为 False。
+    锤子线 / 吞没的判定条件与 FibonacciSupportAnalyzer 原有逐行版本一致。
+    """
+    o, h, l, c = (np.asarray(a, dtype=np.float64) for a in (open_, high, low, close))
+    body = np.abs(c - o)
+    top = np.maximum(o, c)
+    bottom = np.minimum(o, c)
+    upper_shadow = h - top
+    lower_shadow = bottom - l
+    candle_range = h - l
+    bullish = c > o
+    bearish = c < o
+
+    o1, c1 = _shift(o, 1), _shift(c, 1)
+    o2, c2 = _shift(o, 2), _shift(c, 2)
+    body1, body2 = np.abs(c1 - o1), np.abs(c2 - o2)
+    bullish1, bearish1 = c1 > o1, c1 < o1
+    bullish2, bearish2 = c2 > o2, c2 < o2
+
+    hammer_shape = (lower_shadow >= 2 * body) & (upper_shadow <= body * 0.5)
+    with np.errstate(invalid="ignore"):
+        return {
+            "bullish_engulfing": bullish & bearish1 & (o < c1) & (c > o1),
+            "bearish_engulfing": bearish & bullish1 & (o > c1) & (c < o1),
+            "hammer": hammer_shape,
+            # 上吊线与锤子线形态相同，由调用方结合所处位置（阻力附近）解读
+            "hanging_man": hammer_shape.copy(),
+            "shooting_star": (upper_shadow >= 2 * body) & (lower_shadow <= body * 0.5),
+            "doji": (candle_range > 0) & (body <= candle_range * 0.1),
+            "morning_star": bearish2 & (body1 <= body2 * 0.3) & bullish & (c > (o2 + c2) / 2),
+            "evening_star": bullish2 & (body1 <= body2 * 0.3) & bearish & (c < (o2 + c2) / 2),
+            "three_white_soldiers": bullish & bullish1 & bullish2 & (c > c1) & (c1 > c2)
+                                    & (o > o1) & (o < c1) & (o1 > o2) & (o1 < c2),
+            "three_black_crows": bearish & bearish1 & bearish2 & (c < c1) & (c1 < c2)
+                                 & (o < o1) & (o > c1) & (o1 < o2) & (o1 > c2),
+        }
+
+def scan_dataframe(df):
+    """对K线 DataFrame 扫描全部形态，返回同索引的 bool DataFrame（按K线缓存）"""
+    from core.feature_cache import feature_cache
+
+    def compute(frame):
+        patterns = scan_patterns(frame["open"].to_numpy(), frame["high"].to_numpy(),
+                                 frame["low"].to_numpy(), frame["close"].to_numpy())
+        return pd.DataFrame(patterns, index=frame.index)
+    return feature_cache.get(df, ("candle_patterns",), compute)
+
+def latest_pattern(df, name):
+    """最新一根K线是否出现某个形态"""
+    if df is None or not len(df):
+        return False
+    return bool(scan_dataframe(df)[name].iloc[-1])
+
+def pattern_statistics(df, horizon=5):
+    """
+    历史形态统计：出现次数、之后 horizon 根的平均收益和按形态方向的胜率
+
+    返回以形态名为索引的 DataFrame，用于评估各形态在该标的上的有效性。
+    """
+    close = df["close"].to_numpy(dtype=np.float64)
+    forward = np.full(close.shape, np.nan)
+    if len(close) > horizon:
+        forward[:-horizon] = close[horizon:] / close[:-horizon] - 1
+    has_forward = ~np.isnan(forward)
+
+    patterns = scan_dataframe(df)
+    rows = {}
+    for name in PATTERN_NAMES:
+        mask = patterns[name].to_numpy() & has_forward
+        returns = forward[mask]
+        direction = PATTERN_DIRECTION[name]
+        rows[name] = {
+            "count": int(patterns[name].sum()),
+            "mean_return": float(returns.mean()) if len(returns) else np.nan,
+            "win_rate": float((returns * direction > 0).mean()) if len(returns) and direction else np.nan,
+        }
+    return pd.DataFrame.from_dict(rows, orient="index")
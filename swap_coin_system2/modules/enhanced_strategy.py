@@ -1,16 +1,22 @@
 # 修改 enhanced_strategy.py
 import logging
+import threading
 import pandas as pd
 import numpy as np
 from utils.decorators import safe_request
 from core.cache_manager import get_cached_data
+from core.feature_cache import feature_cache
 from modules.fibonacci_support import fibonacci_analyzer
 from modules.momentum_breakout import momentum_breakout   # 新增导入
-from config.constants import ENTRY_STRATEGY
+from modules.volume_profile import RollingVolumeProfile, volume_share
+from config.constants import ENTRY_STRATEGY, VOLUME_PROFILE_CONFIG
 class EnhancedStrategy:
     def __init__(self):
         self.volume_threshold = 1.5
         self.volatility_threshold = 0.03
+        # 每个标的一份增量成交量分布，每轮只合并新增 / 修正的K线
+        self.volume_profiles = {}
+        self._profile_lock = threading.Lock()
         
     def calculate_enhanced_score(self, df, symbol, depth_data=None):
         """计算综合增强得分 - 包含减分项"""
@@ -93,13 +99,13 @@ class EnhancedStrategy:
     
     def calculate_resistance_distance(self, df, current_price, period=20):
         """计算当前价格距离阻力位的相对距离"""
-        resistance_level = df['high'].tail(period).max()
+        resistance_level = feature_cache.tail_stat(df, 'high', period, 'max')
         distance = (resistance_level - current_price) / current_price
         return max(0, distance)
     
     def calculate_support_distance(self, df, current_price, period=20):
         """计算当前价格距离支撑位的相对距离"""
-        support_level = df['low'].tail(period).min()
+        support_level = feature_cache.tail_stat(df, 'low', period, 'min')
         distance = (current_price - support_level) / current_price
         return max(0, distance)
     
@@ -109,7 +115,7 @@ class EnhancedStrategy:
             return 0
             
         current_volume = df['volume'].iloc[-1]
-        avg_volume = df['volume'].tail(20).mean()
+        avg_volume = feature_cache.tail_stat(df, 'volume', 20, 'mean')
         
         if current_volume > avg_volume * 2:
             return 1.0
@@ -125,7 +131,7 @@ class EnhancedStrategy:
         if len(df) < period:
             return 0
             
-        volatility = df['close'].tail(period).std() / df['close'].tail(period).mean()
+        volatility = feature_cache.tail_stat(df, 'close', period, 'std') / feature_cache.tail_stat(df, 'close', period, 'mean')
         
         if volatility > 0.08:  # 超过8%波动率
             return 0.8
@@ -161,8 +167,8 @@ class EnhancedStrategy:
             # 在 calculate_enhanced_support_resistance 方法中替换原来的调用
             previous_support, previous_resistance = self.calculate_previous_support_resistance(df, current_price)
             
-            # 5. 成交量分布支撑阻力
-            volume_support, volume_resistance = self.calculate_volume_profile_support_resistance(df)
+            # 5. 成交量分布支撑阻力（控制点 / 价值区价位）
+            volume_support, volume_resistance = self.calculate_volume_profile_levels(df, symbol)
             
             # 综合计算支撑位（取最低的有效支撑位）
             support_candidates = []
@@ -211,11 +217,11 @@ class EnhancedStrategy:
             
             # 如果找不到有效的支撑阻力位，使用技术指标计算
             if final_support_price == 0:
-                final_support_price = df['low'].tail(20).min()
+                final_support_price = feature_cache.tail_stat(df, 'low', 20, 'min')
                 final_support_strength = 0.3
                 
             if final_resistance_price == 0:
-                final_resistance_price = df['high'].tail(20).max()
+                final_resistance_price = feature_cache.tail_stat(df, 'high', 20, 'max')
                 final_resistance_strength = 0.3
             
             logging.debug(f"支撑阻力综合分析 - {symbol}: 支撑={final_support_price:.6f}(强度{final_support_strength:.2f}), 阻力={final_resistance_price:.6f}(强度{final_resistance_strength:.2f})")
@@ -225,8 +231,8 @@ class EnhancedStrategy:
         except Exception as e:
             logging.error(f"增强支撑阻力位计算失败: {e}")
             # 返回基本的技术支撑阻力
-            basic_support = df['low'].tail(20).min()
-            basic_resistance = df['high'].tail(20).max()
+            basic_support = feature_cache.tail_stat(df, 'low', 20, 'min')
+            basic_resistance = feature_cache.tail_stat(df, 'high', 20, 'max')
             return 0.5, basic_support, 0.5, basic_resistance
     # 保留原有的技术指标计算方法
     def calculate_traditional_support(self, df, window=20):
@@ -268,7 +274,7 @@ class EnhancedStrategy:
         
         for period in periods:
             if len(df) >= period:
-                ma = df['close'].rolling(window=period).mean().iloc[-1]
+                ma = feature_cache.rolling(df, 'close', period, 'mean').iloc[-1]
                 if ma < current_price and ma > support_price:
                     support_price = ma
                     support_strength = 0.6
@@ -283,8 +289,8 @@ class EnhancedStrategy:
         if len(df) < period:
             return (0, 0), (0, 0)
         
-        bb_mid = df['close'].rolling(window=period).mean()
-        bb_std = df['close'].rolling(window=period).std()
+        bb_mid = feature_cache.rolling(df, 'close', period, 'mean')
+        bb_std = feature_cache.rolling(df, 'close', period, 'std')
         bb_upper = bb_mid + 2 * bb_std
         bb_lower = bb_mid - 2 * bb_std
         
@@ -329,36 +335,89 @@ class EnhancedStrategy:
         return (significant_low, support_strength), (significant_high, resistance_strength)
     
     def calculate_volume_profile_support_resistance(self, df, period=20):
-        """成交量分布支撑阻力"""
+        """成交量分布支撑阻力 - 返回 (支撑强度, 阻力强度)"""
         if len(df) < period:
             return 0, 0
         
-        # 计算价格区间的成交量集中度
+        # 按收盘价把成交量计入相邻价格区间（左闭右开），一次 bincount 代替逐区间筛选
         price_levels = np.linspace(df["low"].min(), df["high"].max(), 10)
-        volume_concentration = {}
-        
-        for i in range(len(price_levels)-1):
-            mask = (df["close"] >= price_levels[i]) & (df["close"] < price_levels[i+1])
-            volume_concentration[i] = df[mask]["volume"].sum()
+        level_index = np.searchsorted(price_levels, df["close"].to_numpy(dtype=np.float64), side="right") - 1
+        inside = (level_index >= 0) & (level_index < len(price_levels) - 1)
+        volume_concentration = np.bincount(level_index[inside], weights=df["volume"].to_numpy(dtype=np.float64)[inside],
+                                           minlength=len(price_levels) - 1)
         
         # 找到成交量最大的价格区间作为主要支撑/阻力
-        if volume_concentration:
-            max_volume_level = max(volume_concentration, key=volume_concentration.get)
-            total_volume = df["volume"].sum()
-            
-            # 支撑强度（低价格区间）
-            support_levels = [k for k in volume_concentration.keys() if k <= max_volume_level]
-            support_volume = sum(volume_concentration[k] for k in support_levels)
-            support_strength = support_volume / total_volume
-            
-            # 阻力强度（高价格区间）
-            resistance_levels = [k for k in volume_concentration.keys() if k >= max_volume_level]
-            resistance_volume = sum(volume_concentration[k] for k in resistance_levels)
-            resistance_strength = resistance_volume / total_volume
-            
-            return min(support_strength, 1.0), min(resistance_strength, 1.0)
+        max_volume_level = int(np.argmax(volume_concentration))
+        total_volume = df["volume"].sum()
+        
+        # 支撑强度（低价格区间）/ 阻力强度（高价格区间）
+        support_strength = volume_concentration[:max_volume_level + 1].sum() / total_volume
+        resistance_strength = volume_concentration[max_volume_level:].sum() / total_volume
+        
+        return min(support_strength, 1.0), min(resistance_strength, 1.0)
+    
+    def calculate_volume_profile_levels(self, df, symbol):
+        """
+        成交量分布支撑阻力价位 - 控制点(POC)与价值区上下沿
+        
+        POC 在现价下方时作为支撑，否则取价值区下沿；阻力同理。强度为支撑价
+        以下（阻力价以上）成交量占比，返回 (价格, 强度), (价格, 强度)。
+        """
+        config = VOLUME_PROFILE_CONFIG
+        if df is None or len(df) < 20 or "time" not in df.columns:
+            return (0, 0), (0, 0)
+        
+        profile = self.update_volume_profile(symbol, df)
+        levels = profile.levels(config["value_area"]) if profile is not None else None
+        if levels is None:
+            return (0, 0), (0, 0)
+        
+        edges, hist = profile.profile()
+        current_price = df["close"].iloc[-1]
+        support_price = levels["poc"] if levels["poc"] < current_price else (
+            levels["val"] if levels["val"] < current_price else 0)
+        resistance_price = levels["poc"] if levels["poc"] > current_price else (
+            levels["vah"] if levels["vah"] > current_price else 0)
+        
+        support_strength = volume_share(edges, hist, support_price, "below") if support_price else 0
+        resistance_strength = volume_share(edges, hist, resistance_price, "above") if resistance_price else 0
+        
+        logging.debug(f"成交量分布 - {symbol} POC: {levels['poc']:.6f}, 价值区: {levels['val']:.6f}~{levels['vah']:.6f}")
+        
+        return (support_price, min(support_strength, 1.0)), (resistance_price, min(resistance_strength, 1.0))
+    
+    def update_volume_profile(self, symbol, df):
+        """
+        把 df 中新增 / 修正的K线合并进该标的的增量成交量分布
         
-        return 0, 0
+        df 须含 time 列、按时间升序。首次调用、K线不连续（df 开头晚于上次的当前
+        K线）、时间回退或价格偏离建档时一倍以上时按 df 最近 window 根重建；否则
+        只合并上次当前K线及之后的几根。返回 RollingVolumeProfile，无法建立时返回
+        None。
+        """
+        config = VOLUME_PROFILE_CONFIG
+        times = df["time"].to_numpy()
+        columns = [df[name].to_numpy(dtype=np.float64) for name in ("high", "low", "close", "volume")]
+        with self._profile_lock:
+            profile = self.volume_profiles.get(symbol)
+            live_time = profile.live[0] if profile is not None and profile.live is not None else None
+            bin_width = columns[2][-1] * config["bin_pct"]
+            if not bin_width > 0:
+                return None
+            # 价格相对建档时变化超过一倍，档位过粗 / 过细，按现价重建
+            drifted = profile is not None and not 0.5 <= profile.bin_width / bin_width <= 2
+            if live_time is None or drifted or times[0] > live_time or times[-1] < live_time:
+                profile = RollingVolumeProfile(bin_width, config["window"],
+                                               config["half_life"], config["spread"])
+                start = max(0, len(df) - config["window"])
+            else:
+                start = int(np.searchsorted(times, live_time))
+            for i in range(start, len(df)):
+                if not profile.update(times[i], *(values[i] for values in columns)):
+                    self.volume_profiles.pop(symbol, None)
+                    return None
+            self.volume_profiles[symbol] = profile
+            return profile
     
     def get_depth_support_resistance(self, symbol, depth_data, current_price):
         """基于深度数据的支撑阻力分析"""
@@ -415,7 +474,7 @@ class EnhancedStrategy:
             return fib_resistance_price
         
         # 否则使用技术指标计算的阻力位
-        traditional_resistance_price = df["high"].tail(20).max()
+        traditional_resistance_price = feature_cache.tail_stat(df, "high", 20, "max")
         
         # 确保阻力位在当前价格上方
         resistance_price = max(traditional_resistance_price, current_price * 1.01)
@@ -431,7 +490,7 @@ class EnhancedStrategy:
             return fib_support_price
         
         # 否则使用技术指标计算的支撑位
-        traditional_support_price = df["low"].tail(20).min()
+        traditional_support_price = feature_cache.tail_stat(df, "low", 20, "min")
         
         # 确保支撑位在当前价格下方
         support_price = min(traditional_support_price, current_price * 0.99)
@@ -3,6 +3,9 @@ import pandas as pd
 import numpy as np
 import logging
 from utils.decorators import safe_request
+from core.feature_cache import feature_cache
+from modules.candle_patterns import latest_pattern
+from modules.swing_pivots import swing_pivot_index
 
 # 在 fibonacci_support.py 中添加阻力位分析功能
 class FibonacciSupportAnalyzer:
@@ -93,39 +96,23 @@ class FibonacciSupportAnalyzer:
         if len(df) < 2:
             return False
         
-        current = df.iloc[-1]
-        previous = df.iloc[-2]
-        
-        # 看跌吞没条件
-        return (current["close"] < current["open"] and  # 当前阴线
-                previous["close"] > previous["open"] and  # 前一根阳线
-                current["open"] > previous["close"] and  # 当前开盘高于前收盘
-                current["close"] < previous["open"])  # 当前收盘低于前开盘
+        # 当前阴线、前一根阳线，当前开盘高于前收盘且收盘低于前开盘
+        return latest_pattern(df, "bearish_engulfing")
     
     def detect_hanging_man(self, df):
         """检测上吊线（与锤子线形态相同，但出现在上升趋势中）"""
         if len(df) < 1:
             return False
         
-        current = df.iloc[-1]
-        body_size = abs(current["close"] - current["open"])
-        lower_shadow = min(current["open"], current["close"]) - current["low"]
-        upper_shadow = current["high"] - max(current["open"], current["close"])
-        
         # 上吊线条件：下影线至少是实体长度的2倍，上影线很短
-        return (lower_shadow >= 2 * body_size and 
-                upper_shadow <= body_size * 0.5)
+        return latest_pattern(df, "hanging_man")
     
     def check_rsi_top_divergence(self, df, period=14):
         """检查RSI顶背离"""
         if len(df) < period + 5:
             return False
         
-        # 计算RSI
-        delta = df["close"].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rsi = 100 - (100 / (1 + gain / loss))
+        rsi = feature_cache.rsi(df, period)
         
         # 顶背离检测：价格创新高但RSI没有
         if (df["close"].iloc[-1] > df["close"].iloc[-5] and 
@@ -140,25 +127,27 @@ class FibonacciSupportAnalyzer:
             return False
         
         current_volume = df["volume"].iloc[-1]
-        avg_volume = df["volume"].tail(20).mean()
+        avg_volume = feature_cache.tail_stat(df, "volume", 20, "mean")
         
         return current_volume < avg_volume * multiplier
 
     # 其余现有函数保持不变...
     
     def calculate_fibonacci_levels(self, df, period=100):
-        """计算斐波那契回撤水平"""
+        """
+        计算斐波那契回撤水平
+        
+        波段高低点取自 ZigZag 拐点索引（最近确认的拐点与当前段的极值），
+        尚未确认拐点时为区间最高/最低价。同一根K线上的多次调用共用一次结果。
+        """
         if df is None or len(df) < period:
             return None, None, None
             
         try:
-            # 获取周期内的最高价和最低价
-            high_period = df["high"].tail(period)
-            low_period = df["low"].tail(period)
-            
-            swing_high = high_period.max()
-            swing_low = low_period.min()
-            current_price = df.iloc[-1]["close"]
+            swing = feature_cache.get(df, ("swing_range",), swing_pivot_index.swing_range)
+            if swing is None:
+                return None, None, None
+            swing_high, swing_low = swing
             
             # 计算斐波那契回撤水平
             fib_levels = {}
@@ -283,39 +272,23 @@ class FibonacciSupportAnalyzer:
         if len(df) < 2:
             return False
         
-        current = df.iloc[-1]
-        previous = df.iloc[-2]
-        
-        # 看涨吞没条件
-        return (current["close"] > current["open"] and  # 当前阳线
-                previous["close"] < previous["open"] and  # 前一根阴线
-                current["open"] < previous["close"] and  # 当前开盘低于前收盘
-                current["close"] > previous["open"])  # 当前收盘高于前开盘
+        # 当前阳线、前一根阴线，当前开盘低于前收盘且收盘高于前开盘
+        return latest_pattern(df, "bullish_engulfing")
     
     def detect_hammer(self, df):
         """检测锤子线"""
         if len(df) < 1:
             return False
         
-        current = df.iloc[-1]
-        body_size = abs(current["close"] - current["open"])
-        lower_shadow = min(current["open"], current["close"]) - current["low"]
-        upper_shadow = current["high"] - max(current["open"], current["close"])
-        
         # 锤子线条件：下影线至少是实体长度的2倍，上影线很短
-        return (lower_shadow >= 2 * body_size and 
-                upper_shadow <= body_size * 0.5)
+        return latest_pattern(df, "hammer")
     
     def check_rsi_divergence(self, df, period=14):
         """检查RSI背离"""
         if len(df) < period + 5:
             return False
         
-        # 计算RSI
-        delta = df["close"].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rsi = 100 - (100 / (1 + gain / loss))
+        rsi = feature_cache.rsi(df, period)
         
         # 简单背离检测：价格创新低但RSI没有
         if (df["close"].iloc[-1] < df["close"].iloc[-5] and 
@@ -330,7 +303,7 @@ class FibonacciSupportAnalyzer:
             return False
         
         current_volume = df["volume"].iloc[-1]
-        avg_volume = df["volume"].tail(20).mean()
+        avg_volume = feature_cache.tail_stat(df, "volume", 20, "mean")
         
         return current_volume > avg_volume * multiplier
     
@@ -340,8 +313,8 @@ class FibonacciSupportAnalyzer:
             return 0.7
         
         # 在支撑位附近成交量应该放大
-        recent_volume = df["volume"].tail(5).mean()
-        avg_volume = df["volume"].tail(20).mean()
+        recent_volume = feature_cache.tail_stat(df, "volume", 5, "mean")
+        avg_volume = feature_cache.tail_stat(df, "volume", 20, "mean")
         
         if recent_volume > avg_volume:
             return 1.0
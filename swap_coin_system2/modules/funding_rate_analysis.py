@@ -1,8 +1,7 @@
 import logging
 #import pandas as pd
 from utils.decorators import safe_request
-from core.cache_manager import get_cached_data
-from config.constants import CACHE_EXPIRES
+from config.constants import FUNDING_STORE_CONFIG
 
 class FundingRateAnalyzer:
     def __init__(self):
@@ -71,12 +70,9 @@ class FundingRateAnalyzer:
             return None
     
     def analyze_funding_rate_signal(self, symbol):
-        """分析资金费率信号"""
-        current_data = get_cached_data(
-            f"funding_rate_{symbol}",
-            lambda: self.get_current_funding_rate(symbol),
-            CACHE_EXPIRES.get("funding_rate", 300)  # 默认5分钟
-        )
+        """分析资金费率信号（当前费率和历史统计来自资金费率存储）"""
+        from core.funding_store import funding_store
+        current_data = funding_store.get_current(symbol)
         
         if not current_data:
             return 0, 0  # 中性信号
@@ -104,6 +100,18 @@ class FundingRateAnalyzer:
             elif premium < 0 and funding_signal == -1:
                 confidence *= 1.2
         
+        # 相对该标的自身历史：绝对值不大但处于历史极端时给出弱信号，
+        # 绝对值超阈值但对该标的属于常态（|z| < 1）时降低信心
+        stats = funding_store.get_statistics(symbol)
+        if stats and stats["count"] >= FUNDING_STORE_CONFIG["min_history"]:
+            z_threshold = FUNDING_STORE_CONFIG["z_threshold"]
+            zscore = stats["zscore"]
+            if funding_signal == 0 and abs(zscore) >= z_threshold:
+                funding_signal = -1 if zscore > 0 else 1
+                confidence = min(abs(zscore) / (2 * z_threshold), 1.0) * 0.5
+            elif funding_signal != 0 and abs(zscore) < 1:
+                confidence *= 0.7
+        
         return funding_signal, confidence
 
 # 全局实例
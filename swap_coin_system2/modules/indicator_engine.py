@@ -0,0 +1,247 @@
+import math
+import logging
+import threading
+from collections import deque
+import numpy as np
+
+INDICATOR_COLUMNS = ["ma200", "volume_avg5", "rsi", "macd", "macd_signal", "atr"]
+NAN = float("nan")
+
+class RollingMean:
+    """
+    滚动均值，语义与 pandas rolling(window).mean() 一致
+
+    已收盘的最近 window-1 个值放在队列里，当前K线作为“实时值”参与计算但不入队，
+    所以同一根K线反复修正也是 O(1)。求和用 Kahan 补偿，窗口内全部相同时直接返回
+    该值（pandas 同样如此，保证全零窗口得到精确的 0）。
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.compensation = 0.0
+        self.same_run = 0          # 队列末尾连续相同值的个数
+        self.commits = 0
+
+    def _add(self, value):
+        y = value - self.compensation
+        t = self.total + y
+        self.compensation = (t - self.total) - y
+        self.total = t
+
+    def value(self, live):
+        if len(self.values) + 1 < self.window:
+            return NAN
+        if self.values and self.same_run >= len(self.values) and self.values[-1] == live:
+            return live
+        return (self.total + live) / self.window
+
+    def commit(self, value):
+        self.same_run = self.same_run + 1 if self.values and self.values[-1] == value else 1
+        self.values.append(value)
+        self._add(value)
+        if len(self.values) >= self.window:
+            self._add(-self.values.popleft())
+            self.same_run = min(self.same_run, len(self.values))
+        # 每 window 次提交精确重算一次，防止长期运行累积误差（均摊 O(1)）
+        self.commits += 1
+        if self.commits % self.window == 0:
+            self._resync()
+
+    def _resync(self):
+        self.total = math.fsum(self.values)
+        self.compensation = 0.0
+
+class EMA:
+    """指数均线，语义与 pandas ewm(span, adjust=False).mean() 一致"""
+
+    def __init__(self, span):
+        self.alpha = 2.0 / (span + 1.0)
+        self.prev = None
+
+    def value(self, live):
+        if self.prev is None:
+            return live
+        return self.alpha * live + (1 - self.alpha) * self.prev
+
+    def commit(self, value):
+        self.prev = self.value(value)
+
+class IndicatorState:
+    """
+    单个 (symbol, timeframe) 的指标运行状态
+
+    update() 收到更晚的K线时先把上一根确认为已收盘，再计算新K线；收到同一
+    时间戳时只重算实时值。每根K线 O(1)，与历史长度无关。
+    """
+
+    def __init__(self, capacity=500):
+        self.ma200 = RollingMean(200)
+        self.volume_avg5 = RollingMean(5)
+        self.gain = RollingMean(14)
+        self.loss = RollingMean(14)
+        self.true_range = RollingMean(14)
+        self.ema_fast = EMA(12)
+        self.ema_slow = EMA(26)
+        self.signal = EMA(9)
+        self.prev_close = None
+        self.live = None           # 当前（未确认）K线 (time, open, high, low, close, volume)
+        self.outputs = {name: deque(maxlen=capacity) for name in INDICATOR_COLUMNS}
+        self.times = deque(maxlen=capacity)
+        self.first_time = None     # 状态从哪根K线开始递推（EMA 的起点）
+
+    @property
+    def live_time(self):
+        return self.live[0] if self.live is not None else None
+
+    def _components(self, bar):
+        _, _, high, low, close, volume = bar
+        if self.prev_close is None:
+            gain = loss = 0.0
+            true_range = high - low
+        else:
+            delta = close - self.prev_close
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        return close, volume, gain, loss, true_range
+
+    def _compute(self, bar):
+        close, volume, gain, loss, true_range = self._components(bar)
+        avg_gain = self.gain.value(gain)
+        avg_loss = self.loss.value(loss)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = np.float64(avg_gain) / np.float64(avg_loss)
+            rsi = float(100 - (100 / (1 + rs)))
+        macd = self.ema_fast.value(close) - self.ema_slow.value(close)
+        return {
+            "ma200": self.ma200.value(close),
+            "volume_avg5": self.volume_avg5.value(volume),
+            "rsi": rsi,
+            "macd": macd,
+            "macd_signal": self.signal.value(macd),
+            "atr": self.true_range.value(true_range) / close if close else NAN,
+        }
+
+    def _commit_live(self):
+        close, volume, gain, loss, true_range = self._components(self.live)
+        macd = self.ema_fast.value(close) - self.ema_slow.value(close)
+        self.ma200.commit(close)
+        self.volume_avg5.commit(volume)
+        self.gain.commit(gain)
+        self.loss.commit(loss)
+        self.true_range.commit(true_range)
+        self.ema_fast.commit(close)
+        self.ema_slow.commit(close)
+        self.signal.commit(macd)
+        self.prev_close = close
+
+    def update(self, bar):
+        """合并一根K线，返回 False 表示时间戳早于实时K线（需要重建状态）"""
+        ts = bar[0]
+        if self.live is not None and ts < self.live[0]:
+            return False
+        if self.live is not None and ts > self.live[0]:
+            self._commit_live()
+        elif self.live is not None:
+            # 修正实时K线：丢弃上次的实时输出
+            self.times.pop()
+            for name in INDICATOR_COLUMNS:
+                self.outputs[name].pop()
+
+        if self.first_time is None:
+            self.first_time = ts
+        self.live = tuple(float(v) for v in bar)
+        values = self._compute(self.live)
+        self.times.append(ts)
+        for name in INDICATOR_COLUMNS:
+            self.outputs[name].append(values[name])
+        return True
+
+    def columns(self, limit):
+        """最近 limit 根K线的指标数组"""
+        return {name: np.array(list(self.outputs[name])[-limit:], dtype=np.float64)
+                for name in INDICATOR_COLUMNS}
+
+class IndicatorEngine:
+    """
+    增量指标引擎 - 每个 (symbol, timeframe) 保留运行状态
+
+    首次使用时按K线顺序回放一遍建立状态，之后每轮只处理新增或修正的K线。
+    输出与 calculate_indicators 相同的列。EMA 类指标依赖递推起点，所以状态
+    总是从传入K线的第一根开始：滑动窗口的起点前移（新K线收盘、最早一根移出）
+    时按新窗口重新回放一次，结果与 pandas 在同一段数据上计算的一致；同一根
+    实时K线的反复修正仍是 O(1)。
+    """
+
+    def __init__(self, capacity=500):
+        self.capacity = capacity
+        self._states = {}
+        self._lock = threading.Lock()
+        self.stats = {"rebuilds": 0, "bars": 0}
+
+    def _rebuild(self, key, rows):
+        state = IndicatorState(self.capacity)
+        for row in rows:
+            state.update(row)
+        self._states[key] = state
+        self.stats["rebuilds"] += 1
+        self.stats["bars"] += len(rows)
+        return state
+
+    def sync(self, symbol, timeframe, times, opens, highs, lows, closes, volumes):
+        """用按时间升序的K线数组推进状态，只处理实时K线及之后的部分"""
+        key = (symbol, timeframe)
+        rows = np.column_stack([times, opens, highs, lows, closes, volumes])
+        with self._lock:
+            state = self._states.get(key)
+            if state is None or state.live_time is None:
+                return self._rebuild(key, rows)
+            if state.first_time != times[0]:
+                # 窗口起点变化：EMA 按新窗口的第一根重新起算
+                return self._rebuild(key, rows)
+
+            start = int(np.searchsorted(times, state.live_time, side="left"))
+            if start >= len(times) or times[start] != state.live_time:
+                # 状态与当前数据衔接不上（断档或数据被替换），重新回放
+                return self._rebuild(key, rows)
+            for row in rows[start:]:
+                state.update(row)
+            self.stats["bars"] += len(rows) - start
+            return state
+
+    def attach(self, symbol, timeframe, df):
+        """
+        给K线 DataFrame 追加指标列，结果与 calculate_indicators(df) 相同
+
+        数据异常时退回 pandas 全量计算。
+        """
+        if df is None or len(df) < 20:
+            return df
+        try:
+            times = df["time"].to_numpy(dtype=np.float64)
+            state = self.sync(symbol, timeframe, times,
+                              df["open"].to_numpy(dtype=np.float64), df["high"].to_numpy(dtype=np.float64),
+                              df["low"].to_numpy(dtype=np.float64), df["close"].to_numpy(dtype=np.float64),
+                              df["volume"].to_numpy(dtype=np.float64))
+            if len(state.times) < len(df) or state.times[-1] != times[-1]:
+                raise ValueError("指标状态与K线不对齐")
+            df = df.copy(deep=False)
+            df["close"] = df["close"].astype(float)
+            for name, values in state.columns(len(df)).items():
+                df[name] = values
+            return df
+        except Exception as e:
+            logging.debug(f"{symbol} 增量指标失败，改用全量计算: {e}")
+            from modules.technical_analysis import calculate_indicators
+            return calculate_indicators(df)
+
+    def invalidate(self, symbol=None, timeframe=None):
+        with self._lock:
+            for key in list(self._states):
+                if (symbol is None or key[0] == symbol) and (timeframe is None or key[1] == timeframe):
+                    del self._states[key]
+
+# 全局实例
+indicator_engine = IndicatorEngine()
@@ -0,0 +1,85 @@
+import time
+import logging
+import threading
+from collections import namedtuple
+from config.constants import MARKET_CONTEXT_CONFIG
+
+# 全市场快照：不可变，同一轮所有标的看到同一份
+MarketSnapshot = namedtuple("MarketSnapshot", [
+    "time",              # 生成时间
+    "fear_greed",        # 最近几天的恐惧贪婪指数 (tuple)
+    "trends",            # {主流币: 最近 trend_bars 根1H涨跌幅}
+])
+
+NEUTRAL_FEAR_GREED = (50, 50, 50)
+
+class MarketContext:
+    """
+    全市场上下文 - 与标的无关的数据每个刷新窗口只取一次
+
+    恐惧贪婪指数和 BTC/ETH 趋势原先按币种各取一次，现在统一生成 MarketSnapshot
+    供所有标的读取。每组监控开始时调用 refresh()，
+    窗口内的其余读取都返回同一个快照；某项数据获取失败时沿用上一快照的值。
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(MARKET_CONTEXT_CONFIG, **(config or {}))
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self.stats = {"refreshes": 0, "reads": 0, "errors": 0}
+
+    def _fetch_fear_greed(self):
+        from modules.sentiment_analysis import fetch_fear_greed_index
+        values = fetch_fear_greed_index()
+        return tuple(values) if values else None
+
+    def _fetch_trends(self):
+        from core.kline_store import kline_store
+        bars = self.config["trend_bars"]
+        trends = {}
+        for coin in self.config["majors"]:
+            data = kline_store.get_arrays(f"{coin}-USDT-SWAP", "1H", bars + 5)
+            if data is None or len(data["close"]) < bars:
+                continue
+            close = data["close"]
+            trends[coin] = float((close[-1] - close[-bars]) / close[-bars])
+        return trends or None
+
+    def _fetch(self, name, func, previous):
+        try:
+            value = func()
+        except Exception as e:
+            logging.warning(f"⚠️ 市场上下文 {name} 获取失败，沿用上次数据: {e}")
+            self.stats["errors"] += 1
+            value = None
+        return previous if value is None else value
+
+    def refresh(self, force=False):
+        """快照超过刷新窗口时重新生成，返回当前快照"""
+        with self._lock:
+            previous = self._snapshot
+            if not force and previous is not None and time.time() - previous.time < self.config["ttl"]:
+                return previous
+
+            fear_greed = self._fetch("恐惧贪婪指数", self._fetch_fear_greed,
+                                     previous.fear_greed if previous else NEUTRAL_FEAR_GREED)
+            trends = self._fetch("主流币趋势", self._fetch_trends, previous.trends if previous else {})
+
+            self._snapshot = MarketSnapshot(time.time(), fear_greed, dict(trends))
+            self.stats["refreshes"] += 1
+            logging.debug(f"🌐 市场上下文已刷新: 恐惧贪婪 {fear_greed}, 趋势 {trends}")
+            return self._snapshot
+
+    def snapshot(self):
+        """读取当前快照（没有或已过期时先刷新）"""
+        self.stats["reads"] += 1
+        snapshot = self._snapshot
+        if snapshot is not None and time.time() - snapshot.time < self.config["ttl"]:
+            return snapshot
+        return self.refresh()
+
+    def get_stats(self):
+        return dict(self.stats)
+
+# 全局实例
+market_context = MarketContext()
@@ -1,6 +1,7 @@
 import logging
 import pandas as pd
 from utils.decorators import safe_request
+from core.feature_cache import feature_cache
 #from core.cache_manager import get_cached_data
 
 class MarketSentimentAnalyzer:
@@ -42,11 +43,11 @@ class MarketSentimentAnalyzer:
         price_sentiment = 1 if price_change > 0.02 else (-1 if price_change < -0.02 else 0)
         
         # 2. 成交量情绪
-        volume_avg = df["volume"].tail(20).mean()
+        volume_avg = feature_cache.tail_stat(df, "volume", 20, "mean")
         volume_sentiment = 1 if latest["volume"] > volume_avg * 1.5 else 0
         
         # 3. 波动率情绪
-        volatility = df["close"].tail(20).std() / df["close"].tail(20).mean()
+        volatility = feature_cache.tail_stat(df, "close", 20, "std") / feature_cache.tail_stat(df, "close", 20, "mean")
         volatility_sentiment = -1 if volatility > 0.05 else 0  # 高波动率通常伴随不确定性
         
         # 综合情绪得分
@@ -2,6 +2,7 @@
 import pandas as pd
 import numpy as np
 import logging
+from core.feature_cache import feature_cache
 
 class MomentumBreakoutStrategy:
     def __init__(self):
@@ -17,14 +18,15 @@ class MomentumBreakoutStrategy:
             price_change = (df['close'].iloc[-1] - df['close'].iloc[-period]) / df['close'].iloc[-period]
             
             # 成交量动量
-            volume_change = (df['volume'].iloc[-1] - df['volume'].iloc[-period:].mean()) / df['volume'].iloc[-period:].mean()
+            volume_mean = feature_cache.tail_stat(df, 'volume', period, 'mean')
+            volume_change = (df['volume'].iloc[-1] - volume_mean) / volume_mean
             
             # RSI动量
             rsi = self.calculate_rsi(df, period=14)
             rsi_momentum = (rsi.iloc[-1] - 50) / 50
             
             # 波动率调整
-            volatility = df['close'].tail(period).std() / df['close'].tail(period).mean()
+            volatility = feature_cache.tail_stat(df, 'close', period, 'std') / feature_cache.tail_stat(df, 'close', period, 'mean')
             volatility_adjustment = 1 - min(volatility * 10, 0.5)  # 高波动率降低得分
             
             # 综合动量得分
@@ -50,8 +52,8 @@ class MomentumBreakoutStrategy:
             current_low = df['low'].iloc[-1]
             
             # 计算近期高低点
-            recent_high = df['high'].tail(lookback_period).max()
-            recent_low = df['low'].tail(lookback_period).min()
+            recent_high = feature_cache.tail_stat(df, 'high', lookback_period, 'max')
+            recent_low = feature_cache.tail_stat(df, 'low', lookback_period, 'min')
             
             # 突破检测
             upward_breakout = current_high > recent_high * (1 + self.breakout_threshold)
@@ -70,12 +72,7 @@ class MomentumBreakoutStrategy:
     
     def calculate_rsi(self, df, period=14):
         """计算RSI"""
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+        return feature_cache.rsi(df, period)
 
 # 全局实例
 momentum_breakout = MomentumBreakoutStrategy()
\ No newline at end of file
@@ -79,7 +79,7 @@ class MultiFrequencyMonitor:
 
     def process_symbols_concurrently(self, symbols, group_name):
         """
-        【修复版】强制串行处理，彻底解决多线程卡死问题
+        有界线程池并发处理一组标的（每个标的单独超时、同一标的不会被两组同时处理）
         """
         from core.state_manager import is_in_low_balance_mode
         
@@ -104,29 +104,57 @@ class MultiFrequencyMonitor:
         if not actual_symbols:
             return
             
-        logging.info(f"🚀 {group_name} 开始处理: {len(actual_symbols)} 个标的 (串行模式)")
+        from core.symbol_pool import symbol_pool
+        group_timeout = self.get_monitor_interval(group_name)
+        logging.info(f"🚀 {group_name} 开始处理: {len(actual_symbols)} 个标的 (线程池 {symbol_pool.config['max_workers']})")
         
-        # 2. 串行循环处理
         start_total = time.time()
-        for i, symbol in enumerate(actual_symbols):
-            try:
-                # 打印当前进度，这样如果卡住就知道是哪个币
-                logging.info(f"   👉 [{i+1}/{len(actual_symbols)}] 正在分析: {symbol} ...")
-                
-                step_start = time.time()
-                self.safe_process_symbol(symbol, group_name)
-                step_cost = time.time() - step_start
-                
-                # 如果处理时间过长，记录警告
-                if step_cost > 5.0:
-                    logging.warning(f"   ⚠️ {symbol} 分析耗时过长: {step_cost:.2f}s")
-                
-                # 3. 强制休眠，防止 API 限流导致下次请求卡顿
-                time.sleep(0.2)
-                
-            except Exception as e:
-                logging.error(f"   ❌ 分析 {symbol} 时发生未捕获异常: {e}")
-                continue
+        # 信号阶段要用的1H K线先整组并发拉取，拉取后立即整组批量计算指标；
+        # 信号阶段在缓存有效期内直接命中同一根K线，逐个分析时从特征缓存读取
+        try:
+            from core.kline_store import kline_store
+            from modules.batch_indicators import batch_indicators
+            from modules.technical_analysis import INDICATOR_HISTORY_LIMIT
+            symbol_pool.map(actual_symbols,
+                            lambda symbol: kline_store.get_buffer(symbol, "1H", INDICATOR_HISTORY_LIMIT),
+                            group_timeout / 4)
+            batch_indicators.compute(actual_symbols, "1H", INDICATOR_HISTORY_LIMIT)
+        except Exception as e:
+            logging.warning(f"⚠️ {group_name} 批量指标计算失败，改为逐个计算: {e}")
+        
+        # 与标的无关的市场数据整组只取一次，本组所有标的使用同一快照
+        try:
+            from modules.market_context import market_context
+            market_context.refresh()
+        except Exception as e:
+            logging.warning(f"⚠️ {group_name} 市场上下文刷新失败: {e}")
+        try:
+            from core.funding_store import funding_store
+            funding_store.refresh(actual_symbols)
+        except Exception as e:
+            logging.warning(f"⚠️ {group_name} 资金费率刷新失败: {e}")
+        
+        # 先为整组计算信号并统一打分排名，强信号优先处理，只有前N名允许开新仓
+        from modules.signal_scoring import signal_board
+        from modules.trading_execution import check_enhanced_multi_signal
+        signals = symbol_pool.map(actual_symbols, check_enhanced_multi_signal, group_timeout / 2)
+        for symbol, result in signals.items():
+            if result is not None:
+                signal_board.put_result(symbol, result)
+        ordered_symbols = signal_board.rank(actual_symbols, held=positions)
+        
+        # 2. 并发处理（按排名顺序提交，强信号先执行）
+        def process(symbol):
+            step_start = time.time()
+            self.safe_process_symbol(symbol, group_name)
+            step_cost = time.time() - step_start
+            # 如果处理时间过长，记录警告
+            if step_cost > 5.0:
+                logging.warning(f"   ⚠️ {symbol} 分析耗时过长: {step_cost:.2f}s")
+        
+        remaining = max(1.0, group_timeout - (time.time() - start_total))
+        symbol_pool.map(ordered_symbols, process, remaining)
+        signal_board.finish(actual_symbols)
 
         total_cost = time.time() - start_total
         logging.info(f"🏁 {group_name} 全部完成 (总耗时: {total_cost:.2f}s)")
@@ -141,14 +169,10 @@ class MultiFrequencyMonitor:
         self._run_monitor("low_frequency")
 
     def _run_monitor(self, group):
-        current_time = time.time()
-        interval = self.get_monitor_interval(group)
-        
-        # 检查是否到了运行时间
-        if self.last_monitor_time[group] == 0 or current_time - self.last_monitor_time[group] >= interval:
-            symbols = self.get_monitor_symbols(group)
-            if symbols:
-                self.process_symbols_concurrently(symbols, group)
-            self.last_monitor_time[group] = current_time
+        # 运行间隔由调度器按计划时间保证，这里只记录本次开始时间
+        self.last_monitor_time[group] = time.time()
+        symbols = self.get_monitor_symbols(group)
+        if symbols:
+            self.process_symbols_concurrently(symbols, group)
 
 frequency_monitor = MultiFrequencyMonitor()
\ No newline at end of file
@@ -55,11 +55,11 @@ def fetch_cryptopanic_sentiment(coin):
         return 0.5
 
 def get_sentiment_signals(coin):
-    """获取市场情绪信号"""
+    """获取市场情绪信号（恐惧贪婪指数取自全市场上下文，不再按币种重复请求）"""
+    from modules.market_context import market_context
     sentiment_data = get_cached_data(
         f"sentiment_{coin}",
         lambda: {
-            "fear_greed": fetch_fear_greed_index(),
             "coinbase_premium": calculate_coinbase_premium(coin),
             "cryptopanic_score": fetch_cryptopanic_sentiment(coin)
         },
@@ -68,7 +68,7 @@ def get_sentiment_signals(coin):
     if not sentiment_data:
         return False
         
-    fear_greed_data = sentiment_data.get("fear_greed", [50, 50, 50])
+    fear_greed_data = market_context.snapshot().fear_greed
     return (all([x <= FEAR_GREED_THRESHOLD for x in fear_greed_data]) and
             sentiment_data.get("coinbase_premium", 0) >= COINBASE_PREMIUM_THRESHOLD and
             sentiment_data.get("cryptopanic_score", 0) >= 0.2)
\ No newline at end of file
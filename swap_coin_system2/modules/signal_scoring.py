@@ -0,0 +1,160 @@
+import logging
+import threading
+import numpy as np
+from config.constants import RISK_PARAMS, RSI_OVERSOLD, RSI_OVERBOUGHT, SIGNAL_RANKING_CONFIG
+
+# 特征矩阵的列（symbols × FEATURES）
+FEATURES = [
+    "macd_bullish", "rsi_oversold", "rsi_overbought", "price_trend", "technical_ok",
+    "enhanced_score", "support_strength", "resistance_strength", "chain_ok", "sentiment_ok",
+    "funding_signal", "funding_confidence", "market_sentiment", "market_confidence",
+]
+COLUMN = {name: i for i, name in enumerate(FEATURES)}
+
+DIRECTIONS = {1: "long", -1: "short", 0: "neutral"}
+
+def feature_row(df, technical_ok, chain_ok, sentiment_ok, funding, market_sentiment, enhanced):
+    """由K线和各信号组件结果构建一行特征"""
+    latest = df.iloc[-1]
+    enhanced_score, support_strength, resistance_strength = enhanced
+    row = np.zeros(len(FEATURES))
+    row[COLUMN["macd_bullish"]] = latest.get("macd", 0) > latest.get("macd_signal", -1)
+    row[COLUMN["rsi_oversold"]] = latest.get("rsi", 50) <= RSI_OVERSOLD
+    row[COLUMN["rsi_overbought"]] = latest.get("rsi", 50) >= RSI_OVERBOUGHT
+    row[COLUMN["price_trend"]] = latest["close"] >= df.iloc[-5]["close"]
+    row[COLUMN["technical_ok"]] = bool(technical_ok)
+    row[COLUMN["enhanced_score"]] = enhanced_score
+    row[COLUMN["support_strength"]] = support_strength
+    row[COLUMN["resistance_strength"]] = resistance_strength
+    row[COLUMN["chain_ok"]] = bool(chain_ok)
+    row[COLUMN["sentiment_ok"]] = bool(sentiment_ok)
+    row[COLUMN["funding_signal"]], row[COLUMN["funding_confidence"]] = funding
+    row[COLUMN["market_sentiment"]], row[COLUMN["market_confidence"]] = market_sentiment
+    return row
+
+def score_features(features, threshold=None, enable_short=None):
+    """
+    对特征矩阵一次性计算多空强度和方向
+
+    权重与原逐个标的计算完全相同。返回 {"long", "short", "strength", "direction", "signal_ok"}
+    数组，direction 为 1 / -1 / 0。
+    """
+    features = np.atleast_2d(np.asarray(features, dtype=np.float64))
+    threshold = RISK_PARAMS.get("signal_threshold", 0.25) if threshold is None else threshold
+    enable_short = RISK_PARAMS.get("enable_short", True) if enable_short is None else enable_short
+    f = {name: features[:, i] for name, i in COLUMN.items()}
+
+    long_strength = (
+        f["macd_bullish"] * 0.12 +
+        f["rsi_oversold"] * 0.12 +
+        f["price_trend"] * 0.10 +
+        f["technical_ok"] * 0.10 +
+        np.maximum(0, f["enhanced_score"]) * 0.15 +
+        f["support_strength"] * 0.12 +
+        f["chain_ok"] * 0.08 +
+        f["sentiment_ok"] * 0.08 -
+        f["resistance_strength"] * 0.10
+    )
+    short_strength = (
+        (1 - f["macd_bullish"]) * 0.12 +
+        f["rsi_overbought"] * 0.12 +
+        (1 - f["price_trend"]) * 0.10 +
+        (1 - f["technical_ok"]) * 0.10 +
+        np.maximum(0, -f["enhanced_score"]) * 0.15 +
+        (1 - f["support_strength"]) * 0.12 +
+        (1 - f["chain_ok"]) * 0.08 +
+        (1 - f["sentiment_ok"]) * 0.08 -
+        f["support_strength"] * 0.10
+    )
+
+    long_strength = long_strength + np.where(f["funding_signal"] > 0, f["funding_confidence"] * 0.08, 0)
+    short_strength = short_strength + np.where(f["funding_signal"] < 0, f["funding_confidence"] * 0.08, 0)
+    long_strength = long_strength + np.where(f["market_sentiment"] > 0, f["market_confidence"] * 0.08, 0)
+    short_strength = short_strength + np.where(f["market_sentiment"] < 0, f["market_confidence"] * 0.08, 0)
+
+    long_strength = np.maximum(0, long_strength)
+    short_strength = np.maximum(0, short_strength)
+
+    is_long = (long_strength > short_strength) & (long_strength > threshold)
+    is_short = (short_strength > long_strength) & (short_strength > threshold) & bool(enable_short)
+    direction = np.where(is_long, 1, np.where(is_short, -1, 0))
+    strength = np.where(is_long, long_strength,
+                        np.where(is_short, short_strength, np.maximum(long_strength, short_strength)))
+    return {"long": long_strength, "short": short_strength, "strength": strength,
+            "direction": direction, "signal_ok": direction != 0}
+
+class SignalBoard:
+    """
+    本轮信号看板 - 汇总一组标的的特征，统一打分排名
+
+    check_enhanced_multi_signal 把每个标的的特征行记在这里；process_symbols_concurrently
+    先为整组标的计算信号并保存结果，再一次性打分排名，只允许强度最高的 top_n 个标的
+    开新仓，并按强度从高到低处理。未参与排名的标的（如直接调用 process_symbol）不受限制。
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(SIGNAL_RANKING_CONFIG, **(config or {}))
+        self._rows = {}
+        self._results = {}
+        self._ranked = set()
+        self._allowed = set()
+        self._lock = threading.Lock()
+
+    def record_features(self, symbol, row):
+        with self._lock:
+            self._rows[symbol] = row
+
+    def put_result(self, symbol, result):
+        """保存本轮已计算的信号结果，供 process_symbol 直接取用"""
+        with self._lock:
+            self._results[symbol] = result
+
+    def take_result(self, symbol):
+        """取出本轮已计算的信号结果（只用一次），没有时返回 None"""
+        with self._lock:
+            return self._results.pop(symbol, None)
+
+    def rank(self, symbols, held=()):
+        """
+        对一组标的一次性打分，返回按优先级排列的标的列表
+
+        有信号的按强度降序在前，其余保持原顺序在后；同时确定这组标的中本轮可开仓的
+        top_n。已持仓的标的（held）只会加仓，不占开仓名额。只对本轮保存了结果的
+        标的打分，信号计算超时或失败的标的不会用上一轮的特征参与排名。
+        """
+        with self._lock:
+            scored = [s for s in symbols if s in self._rows and s in self._results]
+            matrix = np.vstack([self._rows[s] for s in scored]) if scored else np.empty((0, len(FEATURES)))
+
+        scores = score_features(matrix)
+        order = np.lexsort((-scores["strength"], ~scores["signal_ok"]))
+        with_signal = [scored[i] for i in order if scores["signal_ok"][i]]
+        rest = [s for s in symbols if s not in set(with_signal)]
+
+        if self.config["enabled"]:
+            top_n = self.config["top_n"]
+            candidates = [s for s in with_signal if s not in held]
+            with self._lock:
+                self._ranked.update(symbols)
+                self._allowed.difference_update(symbols)
+                self._allowed.update(candidates[:top_n])
+            if len(candidates) > top_n:
+                logging.info(f"📊 本轮 {len(candidates)} 个开仓信号，只允许前 {top_n} 个: {candidates[:top_n]}")
+        return with_signal + rest
+
+    def may_open(self, symbol):
+        """本轮是否允许该标的开新仓"""
+        with self._lock:
+            return symbol not in self._ranked or symbol in self._allowed
+
+    def finish(self, symbols):
+        """本轮结束，清除这组标的的特征、排名和未取用的结果"""
+        with self._lock:
+            for symbol in symbols:
+                self._rows.pop(symbol, None)
+                self._results.pop(symbol, None)
+                self._ranked.discard(symbol)
+                self._allowed.discard(symbol)
+
+# 全局实例
+signal_board = SignalBoard()
@@ -0,0 +1,163 @@
+import logging
+import threading
+from collections import deque, namedtuple
+import numpy as np
+from config.constants import SWING_PIVOT_CONFIG
+
+# trend: 1 上升段（最近确认的是低点），-1 下降段（最近确认的是高点），0 尚未确认任何拐点
+# extreme: 当前段内的极值 (time, price)；high / low: 未确认拐点前的区间高低点
+# pivot: 最近确认的拐点 (time, price, kind)，kind 为 "high" / "low"
+SwingState = namedtuple("SwingState", ["trend", "extreme", "high", "low", "pivot"])
+EMPTY_STATE = SwingState(0, None, None, None, None)
+
+def step(state, bar, deviation):
+    """
+    ZigZag 状态机推进一根K线，返回 (新状态, 新确认的拐点或 None)
+
+    上升段中价格自段内最高点回落 deviation 比例即确认该高点为波段高点，
+    下降段同理。纯函数，不修改输入状态。
+    """
+    ts, high, low = bar
+    trend, extreme, range_high, range_low, pivot = state
+
+    if trend == 0:
+        range_high = (ts, high) if range_high is None or high > range_high[1] else range_high
+        range_low = (ts, low) if range_low is None or low < range_low[1] else range_low
+        drop = range_low[1] <= range_high[1] * (1 - deviation)
+        if drop and range_low[0] >= range_high[0]:
+            confirmed = (range_high[0], range_high[1], "high")
+            return SwingState(-1, range_low, None, None, confirmed), confirmed
+        if drop and range_high[0] > range_low[0]:
+            confirmed = (range_low[0], range_low[1], "low")
+            return SwingState(1, range_high, None, None, confirmed), confirmed
+        return SwingState(0, None, range_high, range_low, None), None
+
+    if trend == 1:
+        if high > extreme[1]:
+            return state._replace(extreme=(ts, high)), None
+        if low <= extreme[1] * (1 - deviation):
+            confirmed = (extreme[0], extreme[1], "high")
+            return SwingState(-1, (ts, low), None, None, confirmed), confirmed
+        return state, None
+
+    if low < extreme[1]:
+        return state._replace(extreme=(ts, low)), None
+    if high >= extreme[1] * (1 + deviation):
+        confirmed = (extreme[0], extreme[1], "low")
+        return SwingState(1, (ts, high), None, None, confirmed), confirmed
+    return state, None
+
+def swing_range(state):
+    """当前回撤网格使用的 (波段高点, 波段低点)，数据不足时返回 None"""
+    if state.trend == 1:
+        return state.extreme[1], state.pivot[1]
+    if state.trend == -1:
+        return state.pivot[1], state.extreme[1]
+    if state.high is None:
+        return None
+    return state.high[1], state.low[1]
+
+class SwingPivotTracker:
+    """
+    单个 (symbol, timeframe) 的波段拐点跟踪
+
+    已收盘K线推进 committed 状态并记录确认的拐点；当前K线只在读取时临时
+    推进一步（状态是几个标量），所以实时K线反复修正也是 O(1)。
+    """
+
+    def __init__(self, deviation, max_pivots=50):
+        self.deviation = deviation
+        self.committed = EMPTY_STATE
+        self.pivots = deque(maxlen=max_pivots)
+        self.live = None
+
+    @property
+    def live_time(self):
+        return self.live[0] if self.live is not None else None
+
+    def update(self, bar):
+        """合并一根K线 (time, high, low)，返回 False 表示时间戳早于实时K线"""
+        if self.live is not None and bar[0] < self.live[0]:
+            return False
+        if self.live is not None and bar[0] > self.live[0]:
+            self.committed, confirmed = step(self.committed, self.live, self.deviation)
+            if confirmed is not None:
+                self.pivots.append(confirmed)
+        self.live = tuple(bar)
+        return True
+
+    def state(self):
+        """包含实时K线的当前状态"""
+        if self.live is None:
+            return self.committed
+        return step(self.committed, self.live, self.deviation)[0]
+
+    def swing_range(self):
+        return swing_range(self.state())
+
+class SwingPivotIndex:
+    """
+    波段拐点索引 - 每个 (symbol, timeframe) 保留 ZigZag 状态
+
+    首次使用时回放一遍K线，之后每轮只推进新增或修正的K线，回撤网格所需的
+    波段高低点 O(1) 读取。用法与 IndicatorEngine.sync 相同。
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(SWING_PIVOT_CONFIG, **(config or {}))
+        self._trackers = {}
+        self._lock = threading.Lock()
+        self.stats = {"rebuilds": 0, "bars": 0}
+
+    def _new_tracker(self, rows):
+        tracker = SwingPivotTracker(self.config["deviation"], self.config["max_pivots"])
+        for row in rows:
+            tracker.update(row)
+        return tracker
+
+    def sync(self, symbol, timeframe, times, highs, lows):
+        """用按时间升序的K线推进状态，返回 tracker"""
+        key = (symbol, timeframe)
+        rows = np.column_stack([times, highs, lows])
+        with self._lock:
+            tracker = self._trackers.get(key)
+            start = None
+            if tracker is not None and tracker.live_time is not None:
+                start = int(np.searchsorted(times, tracker.live_time, side="left"))
+                if start >= len(times) or times[start] != tracker.live_time:
+                    start = None
+            if start is None:
+                tracker = self._trackers[key] = self._new_tracker(rows)
+                self.stats["rebuilds"] += 1
+                self.stats["bars"] += len(rows)
+                return tracker
+            for row in rows[start:]:
+                tracker.update(row)
+            self.stats["bars"] += len(rows) - start
+            return tracker
+
+    def swing_range(self, df):
+        """
+        K线 DataFrame 当前的 (波段高点, 波段低点)
+
+        已用 feature_cache.tag 标记的 DataFrame 走增量状态，否则临时回放。
+        """
+        times = df["time"].to_numpy(dtype=np.float64) if "time" in df.columns else np.arange(len(df), dtype=np.float64)
+        highs = df["high"].to_numpy(dtype=np.float64)
+        lows = df["low"].to_numpy(dtype=np.float64)
+        symbol = df.attrs.get("symbol")
+        if symbol is None or df.attrs.get("rows") != len(df):
+            return self._new_tracker(np.column_stack([times, highs, lows])).swing_range()
+        try:
+            return self.sync(symbol, df.attrs.get("timeframe"), times, highs, lows).swing_range()
+        except Exception as e:
+            logging.debug(f"{symbol} 波段拐点更新失败，改为临时回放: {e}")
+            return self._new_tracker(np.column_stack([times, highs, lows])).swing_range()
+
+    def get_pivots(self, symbol, timeframe="1H"):
+        """已确认的拐点列表 [(time, price, kind), ...]"""
+        tracker = self._trackers.get((symbol, timeframe))
+        return list(tracker.pivots) if tracker else []
+
+# 全局实例
+swing_pivot_index = SwingPivotIndex()
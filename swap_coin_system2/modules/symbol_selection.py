@@ -45,6 +45,10 @@ def get_swap_tickers():
         if result and result.get("code") == "0":
             data = result.get("data", [])
             logging.info(f"成功获取 {len(data)} 个永续合约行情")
+            
+            # 同步到全量行情快照，供实时价格查询复用
+            from core.ticker_snapshot import ticker_snapshot
+            ticker_snapshot.ingest(data)
             return data
         else:
             logging.error(f"获取永续合约行情失败: {result}")
@@ -5,10 +5,21 @@ import time
 import requests
 from core.cache_manager import get_cached_data
 from utils.validators import validate_data
-from config.constants import CACHE_EXPIRES, RSI_OVERSOLD, VOLUME_MULTIPLE, RSI_OVERBOUGHT
+from utils.decorators import backoff_sleep
+from config.constants import CACHE_EXPIRES, RSI_OVERSOLD, VOLUME_MULTIPLE, RSI_OVERBOUGHT, KLINE_STORE_CONFIG
 
-def get_kline_data(symbol, timeframe="1H", limit=200, max_retries=3):
-    """获取K线数据 - 无锁串行版"""
+OHLCV_COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+EMPTY_KLINE_ARRAY = np.empty((0, 6), dtype=np.float64)
+INDICATOR_HISTORY_LIMIT = 250  # 覆盖 ma200 窗口外加足够的 EMA 预热
+
+def fetch_kline_array(symbol, timeframe="1H", limit=200, max_retries=3, before=""):
+    """
+    获取K线原始数组 - 无锁串行版
+
+    返回按时间升序的 float64 数组，形状 (n, 6)，列为 time/open/high/low/close/volume；
+    失败时返回空数组。before: OKX 分页参数，只返回时间戳晚于该值的K线，用于增量拉取。
+    请求异常或空响应后按指数退避再重试；API 错误码（含限流）直接重试，由限流器控制节奏
+    """
     tf_map = {"1h": "1H", "4h": "4H", "1d": "1D", "15m": "15m", "30m": "30m"}
     okx_timeframe = tf_map.get(timeframe.lower(), timeframe)
 
@@ -18,18 +29,16 @@ def get_kline_data(symbol, timeframe="1H", limit=200, max_retries=3):
             api = core.api_client.market_api
             
             if api is None:
-                return pd.DataFrame()
+                return EMPTY_KLINE_ARRAY
             
-            # 不再使用锁，因为上层已经是串行的了
-            # 增加间隔防止触发限流
-            time.sleep(0.1)
-            
-            # 这里如果是 SDK 内部封装的 requests，通常无法直接传 timeout
-            # 但串行执行可以避免并发导致的 socket 阻塞
-            response = api.get_candlesticks(instId=symbol, bar=okx_timeframe, limit=str(limit))
+            # 限流由 market_api 按 candles 分组的令牌桶统一控制，超时与网络重试在连接池内完成
+            response = api.get_candlesticks(instId=symbol, bar=okx_timeframe, limit=str(limit),
+                                            before=str(before) if before else "")
             
             if not response:
                 logging.warning(f"⚠️ {symbol} K线请求返回空")
+                if attempt < max_retries - 1:
+                    backoff_sleep(attempt, KLINE_STORE_CONFIG["retry_backoff"])
                 continue
 
             if response.get("code") != "0":
@@ -39,33 +48,35 @@ def get_kline_data(symbol, timeframe="1H", limit=200, max_retries=3):
                     from core.state_manager import strategy_state
                     if symbol in strategy_state["selected_symbols"]:
                         strategy_state["selected_symbols"].remove(symbol)
-                    return pd.DataFrame()
+                    return EMPTY_KLINE_ARRAY
                 
+                # 限流响应已让对应分组暂停，下次请求自动等待放行
                 logging.warning(f"⚠️ {symbol} API错误 ({response.get('code')}): {error_msg}")
-                time.sleep(1)
                 continue
                 
             if not response.get("data"):
-                return pd.DataFrame()
-            
-            ohlcv = []
-            for item in response["data"]:
-                ohlcv.append([
-                    int(item[0]), float(item[1]), float(item[2]), 
-                    float(item[3]), float(item[4]), float(item[5])
-                ])
+                return EMPTY_KLINE_ARRAY
             
-            df = pd.DataFrame(ohlcv, columns=["time", "open", "high", "low", "close", "volume"])
-            df = df.sort_values("time").reset_index(drop=True)
-            
-            # logging.info(f"   ✅ 获取 {symbol} 数据成功: {len(df)}条")
-            return df
+            # 一次性向量化转换字符串，OKX 按时间倒序返回
+            rows = np.array([item[:6] for item in response["data"]], dtype=np.float64)
+            return rows[np.argsort(rows[:, 0], kind="stable")]
 
         except Exception as e:
             logging.error(f"❌ 获取K线异常 {symbol}: {e}")
-            time.sleep(1)
+            if attempt < max_retries - 1:
+                backoff_sleep(attempt, KLINE_STORE_CONFIG["retry_backoff"])
             
-    return pd.DataFrame()
+    return EMPTY_KLINE_ARRAY
+
+def get_kline_data(symbol, timeframe="1H", limit=200, max_retries=3, before=""):
+    """获取K线数据 DataFrame（旧接口，新代码优先用 kline_store）"""
+    rows = fetch_kline_array(symbol, timeframe, limit, max_retries, before)
+    if not len(rows):
+        return pd.DataFrame()
+    
+    df = pd.DataFrame(rows, columns=OHLCV_COLUMNS)
+    df["time"] = df["time"].astype(np.int64)
+    return df
     
 def calculate_indicators(df):
     if df is None or len(df) < 20:
@@ -87,11 +98,11 @@ def calculate_indicators(df):
         df["macd"] = exp1 - exp2
         df["macd_signal"] = df["macd"].ewm(span=9, adjust=False).mean()
         
+        # fmax 跳过首行 shift 产生的 NaN，与逐行取最大值（skipna）一致
         high_low = df["high"] - df["low"]
         high_close = np.abs(df["high"] - df["close"].shift())
         low_close = np.abs(df["low"] - df["close"].shift())
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        true_range = np.max(ranges, axis=1)
+        true_range = pd.Series(np.fmax(high_low, np.fmax(high_close, low_close)), index=df.index)
         df["atr"] = true_range.rolling(window=14).mean() / df["close"]
 
         return df
@@ -101,16 +112,25 @@ def calculate_indicators(df):
 
 def get_technical_signals(symbol):
     try:
-        # 禁用缓存，强制获取最新数据进行调试
-        # df = get_cached_data(...) 
-        df = get_kline_data(symbol, timeframe="1H", limit=100)
+        from core.kline_store import kline_store
+        # 多取历史让 ma200 / EMA 有完整预热，输出仍截取最近100根
+        df = kline_store.get_klines(symbol, "1H", INDICATOR_HISTORY_LIMIT)
         
         if not validate_data(df, symbol):
             return False, df
             
-        df = calculate_indicators(df)
+        # 增量指标引擎：每轮只计算新增/修正的K线，结果与 calculate_indicators 一致
+        from modules.indicator_engine import indicator_engine
+        df = indicator_engine.attach(symbol, "1H", df)
         if df is None or df.empty:
             return False, df
+        df = df.tail(100).reset_index(drop=True)
+        # 标记后各分析器共用的 RSI / 均值等特征只在这根K线上计算一次
+        from core.feature_cache import feature_cache
+        feature_cache.tag(df, symbol, "1H")
+        # 本组批量指标已算好时直接预填，K线有更新则不预填
+        from modules.batch_indicators import batch_indicators
+        batch_indicators.prime(df)
             
         latest = df.iloc[-1]
         
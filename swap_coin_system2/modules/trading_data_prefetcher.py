@@ -0,0 +1,163 @@
+import time
+import logging
+import threading
+from config.constants import TRADING_DATA_PREFETCH_CONFIG, RATE_LIMIT_CONFIG
+from core.rate_limiter import TokenBucket
+
+class TradingDataPrefetcher:
+    """
+    交易大数据预取 - 杠杆多空比和主动买卖量按周期边界在后台刷新
+
+    这两类数据只在 period（1H）边界更新，原先在各标的信号计算中按300秒TTL
+    懒加载，大部分请求拿到的是同样的数据，缓存失效时还会卡在信号路径上。
+    后台线程在每个周期开始 delay 秒后为所有监控币种刷新一次，请求速率限制在
+    rubik 分组限速的 budget_share 以内，留出余量给其他调用；分析器通过 get()
+    直接读取，不会阻塞。获取失败的保留上一期数据，retry 秒后重试。
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(TRADING_DATA_PREFETCH_CONFIG, **(config or {}))
+        spec = RATE_LIMIT_CONFIG["groups"]["rubik"]
+        rate = spec["rate"] / spec["per"] * self.config["budget_share"]
+        self._bucket = TokenBucket(rate, 1)
+        self.coins = set()
+        self.store = {}              # (kind, coin) -> {"data", "period_start", "fetched"}
+        self._retry_at = {}
+        self.running = False
+        self._thread = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self.stats = {"fetches": 0, "errors": 0, "hits": 0, "misses": 0, "passes": 0}
+
+    def fetchers(self):
+        """各类数据的获取函数 {kind: func(coin)}"""
+        from modules.advanced_market_analysis import advanced_market_analyzer
+        period = self.config["api_period"]
+        return {
+            "leverage_ratio": lambda coin: advanced_market_analyzer.get_leverage_ratio(ccy=coin, period=period),
+            "taker_volume": lambda coin: advanced_market_analyzer.get_taker_volume(ccy=coin, instType="SPOT",
+                                                                                   period=period),
+        }
+
+    # ---------- 生命周期 ----------
+
+    def start(self, symbols):
+        """启动后台预取线程"""
+        if not self.config["enabled"]:
+            return False
+        self.watch(symbols)
+        if self.running:
+            return True
+        self.running = True
+        self._thread = threading.Thread(target=self._thread_main, name="trading-data", daemon=True)
+        self._thread.start()
+        logging.info(f"✅ 交易大数据预取启动，{len(self.coins)} 个币种")
+        return True
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def watch(self, symbols):
+        """加入需要预取的标的（按币种去重），有新币种时立即唤醒后台线程"""
+        coins = {symbol.split("-")[0] for symbol in symbols}
+        with self._lock:
+            added = coins - self.coins
+            self.coins.update(added)
+        if added:
+            self._wake.set()
+
+    # ---------- 读取 ----------
+
+    def get(self, kind, coin):
+        """读取最近一次预取的数据，还没有时返回 None（并加入预取列表）"""
+        entry = self.store.get((kind, coin))
+        if entry is None:
+            self.stats["misses"] += 1
+            self.watch([coin])
+            return None
+        self.stats["hits"] += 1
+        return entry["data"]
+
+    # ---------- 刷新 ----------
+
+    def period_start(self, now):
+        period = self.config["period"]
+        return now - now % period
+
+    def due_keys(self, now):
+        """本周期尚未刷新（且不在重试等待中）的 (kind, coin)"""
+        if now - self.period_start(now) < self.config["delay"]:
+            current = self.period_start(now) - self.config["period"]
+        else:
+            current = self.period_start(now)
+        with self._lock:
+            coins = sorted(self.coins)
+        due = []
+        for kind in ("leverage_ratio", "taker_volume"):
+            for coin in coins:
+                key = (kind, coin)
+                entry = self.store.get(key)
+                if entry is not None and entry["period_start"] >= current:
+                    continue
+                if now < self._retry_at.get(key, 0):
+                    continue
+                due.append(key)
+        return due, current
+
+    def refresh_due(self, now=None):
+        """刷新所有到期数据，按预算限速，返回成功条数"""
+        now = time.time() if now is None else now
+        due, current = self.due_keys(now)
+        if not due:
+            return 0
+        fetchers = self.fetchers()
+        fetched = 0
+        for kind, coin in due:
+            if not self.running and self._thread is not None:
+                break
+            wait = self._bucket.reserve()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                data = fetchers[kind](coin)
+            except Exception as e:
+                logging.debug(f"预取{coin} {kind}异常: {e}")
+                data = None
+            if data:
+                self.store[(kind, coin)] = {"data": data, "period_start": current, "fetched": time.time()}
+                self._retry_at.pop((kind, coin), None)
+                self.stats["fetches"] += 1
+                fetched += 1
+            else:
+                self._retry_at[(kind, coin)] = now + self.config["retry"]
+                self.stats["errors"] += 1
+        self.stats["passes"] += 1
+        logging.debug(f"交易大数据预取: {fetched}/{len(due)} 条")
+        return fetched
+
+    def next_wakeup(self, now):
+        """下一个周期边界 + delay，或更早的重试时间"""
+        wakeup = self.period_start(now) + self.config["delay"]
+        if wakeup <= now:
+            wakeup += self.config["period"]
+        pending = [t for t in self._retry_at.values() if t > now]
+        return min([wakeup] + pending)
+
+    def _thread_main(self):
+        while self.running:
+            self._wake.clear()
+            try:
+                self.refresh_due()
+            except Exception as e:
+                logging.error(f"交易大数据预取异常: {e}")
+            timeout = max(1.0, self.next_wakeup(time.time()) - time.time())
+            self._wake.wait(timeout)
+
+    def get_stats(self):
+        return dict(self.stats, entries=len(self.store))
+
+# 全局实例
+trading_data_prefetcher = TradingDataPrefetcher()
@@ -10,7 +10,8 @@ from core.state_manager import (
     strategy_state, 
     check_account_drawdown, 
     recalculate_asset_allocation, 
-    get_tradable_balance
+    get_tradable_balance,
+    state_lock
 )
 from modules.chain_analysis import get_chain_signals
 from modules.sentiment_analysis import get_sentiment_signals
@@ -35,6 +36,10 @@ from modules.position_management import (
 # 杠杆管理字典
 leverage_settings = {}
 
+# 开仓检查到下单的全局锁（标的并发处理时防止按同一余额重复开仓）；与调度任务
+# 的仓位同步、资产分配重算共用账户状态锁
+open_position_lock = state_lock
+
 from config.constants import (
     TAKE_PROFIT1, TAKE_PROFIT2, TAKE_PROFIT3,
     STOP_LOSS_MOVE, ROLL_PROFIT_THRESHOLD, ROLL_USE_PROFIT_RATIO,
@@ -43,7 +48,7 @@ from config.constants import (
     ROLL_SIGNAL_THRESHOLD, MAX_ROLL_TIMES,
     SMART_TAKE_PROFIT, FLOAT_LOSS_ADD, SUPPORT_RESISTANCE
 )
-from config.constants import ENTRY_STRATEGY
+from config.constants import ENTRY_STRATEGY, SIGNAL_RANKING_CONFIG
 from utils.common_utils import (
     safe_float_convert, 
     timing_decorator, 
@@ -440,6 +445,16 @@ def calculate_dynamic_leverage(signal_strength, base_leverage=3.0, max_leverage=
 @safe_request
 def get_realtime_price(symbol):
     try:
+        from core.market_stream import market_stream
+        stream_price = market_stream.get_last_price(symbol)
+        if stream_price:
+            return stream_price
+        
+        from core.ticker_snapshot import ticker_snapshot
+        snapshot_price = ticker_snapshot.get_last_price(symbol)
+        if snapshot_price:
+            return snapshot_price
+        
         market_api = core.api_client.market_api
         if market_api is None:
             return None
@@ -458,16 +473,11 @@ def get_realtime_price(symbol):
 @safe_request
 def get_depth_based_price(symbol, side="buy"):
     try:
-        market_api = core.api_client.market_api
-        if market_api is None:
-            return None
-            
-        perf_monitor.record_api_call("market_data")
+        # 下单定价：推送维护的本地盘口优先，不可用时重新请求 REST（不用缓存的快照）
+        from core.order_book import order_book_manager
+        data = order_book_manager.get_book(symbol, 5, fresh=True)
         
-        result = market_api.get_orderbook(instId=symbol, sz=5)
-        if result and result.get("code") == "0" and result.get("data"):
-            data = result["data"][0]
-            
+        if data:
             if side == "buy":
                 asks = data.get("asks", [])
                 if asks and len(asks) > 0:
@@ -623,18 +633,57 @@ def execute_trade(symbol, side, quantity, price, leverage=1, posSide="long", tdM
     
     return None
 
+def build_signal_graph(symbol, technical=None, reused=None):
+    """
+    单个标的的信号数据流图
+    
+    技术面、链上替代指标、情绪、资金费率、多空比/主动买卖、盘口互不依赖，
+    并发请求（K线由 kline_store 共享，各组件读取同一份缓冲）；增强评分在技术面
+    和盘口就绪后计算。每个组件超时或异常时取中性值。technical 为已算好的技术面
+    结果时直接使用，不再重算；reused 中已有的慢速组件不加入图。
+    """
+    from core.signal_graph import SignalGraph
+    from core.order_book import order_book_manager
+    from modules.enhanced_strategy import enhanced_strategy
+    coin = symbol.split("-")[0]
+    reused = reused or {}
+    
+    graph = SignalGraph()
+    graph.add("technical", lambda: technical if technical is not None else get_technical_signals(symbol),
+              fallback=(False, None))
+    if "chain" not in reused:
+        graph.add("chain", lambda: get_chain_signals(coin), fallback=False)
+    if "sentiment" not in reused:
+        graph.add("sentiment", lambda: get_sentiment_signals(coin), fallback=False)
+    if "funding" not in reused:
+        graph.add("funding", lambda: funding_analyzer.analyze_funding_rate_signal(symbol), fallback=(0, 0))
+    if "market_sentiment" not in reused:
+        graph.add("market_sentiment", lambda: advanced_market_analyzer.analyze_market_sentiment(symbol), fallback=(0, 0))
+    graph.add("depth", lambda: order_book_manager.get_depth_data(symbol))
+    graph.add("enhanced", lambda technical, depth: enhanced_strategy.calculate_enhanced_score(technical[1], symbol, depth),
+              deps=("technical", "depth"), fallback=(0, 0, 0))
+    return graph
+
 @timing_decorator
 def check_enhanced_multi_signal(symbol):
     """增强的多重信号检查"""
     try:
-        coin = symbol.split("-")[0]
-        
         if "SWAP" not in symbol:
             return False, pd.DataFrame(), 0.0, "neutral"
         
-        chain_ok = get_chain_signals(coin)
-        sentiment_ok = get_sentiment_signals(coin)
+        # 同一根K线内价格变化不大时复用慢速组件，技术指标、盘口和增强评分每轮重算
+        from core.signal_memo import signal_memo
         technical_ok, df = get_technical_signals(symbol)
+        reused = signal_memo.lookup(symbol, df)
+        graph = build_signal_graph(symbol, (technical_ok, df), reused)
+        signals = dict(reused or {}, **graph.run())
+        if reused is not None:
+            logging.debug(f"♻️ {symbol} 复用本根K线的信号组件")
+        else:
+            signal_memo.store(symbol, signals["technical"][1], signals, graph.fallbacks)
+        technical_ok, df = signals["technical"]
+        chain_ok = signals["chain"]
+        sentiment_ok = signals["sentiment"]
         
         if df is None or df.empty:
             return False, pd.DataFrame(), 0.0, "neutral"
@@ -643,97 +692,16 @@ def check_enhanced_multi_signal(symbol):
         logging.debug(f"{symbol} 信号检查异常: {e}")
         return False, pd.DataFrame(), 0.0, "neutral"
     
-    if df is None:
-        return False, pd.DataFrame(), 0.0, "neutral"
-    
     try:
-        depth_data = None
-        
-        funding_signal = 0
-        funding_confidence = 0
-        try:
-            funding_signal, funding_confidence = funding_analyzer.analyze_funding_rate_signal(symbol)
-        except Exception as e:
-            pass
-        
-        sentiment_score = 0
-        sentiment_confidence = 0
-        try:
-            sentiment_score, sentiment_confidence = advanced_market_analyzer.analyze_market_sentiment(symbol)
-        except Exception as e:
-            pass
-        
-        enhanced_score = 0
-        support_strength = 0
-        resistance_strength = 0
-        
-        try:
-            from modules.enhanced_strategy import enhanced_strategy
-            enhanced_score, support_strength, resistance_strength = enhanced_strategy.calculate_enhanced_score(
-                df, symbol, depth_data
-            )
-        except Exception as e:
-            pass
-        
-        latest = df.iloc[-1]
-        
-        macd_bullish = latest.get("macd", 0) > latest.get("macd_signal", -1)
-        rsi_oversold = latest.get("rsi", 50) <= RSI_OVERSOLD
-        rsi_overbought = latest.get("rsi", 50) >= RSI_OVERBOUGHT
-        price_trend = latest["close"] >= df.iloc[-5]["close"]
-        
-        long_strength = (
-            (1 if macd_bullish else 0) * 0.12 +
-            (1 if rsi_oversold else 0) * 0.12 +
-            (1 if price_trend else 0) * 0.10 +
-            (0.10 if technical_ok else 0) +
-            max(0, enhanced_score) * 0.15 +
-            support_strength * 0.12 +
-            (0.08 if chain_ok else 0) +
-            (0.08 if sentiment_ok else 0) -
-            resistance_strength * 0.10
-        )
+        from modules.signal_scoring import feature_row, score_features, signal_board, DIRECTIONS
+        row = feature_row(df, technical_ok, chain_ok, sentiment_ok,
+                          signals["funding"], signals["market_sentiment"], signals["enhanced"])
+        signal_board.record_features(symbol, row)
         
-        short_strength = (
-            (1 if not macd_bullish else 0) * 0.12 +
-            (1 if rsi_overbought else 0) * 0.12 +
-            (1 if not price_trend else 0) * 0.10 +
-            (0.10 if not technical_ok else 0) +
-            max(0, -enhanced_score) * 0.15 +
-            (1 - support_strength) * 0.12 +
-            (0.08 if not chain_ok else 0) +
-            (0.08 if not sentiment_ok else 0) -
-            support_strength * 0.10
-        )
-        
-        if funding_signal > 0:
-            long_strength += funding_confidence * 0.08
-        elif funding_signal < 0:
-            short_strength += funding_confidence * 0.08
-        
-        if sentiment_score > 0:
-            long_strength += sentiment_confidence * 0.08
-        elif sentiment_score < 0:
-            short_strength += sentiment_confidence * 0.08
-        
-        long_strength = max(0, long_strength)
-        short_strength = max(0, short_strength)
-        
-        signal_threshold = RISK_PARAMS.get("signal_threshold", 0.25)
-        enable_short = RISK_PARAMS.get("enable_short", True)
-        
-        if long_strength > short_strength and long_strength > signal_threshold:
-            direction = "long"
-            final_strength = long_strength
-            signal_ok = True
-        elif short_strength > long_strength and short_strength > signal_threshold and enable_short:
-            direction = "short"
-            final_strength = short_strength
-            signal_ok = True
-        else:
-            direction = "neutral"
-            final_strength = max(long_strength, short_strength)
-            signal_ok = False
+        scores = score_features(row)
+        direction = DIRECTIONS[int(scores["direction"][0])]
+        final_strength = float(scores["strength"][0])
+        signal_ok = bool(scores["signal_ok"][0])
         
         if signal_ok and final_strength > 0.6:
             logging.info(f"📊 {symbol} 强信号 - 方向: {direction}, 强度: {final_strength:.3f}")
@@ -744,6 +712,48 @@ def check_enhanced_multi_signal(symbol):
         logging.error(f"{symbol} 信号计算失败: {e}")
         return False, df, 0.0, "neutral"
 
+def open_new_position(symbol, coin, df, current_price, signal_strength, direction):
+    """开仓步骤7-9：同币种占比和余额检查、最优入场价、仓位计算并下单（调用方持有 open_position_lock）"""
+    # 步骤7: 同币种占比检查
+    coin_total_value = get_coin_total_position_value(coin)
+    total_equity = get_total_equity()
+    if total_equity > 0 and coin_total_value / total_equity > 0.10:
+        logging.info(f"[{symbol}] {coin} 占比超10% ({coin_total_value/total_equity*100:.1f}%)，禁止开仓")
+        return
+
+    tradable_balance = get_tradable_balance()
+    if tradable_balance < 2:
+        logging.info(f"[{symbol}] 可交易余额不足2 USDT，禁止开仓")
+        return
+
+    # 步骤8: 计算最优入场价
+    logging.info(f"[{symbol}] 步骤8/9 - 计算最优入场价...")
+    entry_price = get_optimal_entry_price(symbol, current_price, signal_strength, direction, df)
+    if entry_price is None:
+        logging.warning(f"[{symbol}] 获取最优入场价失败")
+        return
+
+    # 步骤9: 计算仓位并执行
+    logging.info(f"[{symbol}] 步骤9/9 - 计算仓位大小...")
+    position_size, base_leverage = calculate_position_size(symbol, entry_price, df, signal_strength, direction)
+
+    if position_size > 0 and can_open_new_position(symbol, position_size, entry_price, base_leverage):
+        logging.info(f"[{symbol}] 准备开仓 - 方向: {direction} | 张数: {position_size} | 价格: {entry_price:.6f} | 杠杆: {base_leverage}x")
+        success = execute_open_position(
+            symbol=symbol,
+            direction=direction,
+            size=position_size,
+            price=entry_price,
+            signal_strength=signal_strength,
+            base_leverage=base_leverage
+        )
+        if success:
+            logging.info(f"[{symbol}] 开仓成功！")
+        else:
+            logging.error(f"[{symbol}] 开仓失败")
+    else:
+        logging.info(f"[{symbol}] 仓位计算为0或不允许开仓")
+
 @timing_decorator
 def process_symbol(symbol):
     """处理单个交易标的 - 终极调试版（带详细分步日志）"""
@@ -775,7 +785,8 @@ def process_symbol(symbol):
         # 步骤1: 获取综合信号（最容易卡的地方）
         logging.info(f"[{symbol}] 步骤1/9 - 调用 check_enhanced_multi_signal 获取信号...")
         start_time = time.time()
-        result = check_enhanced_multi_signal(symbol)
+        from modules.signal_scoring import signal_board
+        result = signal_board.take_result(symbol) or check_enhanced_multi_signal(symbol)
         signal_cost = time.time() - start_time
         logging.info(f"[{symbol}] 信号获取完成，耗时 {signal_cost:.2f}s")
 
@@ -808,7 +819,8 @@ def process_symbol(symbol):
             should_rollover, rollover_reason = check_rollover_conditions(symbol, df)
             if should_rollover:
                 logging.info(f"[{symbol}] 触发滚仓 - 原因: {rollover_reason}")
-                execute_rollover(symbol, rollover_reason)
+                with open_position_lock:
+                    execute_rollover(symbol, rollover_reason)
                 return
 
             logging.info(f"[{symbol}] 步骤4/9 - 检查加仓条件...")
@@ -817,7 +829,8 @@ def process_symbol(symbol):
                 last_add_time = positions[symbol].get("last_add_time", 0)
                 if time.time() - last_add_time > 300:
                     logging.info(f"[{symbol}] 触发加仓 {add_contracts} 张")
-                    execute_position_addition(symbol, add_contracts, direction, current_price, signal_strength)
+                    with open_position_lock:
+                        execute_position_addition(symbol, add_contracts, direction, current_price, signal_strength)
                     return
 
         # 步骤5: 低余额或回撤保护
@@ -833,48 +846,16 @@ def process_symbol(symbol):
         if not signal_ok or direction == "neutral":
             logging.info(f"[{symbol}] 无有效开仓信号，结束处理")
             return
-
-        logging.info(f"[{symbol}] 步骤6/9 - 达到开仓信号！方向: {direction} 强度: {signal_strength:.3f}")
-
-        # 步骤7: 同币种占比检查
-        coin_total_value = get_coin_total_position_value(coin)
-        total_equity = get_total_equity()
-        if total_equity > 0 and coin_total_value / total_equity > 0.10:
-            logging.info(f"[{symbol}] {coin} 占比超10% ({coin_total_value/total_equity*100:.1f}%)，禁止开仓")
-            return
-
-        tradable_balance = get_tradable_balance()
-        if tradable_balance < 2:
-            logging.info(f"[{symbol}] 可交易余额不足2 USDT，禁止开仓")
+        if not signal_board.may_open(symbol):
+            logging.info(f"[{symbol}] 信号强度未进入本轮前{SIGNAL_RANKING_CONFIG['top_n']}名，暂不开仓")
             return
 
-        # 步骤8: 计算最优入场价
-        logging.info(f"[{symbol}] 步骤8/9 - 计算最优入场价...")
-        entry_price = get_optimal_entry_price(symbol, current_price, signal_strength, direction, df)
-        if entry_price is None:
-            logging.warning(f"[{symbol}] 获取最优入场价失败")
-            return
+        logging.info(f"[{symbol}] 步骤6/9 - 达到开仓信号！方向: {direction} 强度: {signal_strength:.3f}")
 
-        # 步骤9: 计算仓位并执行
-        logging.info(f"[{symbol}] 步骤9/9 - 计算仓位大小...")
-        position_size, base_leverage = calculate_position_size(symbol, entry_price, df, signal_strength, direction)
-
-        if position_size > 0 and can_open_new_position(symbol, position_size, entry_price, base_leverage):
-            logging.info(f"[{symbol}] 准备开仓 - 方向: {direction} | 张数: {position_size} | 价格: {entry_price:.6f} | 杠杆: {base_leverage}x")
-            success = execute_open_position(
-                symbol=symbol,
-                direction=direction,
-                size=position_size,
-                price=entry_price,
-                signal_strength=signal_strength,
-                base_leverage=base_leverage
-            )
-            if success:
-                logging.info(f"[{symbol}] 开仓成功！")
-            else:
-                logging.error(f"[{symbol}] 开仓失败")
-        else:
-            logging.info(f"[{symbol}] 仓位计算为0或不允许开仓")
+        # 步骤7-9 在全局开仓锁内执行：并发处理的标的依次读取余额、计算仓位并下单，
+        # 下单后 recalculate_asset_allocation 更新余额，下一个标的才会读到
+        with open_position_lock:
+            open_new_position(symbol, coin, df, current_price, signal_strength, direction)
 
     except Exception as e:
         logging.error(f"[{symbol}] process_symbol 整体异常: {e}", exc_info=True)
@@ -1431,8 +1412,8 @@ def check_all_exits():
     
     for symbol in symbols_to_check:
         try:
-            from modules.technical_analysis import get_kline_data
-            df = get_kline_data(symbol, "1H", 50)
+            from core.kline_store import kline_store
+            df = kline_store.get_klines(symbol, "1H", 50)
             
             if df is not None and not df.empty:
                 process_symbol(symbol)
@@ -0,0 +1,185 @@
+import math
+from collections import deque
+import numpy as np
+
+def decay_weights(n, half_life):
+    """按K线新旧的时间衰减权重，最新一根为 1"""
+    if not half_life:
+        return np.ones(n)
+    return 0.5 ** ((n - 1 - np.arange(n)) / float(half_life))
+
+def distribute(high, low, close, volume, origin, width, nbins, spread=True):
+    """
+    把每根K线的成交量分配到价格档位，返回长度 nbins 的数组
+
+    spread=True 时按K线高低区间与各档的重叠长度均匀分摊（高低相等的K线计入
+    收盘价所在档）；False 时全部计入收盘价所在档。
+    """
+    high, low, close, volume = (np.asarray(a, dtype=np.float64) for a in (high, low, close, volume))
+    point_index = np.clip(np.floor((close - origin) / width).astype(np.int64), 0, nbins - 1)
+    if not spread:
+        return np.bincount(point_index, weights=volume, minlength=nbins)
+
+    span = high - low
+    ranged = span > 0
+    edges = origin + width * np.arange(nbins + 1)
+    overlap = np.minimum(high[ranged, None], edges[None, 1:]) - np.maximum(low[ranged, None], edges[None, :-1])
+    hist = (np.clip(overlap, 0, None) * (volume[ranged] / span[ranged])[:, None]).sum(axis=0)
+    return hist + np.bincount(point_index[~ranged], weights=volume[~ranged], minlength=nbins)
+
+def compute_profile(high, low, close, volume, bins=24, bin_width=None, spread=True, half_life=None):
+    """
+    成交量分布
+
+    默认在 [最低价, 最高价] 之间等分 bins 档；给出 bin_width 时按固定价格步长
+    分档（档位边界为 bin_width 的整数倍，与 RollingVolumeProfile 一致）。
+    返回 (edges, hist)，区间无波动时返回 None。
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    if not len(high):
+        return None
+    if bin_width:
+        start = math.floor(low.min() / bin_width)
+        nbins = math.floor(high.max() / bin_width) - start + 1
+        origin, width = start * bin_width, bin_width
+    else:
+        lowest, highest = low.min(), high.max()
+        if highest <= lowest:
+            return None
+        origin, width, nbins = lowest, (highest - lowest) / bins, bins
+
+    weighted = np.asarray(volume, dtype=np.float64) * decay_weights(len(high), half_life)
+    hist = distribute(high, low, close, weighted, origin, width, nbins, spread)
+    return origin + width * np.arange(nbins + 1), hist
+
+def profile_levels(edges, hist, value_area=0.7):
+    """
+    控制点与价值区
+
+    POC 为成交量最大档的中心价；价值区从 POC 开始每次向成交量较大的一侧
+    扩展一档，直到覆盖 value_area 比例的成交量。
+    """
+    total = hist.sum()
+    if total <= 0:
+        return None
+    poc = int(np.argmax(hist))
+    lo = hi = poc
+    covered = hist[poc]
+    target = total * value_area
+    while covered < target and (lo > 0 or hi < len(hist) - 1):
+        below = hist[lo - 1] if lo > 0 else -1.0
+        above = hist[hi + 1] if hi < len(hist) - 1 else -1.0
+        if above >= below:
+            hi += 1
+            covered += above
+        else:
+            lo -= 1
+            covered += below
+    return {
+        "poc": (edges[poc] + edges[poc + 1]) / 2,
+        "val": edges[lo],
+        "vah": edges[hi + 1],
+        "poc_share": hist[poc] / total,
+        "value_area_share": covered / total,
+    }
+
+def volume_share(edges, hist, price, side="below"):
+    """中心价在 price 以下（below）或以上（above）各档的成交量占比"""
+    total = hist.sum()
+    if total <= 0:
+        return 0.0
+    centers = (edges[:-1] + edges[1:]) / 2
+    mask = centers <= price if side == "below" else centers >= price
+    return float(hist[mask].sum() / total)
+
+class RollingVolumeProfile:
+    """
+    增量成交量分布 - 固定价格步长分档，逐根K线更新
+
+    已确认K线的分布累加在 hist 中（每确认一根整体乘一次衰减系数），当前K线
+    作为实时值单独保存，反复修正不影响累计值；设置 window 时滑出窗口的K线
+    按其衰减后的量扣除。结果与对同一窗口调用 compute_profile(bin_width=...) 一致。
+    """
+
+    def __init__(self, bin_width, window=None, half_life=None, spread=True):
+        self.bin_width = float(bin_width)
+        self.window = window
+        self.spread = spread
+        self.decay = 0.5 ** (1.0 / half_life) if half_life else 1.0
+        self.hist = np.zeros(0)
+        self.base = 0              # hist[0] 对应的档位编号（价格 / bin_width 向下取整）
+        self.bars = deque()        # 已确认K线的 (起始档位, 分摊量)
+        self.live = None           # 当前K线 (time, 起始档位, 分摊量)
+        self.commits = 0
+
+    def _contribution(self, high, low, close, volume):
+        width = self.bin_width
+        if not self.spread or high <= low:
+            return math.floor(close / width), np.array([float(volume)])
+        start = math.floor(low / width)
+        edges = width * np.arange(start, math.floor(high / width) + 2)
+        overlap = np.clip(np.minimum(high, edges[1:]) - np.maximum(low, edges[:-1]), 0, None)
+        return start, overlap * (volume / (high - low))
+
+    def _ensure(self, start, stop):
+        if not len(self.hist):
+            self.base = start
+            self.hist = np.zeros(stop - start)
+            return
+        left = max(0, self.base - start)
+        right = max(0, stop - (self.base + len(self.hist)))
+        if left or right:
+            self.hist = np.pad(self.hist, (left, right))
+            self.base -= left
+
+    def _add(self, start, amounts, scale=1.0):
+        self._ensure(start, start + len(amounts))
+        offset = start - self.base
+        self.hist[offset:offset + len(amounts)] += amounts * scale
+
+    def update(self, time, high, low, close, volume):
+        """合并一根K线，返回 False 表示时间戳早于当前K线（需要重建）"""
+        if self.live is not None and time < self.live[0]:
+            return False
+        if self.live is not None and time > self.live[0]:
+            self._commit()
+        start, amounts = self._contribution(float(high), float(low), float(close), float(volume))
+        self._ensure(start, start + len(amounts))
+        self.live = (time, start, amounts)
+        return True
+
+    def _commit(self):
+        _, start, amounts = self.live
+        self.hist *= self.decay
+        self._add(start, amounts)
+        self.bars.append((start, amounts))
+        if self.window and len(self.bars) > self.window - 1:
+            old_start, old_amounts = self.bars.popleft()
+            self._add(old_start, old_amounts, -self.decay ** (self.window - 1))
+        self.commits += 1
+        if self.window and self.commits % self.window == 0:
+            self._resync()
+
+    def _resync(self):
+        """按窗口内K线精确重算一次，消除扣除累积的误差并收缩空档位"""
+        self.hist = np.zeros(0)
+        for age, (start, amounts) in enumerate(reversed(self.bars)):
+            self._add(start, amounts, self.decay ** age)
+        if self.live is not None:
+            self._ensure(self.live[1], self.live[1] + len(self.live[2]))
+
+    def profile(self):
+        """当前分布 (edges, hist)，包含实时K线"""
+        if self.live is None:
+            return None
+        hist = self.hist * self.decay
+        _, start, amounts = self.live
+        offset = start - self.base
+        hist[offset:offset + len(amounts)] += amounts
+        edges = self.bin_width * np.arange(self.base, self.base + len(hist) + 1)
+        return edges, np.clip(hist, 0, None)
+
+    def levels(self, value_area=0.7):
+        profile = self.profile()
+        return profile_levels(*profile, value_area) if profile is not None else None
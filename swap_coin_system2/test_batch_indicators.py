@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+测试横截面批量指标与逐个标的 pandas 计算一致
+"""
+import sys
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+import numpy as np
+import pandas as pd
+from core.feature_cache import feature_cache
+from modules.technical_analysis import calculate_indicators
+from modules.momentum_breakout import MomentumBreakoutStrategy
+from modules.batch_indicators import BatchIndicatorKernel
+
+def make_arrays(n, seed):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    close[30:45] = close[30]          # 横盘：RSI 出现 0/0
+    return {"time": np.arange(n, dtype=np.float64) * 3600000, "open": close,
+            "high": close + rng.random(n), "low": close - rng.random(n),
+            "close": close, "volume": rng.random(n) * 10}
+
+def to_frame(arrays):
+    df = pd.DataFrame({name: np.array(values) for name, values in arrays.items()})
+    df["time"] = df["time"].astype(np.int64)
+    return df
+
+def test_batch_matches_per_symbol():
+    """测试不同长度的标的批量计算后与单独计算一致"""
+    universe = {f"S{i}-USDT-SWAP": make_arrays(n, i) for i, n in enumerate([250, 250, 120, 60])}
+    kernel = BatchIndicatorKernel()
+    results = kernel.update(universe, "1H", 250)
+
+    for symbol, arrays in universe.items():
+        expected = calculate_indicators(to_frame(arrays)).iloc[-1]
+        latest = kernel.get_latest(symbol, "1H")
+        assert latest == results[(symbol, "1H")]["latest"]
+        for name in ("rsi", "macd", "macd_signal", "atr"):
+            assert np.isclose(latest[name], expected[name], rtol=1e-10, atol=1e-12), (symbol, name)
+        df = to_frame(arrays)
+        close = df["close"]
+        assert latest["high_20"] == arrays["high"][-20:].max()
+        assert np.isclose(latest["close_std_20"], close.tail(20).std())
+        assert np.isclose(latest["volume_mean_5"], arrays["volume"][-5:].mean())
+        # 与 should_rollover 中的逐个标的波动率写法一致
+        assert np.isclose(latest["volatility_20"], df["close"].tail(20).std() / df["close"].tail(20).mean())
+        assert np.isclose(latest["volume_ratio_20"], df["volume"].iloc[-1] / df["volume"].tail(20).mean())
+
+def test_batch_matches_indicator_engine():
+    """测试批量 MACD / ATR 与增量指标引擎逐个标的维护的结果一致"""
+    from modules.indicator_engine import IndicatorEngine
+    universe = {f"E{i}-USDT-SWAP": make_arrays(250, 10 + i) for i in range(3)}
+    results = BatchIndicatorKernel().update(universe, "1H", 250)
+    engine = IndicatorEngine()
+    for symbol, arrays in universe.items():
+        latest = engine.attach(symbol, "1H", to_frame(arrays)).iloc[-1]
+        for name in ("macd", "macd_signal", "atr"):
+            assert np.isclose(results[(symbol, "1H")]["latest"][name], latest[name], rtol=1e-9, atol=1e-12), (symbol, name)
+
+def test_compute_reads_cached_buffers_only(monkeypatch):
+    """测试整组计算只读取已缓存的K线，不为未缓存的标的发起请求"""
+    from core.kline_store import KlineStore
+    import core.kline_store as ks
+    store = KlineStore(ttl=60)
+    store.archive = None
+    arrays = make_arrays(250, 3)
+    rows = np.column_stack([arrays[name] for name in ("time", "open", "high", "low", "close", "volume")])
+    monkeypatch.setattr(store, "_fetch", lambda *a, **k: rows)
+    store.get_buffer("BTC-USDT-SWAP", "1H", 250)
+    monkeypatch.setattr(store, "_fetch", lambda *a, **k: (_ for _ in ()).throw(AssertionError("不应请求")))
+    monkeypatch.setattr(ks, "kline_store", store)
+
+    kernel = BatchIndicatorKernel()
+    assert kernel.compute(["BTC-USDT-SWAP", "ETH-USDT-SWAP"], "1H", 250) == 1
+    assert ("BTC-USDT-SWAP", "1H") in kernel._results and ("ETH-USDT-SWAP", "1H") not in kernel._results
+
+def test_group_fetch_then_batch_primes_signal_phase(monkeypatch):
+    """测试整组拉取后立即批量计算，信号阶段读取同一根K线时预填命中"""
+    from core.kline_store import KlineStore
+    import core.kline_store as ks
+    from modules.technical_analysis import INDICATOR_HISTORY_LIMIT, get_technical_signals
+    import modules.batch_indicators as bi
+    store = KlineStore(ttl=60)
+    store.archive = None
+    arrays = make_arrays(INDICATOR_HISTORY_LIMIT, 5)
+    rows = np.column_stack([arrays[name] for name in ("time", "open", "high", "low", "close", "volume")])
+    monkeypatch.setattr(store, "_fetch", lambda *a, **k: rows)
+    monkeypatch.setattr(ks, "kline_store", store)
+    kernel = BatchIndicatorKernel()
+    monkeypatch.setattr(bi, "batch_indicators", kernel)
+
+    store.get_buffer("SOL-USDT-SWAP", "1H", INDICATOR_HISTORY_LIMIT)
+    assert kernel.compute(["SOL-USDT-SWAP"], "1H") == 1
+    fetches = store.stats["fetches"]
+    get_technical_signals("SOL-USDT-SWAP")
+    assert store.stats["fetches"] == fetches
+    assert kernel.stats["primed"] == 1
+
+def test_prime_feature_cache():
+    """测试预填后分析器直接命中，K线变化后不预填"""
+    arrays = make_arrays(250, 7)
+    kernel = BatchIndicatorKernel()
+    kernel.update({"ETH-USDT-SWAP": arrays}, "1H", 250)
+
+    df = feature_cache.tag(to_frame(arrays).tail(100).reset_index(drop=True), "ETH-USDT-SWAP", "1H")
+    assert kernel.prime(df)
+    hits = feature_cache.stats["hits"]
+    rsi = MomentumBreakoutStrategy().calculate_rsi(df)
+    expected = calculate_indicators(to_frame(arrays).tail(100).reset_index(drop=True))["rsi"]
+    assert feature_cache.stats["hits"] == hits + 1
+    assert np.array_equal(np.isnan(rsi.to_numpy()), np.isnan(expected.to_numpy()))
+    assert np.allclose(rsi.dropna(), expected.dropna(), rtol=1e-10)
+    assert feature_cache.tail_stat(df, "low", 20, "min") == df["low"].tail(20).min()
+
+    revised = df.copy()
+    revised.loc[len(df) - 1, "close"] += 1
+    assert not kernel.prime(feature_cache.tag(revised, "ETH-USDT-SWAP", "1H"))
+
+if __name__ == "__main__":
+    test_batch_matches_per_symbol()
+    test_batch_matches_indicator_engine()
+    test_prime_feature_cache()
+    print("✅ 批量指标测试通过")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+测试向量化K线形态扫描与逐行判定一致
+"""
+import sys
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+import numpy as np
+import pandas as pd
+from modules.candle_patterns import scan_patterns, pattern_statistics, PATTERN_NAMES
+from modules.fibonacci_support import FibonacciSupportAnalyzer
+
+def make_candles(n=400, seed=2):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    open_ = close + rng.normal(0, 0.8, n)
+    open_[::17] = close[::17]          # 十字星 / 无实体
+    high = np.maximum(open_, close) + rng.random(n) * rng.choice([0, 1], n)
+    low = np.minimum(open_, close) - rng.random(n) * 2
+    return pd.DataFrame({"open": open_, "high": high, "low": low, "close": close, "volume": rng.random(n)})
+
+def row_bullish_engulfing(cur, prev):
+    return (cur["close"] > cur["open"] and prev["close"] < prev["open"] and
+            cur["open"] < prev["close"] and cur["close"] > prev["open"])
+
+def row_bearish_engulfing(cur, prev):
+    return (cur["close"] < cur["open"] and prev["close"] > prev["open"] and
+            cur["open"] > prev["close"] and cur["close"] < prev["open"])
+
+def row_hammer(cur):
+    body = abs(cur["close"] - cur["open"])
+    lower = min(cur["open"], cur["close"]) - cur["low"]
+    upper = cur["high"] - max(cur["open"], cur["close"])
+    return lower >= 2 * body and upper <= body * 0.5
+
+def test_scan_matches_row_rules():
+    """测试整段历史的吞没 / 锤子线与原逐行规则一致，且最新K线接口不变"""
+    df = make_candles()
+    patterns = scan_patterns(df["open"], df["high"], df["low"], df["close"])
+    assert set(patterns) == set(PATTERN_NAMES)
+    rows = df.to_dict("records")
+    for i, cur in enumerate(rows):
+        prev = rows[i - 1] if i else None
+        assert patterns["bullish_engulfing"][i] == (prev is not None and row_bullish_engulfing(cur, prev)), i
+        assert patterns["bearish_engulfing"][i] == (prev is not None and row_bearish_engulfing(cur, prev)), i
+        assert patterns["hammer"][i] == row_hammer(cur), i
+    assert patterns["hammer"].any() and patterns["bullish_engulfing"].any()
+
+    analyzer = FibonacciSupportAnalyzer()
+    for end in (1, 2, 50, 137, len(df)):
+        frame = df.iloc[:end]
+        assert analyzer.detect_hammer(frame) == row_hammer(rows[end - 1])
+        assert analyzer.detect_hanging_man(frame) == row_hammer(rows[end - 1])
+        expected = end >= 2 and row_bearish_engulfing(rows[end - 1], rows[end - 2])
+        assert analyzer.detect_bearish_engulfing(frame) == expected
+
+def test_multi_bar_patterns_and_statistics():
+    """测试三根K线形态和历史统计"""
+    df = pd.DataFrame({
+        "open":  [10.0, 10.8, 11.8, 13.0, 10.0, 8.6, 8.5],
+        "close": [11.0, 12.0, 13.0, 10.0, 8.5, 8.55, 9.8],
+        "high":  [11.2, 12.2, 13.2, 13.1, 10.1, 8.7, 9.9],
+        "low":   [9.9, 10.9, 11.9, 9.9, 8.4, 8.4, 8.4],
+    })
+    patterns = scan_patterns(df["open"], df["high"], df["low"], df["close"])
+    assert patterns["three_white_soldiers"].tolist() == [False, False, True, False, False, False, False]
+    assert patterns["morning_star"][6]
+
+    stats = pattern_statistics(make_candles(), horizon=5)
+    assert list(stats.index) == PATTERN_NAMES
+    assert (stats["count"] >= 0).all()
+
+if __name__ == "__main__":
+    test_scan_matches_row_rules()
+    test_multi_bar_patterns_and_statistics()
+    print("✅ K线形态测试通过")
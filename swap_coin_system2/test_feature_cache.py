@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+测试特征缓存：同一根K线命中、新K线/切片重算
+"""
+import sys
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+import numpy as np
+import pandas as pd
+from core.feature_cache import FeatureCache
+from modules.momentum_breakout import MomentumBreakoutStrategy
+
+def make_klines(n=100, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    return pd.DataFrame({"time": np.arange(n, dtype=np.int64) * 3600000, "open": close,
+                         "high": close + rng.random(n), "low": close - rng.random(n),
+                         "close": close, "volume": rng.random(n) * 10})
+
+def test_feature_cache_hits():
+    """测试标记后的 DataFrame 重复读取只计算一次，结果与直接计算一致"""
+    cache = FeatureCache()
+    df = cache.tag(make_klines(), "BTC-USDT-SWAP", "1H")
+
+    rsi = cache.rsi(df)
+    expected = MomentumBreakoutStrategy().calculate_rsi(make_klines())
+    assert np.allclose(rsi.to_numpy()[14:], expected.to_numpy()[14:])
+    assert cache.rsi(df) is rsi
+    assert cache.tail_stat(df, "high", 20, "max") == df["high"].tail(20).max()
+    assert cache.tail_stat(df, "high", 20, "max") == df["high"].tail(20).max()
+    assert cache.stats["hits"] == 2 and cache.stats["misses"] == 2
+
+def test_feature_cache_recompute():
+    """测试实时K线修正、切片和未标记的 DataFrame 不会读到旧值"""
+    cache = FeatureCache()
+    df = cache.tag(make_klines(), "BTC-USDT-SWAP", "1H")
+    first = cache.tail_stat(df, "close", 20, "mean")
+
+    revised = df.copy()
+    revised.loc[len(df) - 1, "close"] += 10
+    cache.tag(revised, "BTC-USDT-SWAP", "1H")
+    assert np.isclose(cache.tail_stat(revised, "close", 20, "mean"), first + 0.5)
+
+    head = df.head(50)   # 切片继承 attrs，但行数不符，不走缓存
+    assert cache.tail_stat(head, "close", 20, "mean") == head["close"].tail(20).mean()
+    cache.tail_stat(make_klines(), "close", 20, "mean")
+    assert cache.stats["uncached"] == 2
+
+if __name__ == "__main__":
+    test_feature_cache_hits()
+    test_feature_cache_recompute()
+    print("✅ 特征缓存测试通过")
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+测试资金费率存储：批量刷新、按结算时间刷新、历史持久化与统计
+"""
+import sys
+import time
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+import numpy as np
+import core.api_client
+from core.funding_store import FundingStore, funding_statistics
+
+HOUR_MS = 3600 * 1000
+
+class FakePublicAPI:
+    def __init__(self, funding_time, rates):
+        self.funding_time = funding_time
+        self.rates = rates
+        self.calls = []
+        self.history_calls = 0
+
+    def get_funding_rate(self, instId):
+        self.calls.append(instId)
+        symbols = list(self.rates) if instId == "ANY" else [instId]
+        return {"code": "0", "data": [
+            {"instId": s, "fundingRate": str(self.rates[s]), "premium": "0",
+             "fundingTime": str(self.funding_time), "nextFundingTime": str(self.funding_time + 8 * HOUR_MS)}
+            for s in symbols]}
+
+    def funding_rate_history(self, instId, limit="100"):
+        self.history_calls += 1
+        return {"code": "0", "data": [
+            {"instId": instId, "fundingTime": str(self.funding_time - (i + 1) * 8 * HOUR_MS),
+             "realizedRate": str(0.0001 * (1 + i % 3))}
+            for i in range(int(limit))]}
+
+def test_bulk_refresh_and_settlement(monkeypatch, tmp_path):
+    """测试一次批量请求服务所有标的，结算后才再次刷新"""
+    now_ms = int(time.time() * 1000)
+    api = FakePublicAPI(now_ms + HOUR_MS, {"BTC-USDT-SWAP": 0.0001, "ETH-USDT-SWAP": -0.0008})
+    monkeypatch.setattr(core.api_client, "public_data_api", api)
+    store = FundingStore({"path": str(tmp_path)})
+
+    store.refresh(["BTC-USDT-SWAP", "ETH-USDT-SWAP"])
+    for _ in range(10):
+        assert store.get_current("ETH-USDT-SWAP")["funding_rate"] == -0.0008
+        assert store.get_current("BTC-USDT-SWAP")["funding_rate"] == 0.0001
+    assert api.calls == ["ANY"]
+
+    # 上次刷新在结算之前，结算已过 settle_grace：下一次读取刷新全部到期标的
+    api.funding_time = now_ms - 60 * 1000
+    for symbol in ("BTC-USDT-SWAP", "ETH-USDT-SWAP"):
+        store.current[symbol]["funding_time"] = api.funding_time
+        store._refreshed[symbol] = time.time() - 120
+    store.get_current("BTC-USDT-SWAP")
+    assert api.calls == ["ANY", "ANY"]
+    assert store.next_refresh("BTC-USDT-SWAP") > time.time()
+
+def test_refresh_fetches_outside_lock(monkeypatch, tmp_path):
+    """测试批量请求进行中不占锁，同时到来的刷新不重复请求同一批标的"""
+    import threading
+    now_ms = int(time.time() * 1000)
+    api = FakePublicAPI(now_ms + HOUR_MS, {"BTC-USDT-SWAP": 0.0001, "ETH-USDT-SWAP": -0.0008})
+    entered, release = threading.Event(), threading.Event()
+    request = api.get_funding_rate
+
+    def slow_request(instId):
+        entered.set()
+        release.wait(2)
+        return request(instId)
+
+    api.get_funding_rate = slow_request
+    monkeypatch.setattr(core.api_client, "public_data_api", api)
+    store = FundingStore({"path": str(tmp_path)})
+
+    worker = threading.Thread(target=store.refresh, args=(["BTC-USDT-SWAP", "ETH-USDT-SWAP"],))
+    worker.start()
+    assert entered.wait(2)
+    assert store._lock.acquire(timeout=0.5)
+    store._lock.release()
+    assert store.refresh(["BTC-USDT-SWAP", "ETH-USDT-SWAP"]) == 0
+    release.set()
+    worker.join(2)
+    assert api.calls == ["ANY"] and not store._current_fetching
+    assert store.get_current("ETH-USDT-SWAP")["funding_rate"] == -0.0008
+
+def test_history_persisted(monkeypatch, tmp_path):
+    """测试历史费率只在有新结算时请求，写入本地后重启直接读取"""
+    api = FakePublicAPI(int(time.time() * 1000) + HOUR_MS, {"SOL-USDT-SWAP": 0.0006})
+    monkeypatch.setattr(core.api_client, "public_data_api", api)
+    store = FundingStore({"path": str(tmp_path), "history_limit": 30})
+
+    store.get_current("SOL-USDT-SWAP")
+    history = store.get_history("SOL-USDT-SWAP")
+    assert len(history) == 30 and np.all(np.diff(history[:, 0]) > 0)
+    assert history[-1, 0] == api.funding_time - 8 * HOUR_MS
+    store.get_history("SOL-USDT-SWAP")
+    assert api.history_calls == 1
+
+    restarted = FundingStore({"path": str(tmp_path)})
+    restarted.get_current("SOL-USDT-SWAP")
+    assert np.array_equal(restarted.get_history("SOL-USDT-SWAP"), history)
+    assert api.history_calls == 1
+
+    stats = restarted.get_statistics("SOL-USDT-SWAP")
+    expected = funding_statistics(history[:, 1], 0.0006)
+    assert stats == expected and stats["count"] == 30
+    assert stats["zscore"] > 2 and stats["percentile"] == 1.0
+
+def test_history_retried_after_failure(monkeypatch, tmp_path):
+    """测试历史请求失败后不标记为已补齐，重试间隔后再次请求，请求期间不持有锁"""
+    api = FakePublicAPI(int(time.time() * 1000) + HOUR_MS, {"ADA-USDT-SWAP": 0.0001})
+    monkeypatch.setattr(core.api_client, "public_data_api", api)
+    store = FundingStore({"path": str(tmp_path), "history_limit": 30, "history_retry": 60})
+    store.get_current("ADA-USDT-SWAP")
+
+    succeed = api.funding_rate_history
+    def failing(instId, limit="100"):
+        api.history_calls += 1
+        assert store._lock.acquire(blocking=False)
+        store._lock.release()
+        return {"code": "50011", "msg": "Too Many Requests"}
+
+    api.funding_rate_history = failing
+    assert len(store.get_history("ADA-USDT-SWAP")) == 0
+    assert len(store.get_history("ADA-USDT-SWAP")) == 0
+    assert api.history_calls == 1 and "ADA-USDT-SWAP" not in store._history_checked
+
+    api.funding_rate_history = succeed
+    store._history_retry_at["ADA-USDT-SWAP"] = time.time() - 1
+    assert len(store.get_history("ADA-USDT-SWAP")) == 30
+    assert api.history_calls == 2
+
+def test_relative_funding_signal(monkeypatch, tmp_path):
+    """测试费率未超绝对阈值但处于历史极端时给出弱信号"""
+    import core.funding_store as fs
+    from modules.funding_rate_analysis import FundingRateAnalyzer
+
+    api = FakePublicAPI(int(time.time() * 1000) + HOUR_MS, {"DOGE-USDT-SWAP": 0.0004})
+    monkeypatch.setattr(core.api_client, "public_data_api", api)
+    monkeypatch.setattr(fs, "funding_store", FundingStore({"path": str(tmp_path), "history_limit": 60}))
+
+    signal, confidence = FundingRateAnalyzer().analyze_funding_rate_signal("DOGE-USDT-SWAP")
+    assert signal == -1 and 0 < confidence <= 0.5
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+测试增量指标引擎与 calculate_indicators 结果一致
+"""
+import sys
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+import numpy as np
+import pandas as pd
+from modules.technical_analysis import calculate_indicators
+from modules.indicator_engine import IndicatorEngine, INDICATOR_COLUMNS
+
+def make_klines(n=400, seed=1):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    close[50:70] = close[50]          # 横盘：RSI 出现 0/0
+    volume = rng.random(n) * 10
+    volume[100:110] = 0
+    return pd.DataFrame({"time": np.arange(n, dtype=np.int64) * 3600000, "open": close,
+                         "high": close + rng.random(n), "low": close - rng.random(n),
+                         "close": close, "volume": volume})
+
+def assert_same(result, expected):
+    for name in INDICATOR_COLUMNS:
+        a, b = result[name].to_numpy(), expected[name].to_numpy()
+        assert np.array_equal(np.isnan(a), np.isnan(b)), name
+        mask = ~np.isnan(b)
+        assert np.allclose(a[mask], b[mask], rtol=1e-12, atol=1e-12), name
+
+def test_incremental_matches_pandas():
+    """测试逐根追加、实时K线修正后与全量计算一致"""
+    df = make_klines()
+    engine = IndicatorEngine()
+    for end in range(20, len(df) + 1):
+        frame = df.iloc[:end].reset_index(drop=True)
+        revised = frame.copy()
+        revised.loc[end - 1, ["close", "high"]] += 0.5
+        engine.attach("BTC-USDT-SWAP", "1H", revised)
+        result = engine.attach("BTC-USDT-SWAP", "1H", frame)
+
+    assert_same(result, calculate_indicators(df.copy()))
+    # 只在首次回放全量，之后每次只处理实时K线及新K线
+    assert engine.stats["rebuilds"] == 1
+    assert engine.stats["bars"] < 3 * len(df)
+    # 原 DataFrame 不被修改
+    assert "rsi" not in df.columns
+
+    print("✅ 增量指标一致性测试通过!")
+
+def test_sliding_window_matches_pandas():
+    """测试滑动窗口（最早一根移出）时 EMA 按新窗口重新起算，与 pandas 在同一窗口上完全一致"""
+    df = make_klines(400, seed=3)
+    engine = IndicatorEngine()
+    for end in range(250, len(df) + 1):
+        frame = df.iloc[end - 250:end].reset_index(drop=True)
+        revised = frame.copy()
+        revised.loc[len(frame) - 1, ["close", "low"]] -= 0.5
+        engine.attach("SOL-USDT-SWAP", "1H", revised)
+        result = engine.attach("SOL-USDT-SWAP", "1H", frame)
+        if end % 50 == 0:
+            expected = calculate_indicators(frame.copy())
+            assert_same(result, expected)
+            assert np.array_equal(result["macd"].to_numpy(), expected["macd"].to_numpy())
+            assert np.array_equal(result["macd_signal"].to_numpy(), expected["macd_signal"].to_numpy())
+    # 每根新K线重新回放一次，实时K线修正不回放
+    assert engine.stats["rebuilds"] == len(df) - 250 + 1
+
+    print("✅ 滑动窗口一致性测试通过!")
+
+def test_engine_rebuilds_on_gap():
+    """测试数据断档时重新回放"""
+    df = make_klines(300, seed=2)
+    engine = IndicatorEngine()
+    engine.attach("ETH-USDT-SWAP", "1H", df.iloc[:100].reset_index(drop=True))
+    result = engine.attach("ETH-USDT-SWAP", "1H", df.iloc[150:].reset_index(drop=True))
+    assert engine.stats["rebuilds"] == 2
+    assert_same(result, calculate_indicators(df.iloc[150:].reset_index(drop=True)))
+
+    print("✅ 断档重建测试通过!")
+
+if __name__ == "__main__":
+    test_incremental_matches_pandas()
+    test_sliding_window_matches_pandas()
+    test_engine_rebuilds_on_gap()
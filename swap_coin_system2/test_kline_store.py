@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+测试共享K线存储
+"""
+import sys
+import time
+import tempfile
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+import numpy as np
+from core.kline_store import KlineStore
+from core.ohlcv_buffer import OHLCVRingBuffer
+from core.candle_archive import CandleArchive
+from core.candle_backfill import CandleBackfill
+
+HOUR_MS = 3600000
+
+class FakeKlineStore(KlineStore):
+    """用本地数据替代REST请求，记录请求参数"""
+
+    def __init__(self, archive=None, **kwargs):
+        super().__init__(**kwargs)
+        # 默认不读写磁盘归档
+        self.archive = archive
+        self.requests = []
+        last_ts = int(time.time() * 1000) // HOUR_MS * HOUR_MS
+        self.rows = [[last_ts - (299 - i) * HOUR_MS, 1.0 + i, 2.0 + i, 0.5 + i, 1.5 + i, 10.0 * i]
+                     for i in range(300)]
+
+    def _fetch(self, symbol, timeframe, limit, before=""):
+        self.stats["incremental_fetches" if before else "fetches"] += 1
+        self.requests.append((symbol, timeframe, limit, before))
+        rows = [r for r in self.rows if not before or r[0] > before][-limit:]
+        return np.array(rows, dtype=np.float64).reshape(-1, 6)
+
+def test_kline_store():
+    """测试超集请求与切片复用"""
+    store = FakeKlineStore(ttl=60, base_limit=100, max_limit=300, incremental=False)
+
+    df100 = store.get_klines("BTC-USDT-SWAP", "1H", 100)
+    df50 = store.get_klines("BTC-USDT-SWAP", "1h", 50)
+    assert len(df100) == 100 and len(df50) == 50
+    assert store.requests == [("BTC-USDT-SWAP", "1H", 100, "")]
+    # 切片取的是最近的K线
+    assert df50["time"].iloc[-1] == df100["time"].iloc[-1]
+
+    # 调用方追加指标列不影响共享数据
+    df50["rsi"] = 50.0
+    assert "rsi" not in store.get_klines("BTC-USDT-SWAP", "1H", 50).columns
+
+    # 更大的需求触发一次扩容请求
+    assert len(store.get_klines("BTC-USDT-SWAP", "1H", 200)) == 200
+    assert store.requests[-1] == ("BTC-USDT-SWAP", "1H", 200, "")
+    assert store.get_stats()["fetches"] == 2
+
+    # 过期后重新请求，沿用历史最大条数
+    store.ttl = 0
+    store.get_klines("BTC-USDT-SWAP", "1H", 10)
+    assert store.requests[-1] == ("BTC-USDT-SWAP", "1H", 200, "")
+
+    print("✅ 共享K线存储测试通过!")
+
+def test_kline_store_single_flight():
+    """测试同一标的并发未命中只请求一次，其余线程命中同一份缓冲"""
+    import threading
+    store = FakeKlineStore(ttl=60, base_limit=100, max_limit=300, incremental=False)
+    fetch = store._fetch
+
+    def slow_fetch(*args, **kwargs):
+        time.sleep(0.2)
+        return fetch(*args, **kwargs)
+
+    store._fetch = slow_fetch
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.get_buffer("BTC-USDT-SWAP", "1H", 100)))
+               for _ in range(5)]
+    threads.append(threading.Thread(target=lambda: results.append(store.get_buffer("ETH-USDT-SWAP", "1H", 100))))
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(r[0] for r in store.requests) == ["BTC-USDT-SWAP", "ETH-USDT-SWAP"]
+    assert len({id(buffer) for buffer in results}) == 2
+    # 不同标的互不等待
+    assert time.time() - started < 0.35
+
+    print("✅ K线并发请求合并测试通过!")
+
+def test_fetch_kline_array_backoff(monkeypatch):
+    """测试K线请求异常后按指数退避重试，成功后不再等待"""
+    import core.api_client
+    import utils.decorators
+    from modules.technical_analysis import fetch_kline_array
+
+    class FlakyMarketAPI:
+        calls = 0
+
+        def get_candlesticks(self, **kwargs):
+            self.calls += 1
+            if self.calls < 3:
+                raise ConnectionError("连接中断")
+            return {"code": "0", "data": [[str(HOUR_MS * i), "1", "2", "0.5", "1.5", "10"] for i in (2, 1)]}
+
+    sleeps = []
+    monkeypatch.setattr(utils.decorators.time, "sleep", sleeps.append)
+    monkeypatch.setattr(core.api_client, "market_api", FlakyMarketAPI())
+    rows = fetch_kline_array("BTC-USDT-SWAP", "1H", 2)
+    assert list(rows[:, 0]) == [HOUR_MS, 2 * HOUR_MS]
+    assert sleeps == [0.5, 1.0]
+
+    # 重试耗尽：最后一次失败后不再等待
+    sleeps.clear()
+    core.api_client.market_api.calls = -10
+    assert len(fetch_kline_array("BTC-USDT-SWAP", "1H", 2, max_retries=3)) == 0
+    assert sleeps == [0.5, 1.0]
+
+def test_kline_store_incremental():
+    """测试增量拉取覆盖未收盘K线并追加新K线"""
+    store = FakeKlineStore(ttl=0, base_limit=100, max_limit=300, incremental=True)
+    store.get_klines("ETH-USDT-SWAP", "1H", 100)
+
+    # 交易所侧：最后一根K线更新
+    store.rows[-1] = store.rows[-1][:4] + [999.0, 1.0]
+    df = store.get_klines("ETH-USDT-SWAP", "1H", 100)
+
+    last_request = store.requests[-1]
+    assert last_request[3] == store.rows[-1][0] - 1
+    assert len(df) == 100
+    assert df["close"].iloc[-1] == 999.0
+    assert df["time"].is_monotonic_increasing and df["time"].is_unique
+    assert store.get_stats()["incremental_fetches"] == 1
+
+    print("✅ 增量K线拉取测试通过!")
+
+def test_resampled_timeframes():
+    """测试 4H / 1D 由1H本地聚合，不额外请求，并随新K线增量更新"""
+    import pandas as pd
+    store = FakeKlineStore(ttl=60, base_limit=100, max_limit=300, incremental=False)
+
+    df4h = store.get_klines("BTC-USDT-SWAP", "4H", 50)
+    assert [r[1] for r in store.requests] == ["1H"]
+    hourly = pd.DataFrame(store.rows, columns=["time", "open", "high", "low", "close", "volume"])
+    hourly.index = pd.to_datetime(hourly["time"], unit="ms")
+    expected = hourly.resample("4h").agg({"open": "first", "high": "max", "low": "min",
+                                          "close": "last", "volume": "sum"}).tail(50)
+    assert len(df4h) == 50
+    assert np.allclose(df4h[["open", "high", "low", "close", "volume"]].to_numpy(), expected.to_numpy())
+    assert (df4h["time"].to_numpy() == expected.index.as_unit("ms").asi8).all()
+
+    # 日线按北京时间 0 点切分；需要的1H历史超过单次上限时退回直接请求
+    daily = store.get_klines("BTC-USDT-SWAP", "1D", 5)
+    assert len(daily) == 5 and ((daily["time"] + 8 * HOUR_MS) % (24 * HOUR_MS) == 0).all()
+    store.get_klines("BTC-USDT-SWAP", "4H", 100)
+    assert store.requests[-1][1] == "4H"
+
+    # 新的1H K线推送后，最后一根4H同步更新，不发请求
+    last = store.rows[-1]
+    row = [last[0] + HOUR_MS, 400.0, 900.0, 1.0, 450.0, 7.0]
+    assert store.apply_candle("BTC-USDT-SWAP", "1H", row)
+    requests = len(store.requests)
+    updated = store.get_klines("BTC-USDT-SWAP", "4H", 50)
+    assert len(store.requests) == requests
+    assert updated["close"].iloc[-1] == 450.0 and updated["high"].iloc[-1] == 900.0
+
+def test_resample_limits():
+    """测试基础缓冲按聚合上限扩容：归档预热足够时本地聚合日线，超出上限或历史不足时退回REST"""
+    with tempfile.TemporaryDirectory() as root:
+        store = FakeKlineStore(archive=CandleArchive(root), ttl=60, base_limit=100, max_limit=300)
+        assert store.capacity("1H") == 31 * 24 and store.capacity("4H") == store.buffer_capacity
+        last_ts = int(time.time() * 1000) // HOUR_MS * HOUR_MS
+        store.rows = [[last_ts - (799 - i) * HOUR_MS, 1.0, 2.0, 0.5, 1.5, 1.0] for i in range(800)]
+
+        # 没有归档时单次REST只有300根1H，日线20根需要504根，退回直接请求
+        store.get_klines("BTC-USDT-SWAP", "1D", 20)
+        assert [r[1] for r in store.requests] == ["1H", "1D"]
+        assert ("BTC-USDT-SWAP", "1D", "history") in store._resample_warned
+
+        # 归档回填后，重启预热出744根1H，日线30根本地聚合
+        store.archive.merge("ETH-USDT-SWAP", "1H", np.array(store.rows[:-1]))
+        restarted = FakeKlineStore(archive=CandleArchive(root), ttl=60, base_limit=100, max_limit=300)
+        restarted.rows = store.rows
+        daily = restarted.get_klines("ETH-USDT-SWAP", "1D", 30)
+        assert len(daily) == 30 and [r[1] for r in restarted.requests] == ["1H"]
+
+        # 超过本地聚合上限
+        restarted.get_klines("ETH-USDT-SWAP", "1D", 31)
+        assert restarted.requests[-1][1] == "1D"
+        assert ("ETH-USDT-SWAP", "1D", "limit") in restarted._resample_warned
+
+def test_candle_archive_warm_start():
+    """测试归档只保存已收盘K线，重启后从归档预热并只请求缺口"""
+    with tempfile.TemporaryDirectory() as root:
+        archive = CandleArchive(root)
+        store = FakeKlineStore(archive=archive, ttl=60, base_limit=100, max_limit=300)
+        store.get_klines("BTC-USDT-SWAP", "1H", 250)
+        # 最后一根未收盘，不写入归档
+        assert archive.count("BTC-USDT-SWAP", "1H") == 249
+        assert archive.last_time("BTC-USDT-SWAP", "1H") == store.rows[-2][0]
+
+        # 重复写入被忽略
+        assert archive.append("BTC-USDT-SWAP", "1H", store.rows[:249]) == 0
+        loaded = archive.load("BTC-USDT-SWAP", "1H", 10)
+        assert loaded.shape == (10, 6) and loaded[-1, 0] == store.rows[-2][0]
+        assert len(archive.load("BTC-USDT-SWAP", "1H", end_time=store.rows[150][0])) == 100
+
+        # 模拟重启：新实例从归档预热，只请求归档末尾之后的K线
+        restarted = FakeKlineStore(archive=CandleArchive(root), ttl=60, base_limit=100, max_limit=300)
+        df = restarted.get_klines("BTC-USDT-SWAP", "1H", 200)
+        assert restarted.requests == [("BTC-USDT-SWAP", "1H", 300, store.rows[-2][0] - 1)]
+        assert len(df) == 200 and df["time"].iloc[-1] == store.rows[-1][0]
+        assert np.allclose(df["close"].values, np.array(store.rows)[-200:, 4])
+
+        # 归档不足时退回全量请求
+        empty = FakeKlineStore(archive=CandleArchive(root), ttl=60, base_limit=100, max_limit=300)
+        empty.get_klines("ETH-USDT-SWAP", "1H", 100)
+        assert empty.requests == [("ETH-USDT-SWAP", "1H", 100, "")]
+
+    print("✅ K线归档预热测试通过!")
+
+def test_candle_archive_gap():
+    """测试停机过久时归档按缺口分段，读取和预热不跨过缺口"""
+    with tempfile.TemporaryDirectory() as root:
+        archive = CandleArchive(root)
+        store = FakeKlineStore(archive=archive, ttl=60, base_limit=100, max_limit=300)
+        rows = np.array(store.rows)
+        assert archive.append("BTC-USDT-SWAP", "1H", rows[:100], bar_ms=HOUR_MS) == 100
+
+        # 停机超过单次请求上限：全量请求拿到的K线与归档末尾不连续
+        assert archive.append("BTC-USDT-SWAP", "1H", rows[150:250], bar_ms=HOUR_MS) == 100
+        assert archive.count("BTC-USDT-SWAP", "1H") == 200
+        segment = archive.load("BTC-USDT-SWAP", "1H", 150, bar_ms=HOUR_MS)
+        assert len(segment) == 100 and segment[0, 0] == rows[150][0]
+        assert len(archive.load("BTC-USDT-SWAP", "1H", 150)) == 150
+
+        # 末尾连续的一段不足，重启后退回全量请求
+        restarted = FakeKlineStore(archive=CandleArchive(root), ttl=60, base_limit=150, max_limit=300)
+        assert len(restarted.get_klines("BTC-USDT-SWAP", "1H", 150)) == 150
+        assert restarted.requests == [("BTC-USDT-SWAP", "1H", 150, "")]
+
+class FakeBackfill(CandleBackfill):
+    """用本地K线模拟 history-candles 分页（倒序返回字符串）"""
+
+    def __init__(self, rows, **kwargs):
+        super().__init__(**kwargs)
+        self.rows = rows
+        self.afters = []
+
+    def _request_page(self, symbol, timeframe, after):
+        self.afters.append(after)
+        older = [r for r in self.rows if not after or r[0] < after][-self.config["page_limit"]:]
+        return {"code": "0", "data": [[str(v) for v in r] for r in reversed(older)]}
+
+def test_candle_backfill():
+    """测试历史回填分页、续传与上市首日判定"""
+    last_ts = int(time.time() * 1000) // HOUR_MS * HOUR_MS
+    rows = [[last_ts - (349 - i) * HOUR_MS, 1.0, 2.0, 0.5, 1.5, float(i)] for i in range(350)]
+    with tempfile.TemporaryDirectory() as root:
+        config = {"flush_pages": 1, "state_file": f"{root}/state.json"}
+
+        first = FakeBackfill(rows, archive=CandleArchive(root), config=config)
+        assert first.backfill("BTC-USDT-SWAP", "1h", max_bars=150) == 199
+        assert not first.is_complete("BTC-USDT-SWAP", "1H")
+
+        # 续传：从归档最早K线继续向前，直到返回空页
+        resumed = FakeBackfill(rows, archive=CandleArchive(root), config=config)
+        assert resumed.afters == [] and resumed.backfill("BTC-USDT-SWAP", "1H") == 150
+        assert resumed.afters[0] == rows[150][0] and resumed.is_complete("BTC-USDT-SWAP", "1H")
+
+        archived = CandleArchive(root).load("BTC-USDT-SWAP", "1H")
+        assert np.array_equal(archived, np.array(rows[:-1]))
+
+        # 已完成的标的不再请求
+        again = FakeBackfill(rows, archive=CandleArchive(root), config=config)
+        assert again.backfill("BTC-USDT-SWAP", "1H") == 0 and again.afters == []
+
+    print("✅ 历史K线回填测试通过!")
+
+def test_ohlcv_ring_buffer():
+    """测试环形缓冲的覆盖、追加、搬迁和只读视图"""
+    buffer = OHLCVRingBuffer(capacity=5)
+    buffer.extend([[t, 1, 2, 0.5, 1.5, 10] for t in range(4)])
+    views_before = buffer.column("close")
+
+    # 同时间戳覆盖最后一根，新时间戳追加，超过容量只保留最近5根
+    assert buffer.upsert([[3, 1, 2, 0.5, 9.0, 10], [4, 1, 2, 0.5, 1.5, 10], [5, 1, 2, 0.5, 1.5, 10]])
+    assert len(buffer) == 5
+    assert list(buffer.column("time")) == [1, 2, 3, 4, 5]
+    assert buffer.column("close", 3)[0] == 9.0
+
+    # 多次追加触发搬迁后，旧视图不被错位覆盖
+    for t in range(6, 20):
+        buffer.extend([[t, 1, 2, 0.5, float(t), 10]])
+    assert list(buffer.column("time")) == [15, 16, 17, 18, 19]
+    assert views_before[0] == 1.5
+
+    view = buffer.column("close")
+    try:
+        view[0] = 0
+        assert False, "视图应为只读"
+    except ValueError:
+        pass
+
+    # 覆盖未收盘K线：已发出的视图不变，也不会读到新旧混合的一行
+    held = buffer.arrays(2)
+    held_close = held["close"].copy()
+    assert buffer.upsert([[19, 1, 3.0, 0.5, 99.0, 20]])
+    assert list(held["close"]) == list(held_close) and held["high"][-1] == 2
+    assert buffer.column("close")[-1] == 99.0 and buffer.column("high")[-1] == 3.0
+    assert list(buffer.column("time")) == [15, 16, 17, 18, 19]
+
+    # 早于缓冲起点的数据无法合并
+    assert not buffer.upsert([[0, 1, 2, 0.5, 1.5, 10]])
+
+    df = buffer.to_dataframe(3)
+    assert list(df["time"]) == [17, 18, 19]
+    df["rsi"] = 1.0
+    assert "rsi" not in buffer.to_dataframe(3).columns
+
+    print("✅ 环形缓冲测试通过!")
+
+if __name__ == "__main__":
+    test_kline_store()
+    test_kline_store_single_flight()
+    test_kline_store_incremental()
+    test_resample_limits()
+    test_candle_archive_warm_start()
+    test_candle_archive_gap()
+    test_candle_backfill()
+    test_ohlcv_ring_buffer()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+测试全市场上下文：窗口内只取一次、失败沿用上次数据
+"""
+import sys
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+import numpy as np
+import modules.sentiment_analysis as sa
+from core.kline_store import kline_store
+from modules.market_context import MarketContext
+
+def patch_sources(monkeypatch, calls):
+    def fear_greed():
+        calls["fear_greed"] += 1
+        return [20, 22, 24]
+
+    monkeypatch.setattr(sa, "fetch_fear_greed_index", fear_greed)
+    monkeypatch.setattr(kline_store, "get_arrays",
+                        lambda symbol, tf, limit: {"close": np.linspace(100, 110, 10)})
+
+def test_snapshot_shared_within_window(monkeypatch):
+    """测试刷新窗口内所有读取共享同一快照，外部数据只请求一次"""
+    calls = {"fear_greed": 0}
+    patch_sources(monkeypatch, calls)
+    context = MarketContext({"ttl": 60})
+
+    snapshot = context.snapshot()
+    assert all(context.snapshot() is snapshot for _ in range(30))
+    assert calls == {"fear_greed": 1}
+    assert snapshot.fear_greed == (20, 22, 24)
+    start = 100 + 10 / 9 * 5          # 10 根K线中倒数第5根
+    assert np.isclose(snapshot.trends["BTC"], (110 - start) / start)
+
+    assert context.refresh(force=True) is not snapshot
+    assert calls["fear_greed"] == 2
+
+def test_failed_source_keeps_previous(monkeypatch):
+    """测试某项数据失败时沿用上一快照，其余照常更新"""
+    calls = {"fear_greed": 0}
+    patch_sources(monkeypatch, calls)
+    context = MarketContext({"ttl": 60})
+    first = context.refresh()
+
+    def broken():
+        raise RuntimeError("timeout")
+
+    monkeypatch.setattr(sa, "fetch_fear_greed_index", broken)
+    second = context.refresh(force=True)
+    assert second.fear_greed == first.fear_greed
+    assert second.time >= first.time
+    assert context.stats["errors"] == 1
+
+def test_sentiment_signals_use_snapshot(monkeypatch):
+    """测试情绪信号读取共享的恐惧贪婪指数，不再按币种请求"""
+    calls = {"fear_greed": 0}
+    patch_sources(monkeypatch, calls)
+    import modules.market_context as mc
+    monkeypatch.setattr(mc, "market_context", MarketContext({"ttl": 60}))
+    monkeypatch.setattr(sa, "calculate_coinbase_premium", lambda coin: 0.2)
+    monkeypatch.setattr(sa, "fetch_cryptopanic_sentiment", lambda coin: 0.5)
+
+    for coin in ("AAA", "BBB", "CCC"):
+        assert sa.get_sentiment_signals(coin)
+    assert calls["fear_greed"] == 1
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+测试 WebSocket 行情引擎（使用本地回放服务器，无需联网）
+"""
+import sys
+import json
+import time
+import socket
+import asyncio
+import tempfile
+import threading
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+import websockets
+from core.market_stream import MarketDataStream
+from ws_replay_server import ReplayServer, load_frames
+
+def make_frames(path):
+    frames = [
+        {"event": "subscribe", "arg": {"channel": "tickers", "instId": "BTC-USDT-SWAP"}},
+        {"arg": {"channel": "tickers", "instId": "BTC-USDT-SWAP"},
+         "data": [{"instId": "BTC-USDT-SWAP", "last": "65000.5", "bidPx": "65000.4", "askPx": "65000.6", "ts": "1700000000000"}]},
+        {"arg": {"channel": "books", "instId": "BTC-USDT-SWAP"}, "action": "snapshot",
+         "data": [{"bids": [["65000.4", "3", "0", "1"]], "asks": [["65000.6", "2", "0", "1"]], "ts": "1700000000000"}]},
+        {"arg": {"channel": "tickers", "instId": "ETH-USDT-SWAP"},
+         "data": [{"instId": "ETH-USDT-SWAP", "last": "3500", "bidPx": "3499.9", "askPx": "3500.1", "ts": "1700000000000"}]},
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        for frame in frames:
+            f.write(json.dumps(frame) + "\n")
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_replay_server(frames, port):
+    async def serve():
+        async with websockets.serve(ReplayServer(frames, interval=0.01, loop=True).handler, "127.0.0.1", port):
+            await asyncio.Future()
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_until_complete, args=(serve(),), daemon=True).start()
+    time.sleep(0.3)
+
+def test_handle_message():
+    """测试推送解析"""
+    stream = MarketDataStream({"enabled": False})
+    stream.handle_message(json.dumps({"arg": {"channel": "tickers", "instId": "SOL-USDT-SWAP"},
+                                      "data": [{"last": "150.1", "bidPx": "150", "askPx": "150.2", "ts": "1"}]}))
+    stream.handle_message("pong")
+    stream.handle_message("not json")
+    assert stream.get_last_price("SOL-USDT-SWAP") == 150.1
+    assert stream.get_last_price("BTC-USDT-SWAP") is None
+
+    stream.tickers["SOL-USDT-SWAP"]["received"] -= 3600
+    assert stream.get_last_price("SOL-USDT-SWAP") is None
+    print("✅ 推送解析测试通过!")
+
+def test_book_resync_scheduled_once(monkeypatch):
+    """测试盘口失效后只安排一次重新订阅，新快照到达前忽略增量"""
+    import core.market_stream as ms
+    from core.order_book import order_book_manager
+    scheduled = []
+
+    def fake_schedule(coro, loop):
+        scheduled.append(coro)
+        coro.close()
+
+    monkeypatch.setattr(ms.asyncio, "run_coroutine_threadsafe", fake_schedule)
+    stream = MarketDataStream({"enabled": False})
+    stream._loop = object()
+    symbol = "RESYNC-USDT-SWAP"
+
+    def push(action, seq, prev):
+        stream.handle_message(json.dumps({"arg": {"channel": "books", "instId": symbol}, "action": action,
+                                          "data": [{"bids": [["10", "1"]], "asks": [["11", "1"]],
+                                                    "seqId": seq, "prevSeqId": prev}]}))
+
+    push("snapshot", 1, -1)
+    for seq in range(5, 10):
+        push("update", seq, seq - 1)
+    assert len(scheduled) == 1 and symbol in stream.resyncing
+    assert order_book_manager.get_book(symbol, allow_rest=False) is None
+
+    # 新快照到达后恢复合并增量
+    push("snapshot", 20, -1)
+    push("update", 21, 20)
+    assert symbol not in stream.resyncing and len(scheduled) == 1
+    assert order_book_manager.get_book(symbol, allow_rest=False)["bids"] == [["10", "1"]]
+    order_book_manager.discard(symbol)
+
+def test_stream_with_replay_server():
+    """测试订阅、回放和状态更新"""
+    with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+        path = f.name
+    make_frames(path)
+    port = free_port()
+    start_replay_server(load_frames(path), port)
+
+    url = f"ws://127.0.0.1:{port}"
+    stream = MarketDataStream({"public_url": url, "business_url": url, "business_channels": [],
+                               "reconnect_delay": 0.1})
+    assert stream.start(["BTC-USDT-SWAP"])
+    try:
+        deadline = time.time() + 5
+        while time.time() < deadline and (stream.get_last_price("BTC-USDT-SWAP") is None
+                                          or stream.get_book("BTC-USDT-SWAP") is None):
+            time.sleep(0.05)
+        assert stream.get_last_price("BTC-USDT-SWAP") == 65000.5
+        assert stream.get_book("BTC-USDT-SWAP")["asks"][0][0] == "65000.6"
+        # 未订阅的标的不会被回放
+        assert stream.get_last_price("ETH-USDT-SWAP") is None
+    finally:
+        stream.stop()
+    print("✅ WebSocket 回放测试通过!")
+
+if __name__ == "__main__":
+    test_handle_message()
+    test_stream_with_replay_server()
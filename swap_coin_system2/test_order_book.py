@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+测试本地订单簿
+"""
+import sys
+import zlib
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+from core.order_book import OrderBook, OrderBookManager
+
+def okx_checksum(bids, asks):
+    parts = []
+    for i in range(max(len(bids), len(asks))):
+        if i < len(bids):
+            parts += bids[i][:2]
+        if i < len(asks):
+            parts += asks[i][:2]
+    value = zlib.crc32(":".join(parts).encode())
+    return value - (1 << 32) if value >= (1 << 31) else value
+
+SNAPSHOT = {
+    "bids": [["100.5", "2", "0", "1"], ["100.4", "5", "0", "2"], ["100.1", "1", "0", "1"]],
+    "asks": [["100.6", "1", "0", "1"], ["100.8", "4", "0", "3"]],
+    "seqId": 10, "ts": "1700000000000",
+}
+
+def test_order_book_updates():
+    """测试快照、增量合并、删除档位与查询"""
+    manager = OrderBookManager({"rest_fallback": False})
+    snapshot = dict(SNAPSHOT, checksum=okx_checksum(SNAPSHOT["bids"], SNAPSHOT["asks"]))
+    assert manager.apply("BTC-USDT-SWAP", "snapshot", snapshot)
+
+    # 删除 100.5 买单、新增 100.45 买单、更新 100.8 卖单
+    bids = [["100.45", "3"], ["100.4", "5"], ["100.1", "1"]]
+    asks = [["100.6", "1"], ["100.8", "6"]]
+    update = {"bids": [["100.5", "0", "0", "0"], ["100.45", "3", "0", "1"]], "asks": [["100.8", "6", "0", "2"]],
+              "prevSeqId": 10, "seqId": 11, "checksum": okx_checksum(bids, asks)}
+    assert manager.apply("BTC-USDT-SWAP", "update", update)
+
+    book = manager.get_order_book("BTC-USDT-SWAP")
+    assert book.best_bid == 100.45 and book.best_ask == 100.6
+    assert book.top(2)["bids"] == [["100.45", "3"], ["100.4", "5"]]
+    assert book.cumulative_depth("bids") == 9 and book.cumulative_depth("asks", levels=1) == 1
+    assert book.cumulative_depth("bids", within_pct=0.001) == 8
+    assert abs(book.imbalance() - (9 - 7) / 16) < 1e-12
+    assert manager.get_depth_data("BTC-USDT-SWAP")["asks"][1] == ["100.8", "6"]
+
+    print("✅ 订单簿增量合并测试通过!")
+
+def test_order_book_resync():
+    """测试校验和错误与序号缺口触发重新同步"""
+    manager = OrderBookManager({"rest_fallback": False})
+    assert manager.apply("ETH-USDT-SWAP", "snapshot", SNAPSHOT)
+
+    assert not manager.apply("ETH-USDT-SWAP", "update", {"bids": [], "asks": [], "prevSeqId": 12, "seqId": 13})
+    assert manager.get_book("ETH-USDT-SWAP") is None
+    # 失效后增量被忽略，直到收到新快照
+    assert not manager.apply("ETH-USDT-SWAP", "update", {"bids": [], "asks": [], "prevSeqId": 10, "seqId": 11})
+
+    assert manager.apply("ETH-USDT-SWAP", "snapshot", SNAPSHOT)
+    assert not manager.apply("ETH-USDT-SWAP", "update", {"bids": [["100.2", "1"]], "asks": [],
+                                                         "prevSeqId": 10, "seqId": 11, "checksum": 12345})
+    assert manager.get_stats()["resyncs"] == 2
+
+    # books5 等无 action 的推送按快照处理
+    assert manager.apply("SOL-USDT-SWAP", None, {"bids": [["150", "1"]], "asks": [["150.1", "2"]]})
+    assert OrderBook("X").checksum() == okx_checksum([], [])
+
+    print("✅ 订单簿重新同步测试通过!")
+
+def test_execution_pricing_bypasses_rest_cache():
+    """测试信号计算共享 REST 快照缓存，下单定价没有推送盘口时重新请求"""
+    class FakeManager(OrderBookManager):
+        def __init__(self):
+            super().__init__({"rest_fallback": True, "rest_ttl": 30})
+            self.requests = 0
+
+        def _fetch_rest(self, symbol):
+            self.requests += 1
+            book = OrderBook(symbol)
+            book.apply_snapshot({"bids": [[str(100 + self.requests), "1"]], "asks": [[str(101 + self.requests), "1"]]})
+            self._rest_books[symbol] = book
+            return book
+
+    manager = FakeManager()
+    assert manager.get_depth_data("BTC-USDT-SWAP")["bids"][0][0] == "101"
+    assert manager.get_depth_data("BTC-USDT-SWAP")["bids"][0][0] == "101"
+    assert manager.get_book("BTC-USDT-SWAP", 5, fresh=True)["bids"][0][0] == "102"
+    assert manager.requests == 2
+
+    # 推送盘口可用时直接使用，不请求 REST
+    manager.apply("BTC-USDT-SWAP", "snapshot", SNAPSHOT)
+    assert manager.get_book("BTC-USDT-SWAP", 5, fresh=True)["bids"][0][0] == "100.5"
+    assert manager.requests == 2
+
+if __name__ == "__main__":
+    test_order_book_updates()
+    test_order_book_resync()
+    test_execution_pricing_bypasses_rest_cache()
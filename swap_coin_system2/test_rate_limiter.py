@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+测试接口限流器
+"""
+import sys
+import time
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+from core.rate_limiter import RateLimiter, TokenBucket
+from utils.decorators import rate_limit
+
+def test_token_bucket():
+    """测试突发额度、匀速补充与限流暂停"""
+    bucket = TokenBucket(rate=10, capacity=5)
+    waits = [bucket.reserve() for _ in range(7)]
+    assert waits[:5] == [0.0] * 5
+    # 透支的令牌按到达顺序排队
+    assert 0.05 < waits[5] <= 0.1 and 0.15 < waits[6] <= 0.2
+
+    bucket = TokenBucket(rate=100, capacity=100)
+    bucket.block(0.3)
+    assert bucket.reserve() > 0.25
+
+    print("✅ 令牌桶测试通过!")
+
+def test_rate_limiter_groups():
+    """测试按路径分组、只在令牌耗尽时等待"""
+    limiter = RateLimiter({"groups": {"market": {"rate": 4, "per": 1}, "candles": {"rate": 40, "per": 2},
+                                      "trade": {"rate": 60, "per": 2}, "public": {"rate": 20, "per": 2}}})
+    assert limiter.group_for_path("/api/v5/market/candles?instId=BTC-USDT-SWAP") == "candles"
+    assert limiter.group_for_path("/api/v5/market/books") == "market"
+    assert limiter.group_for_path("/api/v5/trade/order") == "trade"
+    assert limiter.group_for_path("/api/v5/unknown/path") == "public"
+
+    start = time.time()
+    for _ in range(4):
+        limiter.acquire("market")
+    assert time.time() - start < 0.05
+    limiter.acquire("market")
+    assert time.time() - start >= 0.2
+    assert limiter.stats["market"]["waits"] == 1
+
+    limiter.throttle("trade", 0.2)
+    assert limiter.is_rate_limited({"code": "50011", "msg": "Too Many Requests"})
+    assert limiter.acquire("trade") > 0.15 and limiter.stats["trade"]["throttles"] == 1
+
+    print("✅ 分组限流测试通过!")
+
+def test_rate_limit_decorator():
+    """测试装饰器的令牌桶只创建一次"""
+    @rate_limit(2, 0.2)
+    def call():
+        return time.time()
+
+    times = [call() for _ in range(3)]
+    assert times[1] - times[0] < 0.05 and times[2] - times[0] >= 0.09
+
+    print("✅ 限流装饰器测试通过!")
+
+if __name__ == "__main__":
+    test_token_bucket()
+    test_rate_limiter_groups()
+    test_rate_limit_decorator()
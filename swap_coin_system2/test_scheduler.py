@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+测试截止时间调度器：固定频率不漂移、优先级、不重叠执行、超时统计
+"""
+import sys
+import time
+import threading
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+from core.scheduler import DeadlineScheduler, PRIORITY_CRITICAL, PRIORITY_LOW, FIXED_DELAY
+
+def test_fixed_rate_does_not_drift():
+    """测试慢任务不推迟其他任务，固定频率按计划时间推进"""
+    scheduler = DeadlineScheduler({"max_workers": 4})
+    runs = {"slow": [], "fast": []}
+    release = threading.Event()
+
+    scheduler.add_task("slow", lambda: runs["slow"].append(time.time()) or release.wait(2), 10)
+    scheduler.add_task("fast", lambda: runs["fast"].append(time.time()), 0.05)
+    start = time.time()
+    while time.time() - start < 0.5:
+        scheduler.run()
+        scheduler.wait()
+    release.set()
+    scheduler.shutdown(wait=True)
+
+    assert len(runs["slow"]) == 1
+    assert 8 <= len(runs["fast"]) <= 11, len(runs["fast"])
+    # 计划时间 = 首次时间 + k * interval，没有累积漂移
+    first = scheduler.tasks["fast"].next_run - 0.05 * len(runs["fast"])
+    assert abs(first - runs["fast"][0]) < 0.05
+
+def test_priority_and_overrun():
+    """测试同时到期时高优先级先提交，未结束的任务不重复执行并记录 overrun"""
+    scheduler = DeadlineScheduler({"max_workers": 1})
+    order = []
+    release = threading.Event()
+    scheduler.add_task("report", lambda: order.append("report"), 60, priority=PRIORITY_LOW)
+    scheduler.add_task("exits", lambda: order.append("exits") or release.wait(1), 60, priority=PRIORITY_CRITICAL)
+
+    now = time.time()
+    assert scheduler.run_pending(now) == 2
+    assert scheduler.run_pending(now + 60) == 0
+    assert scheduler.tasks["exits"].stats["overruns"] == 1
+    assert scheduler.tasks["exits"].next_run > now + 60
+    release.set()
+    scheduler.shutdown(wait=True)
+    assert order == ["exits", "report"]
+
+def test_timeout_and_fixed_delay():
+    """测试超时统计，固定延迟任务在结束后才安排下一次"""
+    scheduler = DeadlineScheduler({"max_workers": 2, "min_timeout": 0})
+    release = threading.Event()
+    scheduler.add_task("hung", lambda: release.wait(1), 60, timeout=0.05)
+    scheduler.add_task("cleanup", lambda: time.sleep(0.05), 0.1, mode=FIXED_DELAY)
+
+    start = time.time()
+    scheduler.run()
+    assert scheduler.next_deadline() <= time.time() + 0.05
+    time.sleep(0.1)
+    assert scheduler.check_timeouts() == 1
+    assert scheduler.check_timeouts() == 0
+    assert scheduler.tasks["hung"].stats["timeouts"] == 1
+
+    cleanup = scheduler.tasks["cleanup"]
+    assert cleanup.stats["runs"] == 1
+    assert cleanup.next_run >= start + 0.05 + 0.1
+    release.set()
+    scheduler.shutdown(wait=True)
+
+if __name__ == "__main__":
+    test_fixed_rate_does_not_drift()
+    test_priority_and_overrun()
+    test_timeout_and_fixed_delay()
+    print("✅ 调度器测试通过")
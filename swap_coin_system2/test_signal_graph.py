@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+测试信号数据流图：并发、共享输入、超时/异常取中性值
+"""
+import sys
+import time
+import threading
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+import numpy as np
+import pandas as pd
+from core.signal_graph import SignalGraph
+
+def test_independent_nodes_run_concurrently():
+    """测试无依赖节点并发，共享输入只执行一次，依赖按顺序满足"""
+    calls = {"klines": 0}
+    lock = threading.Lock()
+
+    def klines():
+        with lock:
+            calls["klines"] += 1
+        time.sleep(0.2)
+        return "bars"
+
+    def slow(value):
+        time.sleep(0.2)
+        return value
+
+    graph = SignalGraph()
+    graph.add("klines", klines)
+    graph.add("technical", lambda bars: bars + ":tech", deps=("klines",))
+    graph.add("chain", lambda bars: bars + ":chain", deps=("klines",))
+    graph.add("funding", lambda: slow(1))
+    graph.add("sentiment", lambda: slow(2))
+    graph.add("enhanced", lambda tech, funding: (tech, funding), deps=("technical", "funding"))
+
+    start = time.monotonic()
+    results = graph.run()
+    elapsed = time.monotonic() - start
+    assert calls["klines"] == 1
+    assert results["enhanced"] == ("bars:tech", 1)
+    assert results["chain"] == "bars:chain" and results["sentiment"] == 2
+    assert elapsed < 0.55, elapsed
+
+def test_timeout_and_error_fallback():
+    """测试超时和异常的组件取中性值，不影响其他组件"""
+    def fail():
+        raise RuntimeError("boom")
+
+    graph = SignalGraph()
+    graph.add("slow", lambda: time.sleep(1) or 1, timeout=0.1, fallback=(0, 0))
+    graph.add("broken", fail, fallback=False)
+    graph.add("ok", lambda: 5)
+    graph.add("after", lambda value: value, deps=("slow",))
+
+    start = time.monotonic()
+    results = graph.run()
+    assert time.monotonic() - start < 0.5
+    assert results == {"slow": (0, 0), "broken": False, "ok": 5, "after": (0, 0)}
+    assert SignalGraph.stats["timeouts"].get("slow", 0) >= 1
+    assert SignalGraph.stats["errors"].get("broken", 0) >= 1
+
+def test_timeout_counts_from_node_start(monkeypatch):
+    """测试线程池排队时间不计入节点超时"""
+    from concurrent.futures import ThreadPoolExecutor
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(SignalGraph, "_executor", executor)
+
+    graph = SignalGraph()
+    for i in range(4):
+        graph.add(f"n{i}", lambda i=i: time.sleep(0.3) or i, timeout=0.5, fallback=-1)
+    results = graph.run()
+    executor.shutdown(wait=True)
+    assert results == {"n0": 0, "n1": 1, "n2": 2, "n3": 3}
+
+def test_check_enhanced_multi_signal_uses_graph(monkeypatch):
+    """测试组合权重不变：各组件结果与原串行版本一样进入多空强度"""
+    import modules.trading_execution as te
+    from core.order_book import order_book_manager
+    from modules.enhanced_strategy import enhanced_strategy
+
+    df = pd.DataFrame({"close": np.linspace(1, 2, 30), "macd": 1.0, "macd_signal": 0.0, "rsi": 20.0})
+    monkeypatch.setattr(order_book_manager, "get_depth_data", lambda symbol: None)
+    monkeypatch.setattr(te, "get_technical_signals", lambda symbol: (True, df))
+    monkeypatch.setattr(te, "get_chain_signals", lambda coin: True)
+    monkeypatch.setattr(te, "get_sentiment_signals", lambda coin: False)
+    monkeypatch.setattr(te.funding_analyzer, "analyze_funding_rate_signal", lambda symbol: (1, 0.5))
+    monkeypatch.setattr(te.advanced_market_analyzer, "analyze_market_sentiment", lambda symbol: (0, 0))
+    monkeypatch.setattr(enhanced_strategy, "calculate_enhanced_score", lambda df, symbol, depth: (0.4, 0.5, 0.2))
+
+    signal_ok, result_df, strength, direction = te.check_enhanced_multi_signal("BTC-USDT-SWAP")
+    expected = 0.12 + 0.12 + 0.10 + 0.10 + 0.4 * 0.15 + 0.5 * 0.12 + 0.08 - 0.2 * 0.10 + 0.5 * 0.08
+    assert signal_ok and direction == "long" and result_df is df
+    assert np.isclose(strength, expected)
+
+if __name__ == "__main__":
+    test_independent_nodes_run_concurrently()
+    test_timeout_and_error_fallback()
+    print("✅ 信号数据流图测试通过")
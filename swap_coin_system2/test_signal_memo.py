@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+测试信号组件缓存：同一根K线复用，新K线 / 价格大幅波动 / 组件失败时重算
+"""
+import sys
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+import numpy as np
+import pandas as pd
+from core.signal_memo import SignalMemo
+
+def make_frame(last_time, last_close):
+    closes = np.r_[np.linspace(90, 100, 29), last_close]
+    times = np.r_[np.arange(29) * 3600000, last_time]
+    return pd.DataFrame({"time": times, "close": closes, "macd": 1.0, "macd_signal": 0.0, "rsi": 20.0})
+
+SIGNALS = {"chain": True, "sentiment": False, "funding": (1, 0.5), "market_sentiment": (0, 0),
+           "enhanced": (0.4, 0.5, 0.2), "technical": (True, None)}
+
+def test_signal_memo_rules():
+    """测试命中条件与失效原因"""
+    memo = SignalMemo({"enabled": True, "price_band": 0.01, "max_age": 300})
+    live = 29 * 3600000
+    assert memo.lookup("BTC-USDT-SWAP", make_frame(live, 100.0)) is None
+
+    memo.store("BTC-USDT-SWAP", make_frame(live, 100.0), SIGNALS)
+    reused = memo.lookup("BTC-USDT-SWAP", make_frame(live, 100.5))
+    assert reused["funding"] == (1, 0.5) and "technical" not in reused and "enhanced" not in reused
+
+    assert memo.lookup("BTC-USDT-SWAP", make_frame(live, 102.0)) is None
+    assert memo.lookup("BTC-USDT-SWAP", make_frame(live + 3600000, 100.0)) is None
+    assert memo.stats["price_move"] == 1 and memo.stats["new_bar"] == 1
+
+    # 有组件取了中性值：不缓存，且清掉旧结果
+    memo.store("BTC-USDT-SWAP", make_frame(live, 100.0), SIGNALS, fallbacks={"funding"})
+    assert memo.lookup("BTC-USDT-SWAP", make_frame(live, 100.0)) is None
+
+def test_check_enhanced_multi_signal_reuses_components(monkeypatch):
+    """测试同一根K线第二次复用慢速组件、照常重算盘口和增强评分，价格越过区间后全部重算"""
+    import modules.trading_execution as te
+    from core.order_book import order_book_manager
+    from core.signal_memo import signal_memo
+    from modules.enhanced_strategy import enhanced_strategy
+
+    calls = {"funding": 0, "technical": 0, "depth": 0, "enhanced": 0}
+    frame = {"df": make_frame(29 * 3600000, 100.0)}
+
+    def technical(symbol):
+        calls["technical"] += 1
+        return True, frame["df"]
+
+    def funding(symbol):
+        calls["funding"] += 1
+        return 1, 0.5
+
+    def depth(symbol):
+        calls["depth"] += 1
+
+    def enhanced(df, symbol, depth):
+        calls["enhanced"] += 1
+        return 0.4, 0.5, 0.2
+
+    signal_memo.invalidate()
+    monkeypatch.setattr(order_book_manager, "get_depth_data", depth)
+    monkeypatch.setattr(te, "get_technical_signals", technical)
+    monkeypatch.setattr(te, "get_chain_signals", lambda coin: True)
+    monkeypatch.setattr(te, "get_sentiment_signals", lambda coin: False)
+    monkeypatch.setattr(te.funding_analyzer, "analyze_funding_rate_signal", funding)
+    monkeypatch.setattr(te.advanced_market_analyzer, "analyze_market_sentiment", lambda symbol: (0, 0))
+    monkeypatch.setattr(enhanced_strategy, "calculate_enhanced_score", enhanced)
+
+    first = te.check_enhanced_multi_signal("ETH-USDT-SWAP")
+    second = te.check_enhanced_multi_signal("ETH-USDT-SWAP")
+    assert calls == {"funding": 1, "technical": 2, "depth": 2, "enhanced": 2}
+    assert first[2] == second[2] and first[3] == second[3]
+
+    frame["df"] = make_frame(29 * 3600000, 105.0)
+    te.check_enhanced_multi_signal("ETH-USDT-SWAP")
+    assert calls["funding"] == 2
+    signal_memo.invalidate()
+
+if __name__ == "__main__":
+    test_signal_memo_rules()
+    print("✅ 信号组件缓存测试通过")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+测试全标的信号打分：向量化结果与逐个计算一致、排名与开仓名额
+"""
+import sys
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+import numpy as np
+from modules.signal_scoring import FEATURES, COLUMN, score_features, SignalBoard
+
+def scalar_score(f, threshold, enable_short):
+    """原逐个标的的多空强度计算"""
+    long_strength = (f["macd_bullish"] * 0.12 + f["rsi_oversold"] * 0.12 + f["price_trend"] * 0.10 +
+                     (0.10 if f["technical_ok"] else 0) + max(0, f["enhanced_score"]) * 0.15 +
+                     f["support_strength"] * 0.12 + (0.08 if f["chain_ok"] else 0) +
+                     (0.08 if f["sentiment_ok"] else 0) - f["resistance_strength"] * 0.10)
+    short_strength = ((1 - f["macd_bullish"]) * 0.12 + f["rsi_overbought"] * 0.12 + (1 - f["price_trend"]) * 0.10 +
+                      (0.10 if not f["technical_ok"] else 0) + max(0, -f["enhanced_score"]) * 0.15 +
+                      (1 - f["support_strength"]) * 0.12 + (0.08 if not f["chain_ok"] else 0) +
+                      (0.08 if not f["sentiment_ok"] else 0) - f["support_strength"] * 0.10)
+    if f["funding_signal"] > 0:
+        long_strength += f["funding_confidence"] * 0.08
+    elif f["funding_signal"] < 0:
+        short_strength += f["funding_confidence"] * 0.08
+    if f["market_sentiment"] > 0:
+        long_strength += f["market_confidence"] * 0.08
+    elif f["market_sentiment"] < 0:
+        short_strength += f["market_confidence"] * 0.08
+    long_strength, short_strength = max(0, long_strength), max(0, short_strength)
+    if long_strength > short_strength and long_strength > threshold:
+        return 1, long_strength
+    if short_strength > long_strength and short_strength > threshold and enable_short:
+        return -1, short_strength
+    return 0, max(long_strength, short_strength)
+
+def random_features(rng, n):
+    matrix = np.zeros((n, len(FEATURES)))
+    for name in ("macd_bullish", "rsi_oversold", "rsi_overbought", "price_trend", "technical_ok", "chain_ok", "sentiment_ok"):
+        matrix[:, COLUMN[name]] = rng.integers(0, 2, n)
+    for name in ("support_strength", "resistance_strength", "funding_confidence", "market_confidence"):
+        matrix[:, COLUMN[name]] = rng.random(n)
+    matrix[:, COLUMN["enhanced_score"]] = rng.uniform(-1, 1, n)
+    matrix[:, COLUMN["funding_signal"]] = rng.integers(-1, 2, n)
+    matrix[:, COLUMN["market_sentiment"]] = rng.integers(-1, 2, n)
+    return matrix
+
+def test_vectorized_matches_scalar():
+    """测试一次打分与逐个计算的方向和强度完全一致"""
+    matrix = random_features(np.random.default_rng(3), 500)
+    for threshold, enable_short in ((0.25, True), (0.4, False)):
+        scores = score_features(matrix, threshold, enable_short)
+        for i, row in enumerate(matrix):
+            direction, strength = scalar_score(dict(zip(FEATURES, row)), threshold, enable_short)
+            assert scores["direction"][i] == direction, i
+            assert np.isclose(scores["strength"][i], strength), i
+            assert scores["signal_ok"][i] == (direction != 0)
+
+def test_rank_limits_new_positions():
+    """测试强信号优先、只有前N名可开仓，已持仓标的不占名额，未排名标的不受限"""
+    matrix = random_features(np.random.default_rng(5), 12)
+    symbols = [f"C{i}-USDT-SWAP" for i in range(12)]
+    board = SignalBoard({"enabled": True, "top_n": 2})
+    for symbol, row in zip(symbols, matrix):
+        board.record_features(symbol, row)
+        board.put_result(symbol, (True, None, 0.0, "long"))
+
+    scores = score_features(matrix)
+    strongest = sorted((i for i in range(12) if scores["signal_ok"][i]), key=lambda i: -scores["strength"][i])
+    assert len(strongest) > 3
+    held = {symbols[strongest[0]]}
+    ordered = board.rank(symbols, held=held)
+    assert ordered[:len(strongest)] == [symbols[i] for i in strongest]
+    assert sorted(ordered) == sorted(symbols)
+    allowed = [s for s in symbols if board.may_open(s)]
+    assert allowed == sorted([symbols[strongest[1]], symbols[strongest[2]]], key=symbols.index)
+    assert board.may_open("OTHER-USDT-SWAP")
+
+    assert board.take_result(symbols[0]) == (True, None, 0.0, "long")
+    assert board.take_result(symbols[0]) is None
+    board.finish(symbols)
+    assert board.take_result(symbols[1]) is None
+    assert all(board.may_open(s) for s in symbols)
+
+def test_rank_ignores_stale_features():
+    """测试上一轮的特征不参与本轮排名"""
+    matrix = random_features(np.random.default_rng(5), 12)
+    scores = score_features(matrix)
+    strong, weak = sorted((i for i in range(12) if scores["signal_ok"][i]), key=lambda i: -scores["strength"][i])[:2]
+    board = SignalBoard({"enabled": True, "top_n": 1})
+
+    # 上一轮 A 记录了强信号；本轮 A 的信号计算超时，只有 B 有结果
+    board.record_features("A-USDT-SWAP", matrix[strong])
+    board.put_result("A-USDT-SWAP", (True, None, 0.0, "long"))
+    board.rank(["A-USDT-SWAP"])
+    board.finish(["A-USDT-SWAP"])
+    board.record_features("B-USDT-SWAP", matrix[weak])
+    board.put_result("B-USDT-SWAP", (True, None, 0.0, "long"))
+    assert board.rank(["A-USDT-SWAP", "B-USDT-SWAP"]) == ["B-USDT-SWAP", "A-USDT-SWAP"]
+    assert board.may_open("B-USDT-SWAP") and not board.may_open("A-USDT-SWAP")
+
+    # 超时线程在本轮排名后才写入特征，下一轮也不会被使用
+    board.finish(["A-USDT-SWAP", "B-USDT-SWAP"])
+    board.record_features("A-USDT-SWAP", matrix[strong])
+    board.put_result("B-USDT-SWAP", (True, None, 0.0, "long"))
+    board.record_features("B-USDT-SWAP", matrix[weak])
+    board.rank(["A-USDT-SWAP", "B-USDT-SWAP"])
+    assert board.may_open("B-USDT-SWAP") and not board.may_open("A-USDT-SWAP")
+
+if __name__ == "__main__":
+    test_vectorized_matches_scalar()
+    test_rank_limits_new_positions()
+    test_rank_ignores_stale_features()
+    print("✅ 信号打分排名测试通过")
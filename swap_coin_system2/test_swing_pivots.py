@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+测试波段拐点索引：ZigZag 确认规则、增量与回放一致、斐波那契网格
+"""
+import sys
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+import numpy as np
+import pandas as pd
+from core.feature_cache import feature_cache
+from modules.swing_pivots import SwingPivotTracker, SwingPivotIndex
+from modules.fibonacci_support import FibonacciSupportAnalyzer
+
+def make_frame(closes):
+    closes = np.asarray(closes, dtype=np.float64)
+    return pd.DataFrame({"time": np.arange(len(closes), dtype=np.int64) * 3600000, "open": closes,
+                         "high": closes * 1.001, "low": closes * 0.999, "close": closes,
+                         "volume": np.ones(len(closes))})
+
+def test_zigzag_pivots():
+    """测试回撤超过阈值才确认拐点，网格取最近拐点和当前段极值"""
+    closes = list(np.linspace(100, 120, 21)) + [118, 116, 115] + list(np.linspace(114, 100, 8)) + [102, 105]
+    df = make_frame(closes)
+    tracker = SwingPivotTracker(deviation=0.03)
+    for row in df[["time", "high", "low"]].to_numpy(dtype=np.float64):
+        tracker.update(row)
+    tracker.update((df["time"].iloc[-1] + 3600000, 106.0, 104.0))
+
+    kinds = [p[2] for p in tracker.pivots]
+    assert kinds == ["low", "high", "low"]
+    assert np.isclose(tracker.pivots[1][1], 120 * 1.001)
+    assert np.isclose(tracker.pivots[2][1], 100 * 0.999)
+    # 上升段：波段高点为段内最高，低点为最近确认的低点
+    high, low = tracker.swing_range()
+    assert high == 106.0 and np.isclose(low, 100 * 0.999)
+
+def test_incremental_matches_replay():
+    """测试逐根追加、实时K线修正后与整段回放结果一致"""
+    rng = np.random.default_rng(4)
+    df = make_frame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, 400))))
+    index = SwingPivotIndex({"deviation": 0.02})
+    times, highs, lows = (df[c].to_numpy(dtype=np.float64) for c in ("time", "high", "low"))
+    for end in range(1, len(df) + 1):
+        revised = highs[:end].copy()
+        revised[-1] *= 1.05
+        index.sync("BTC-USDT-SWAP", "1H", times[:end], revised, lows[:end])
+        tracker = index.sync("BTC-USDT-SWAP", "1H", times[:end], highs[:end], lows[:end])
+        replay = SwingPivotTracker(0.02)
+        for row in zip(times[:end], highs[:end], lows[:end]):
+            replay.update(row)
+        assert tracker.swing_range() == replay.swing_range(), end
+        assert list(tracker.pivots) == list(replay.pivots), end
+    assert index.stats["rebuilds"] == 1
+    assert len(index.get_pivots("BTC-USDT-SWAP", "1H")) > 2
+
+def test_fibonacci_levels_from_pivots():
+    """测试斐波那契网格使用拐点，同一根K线多次调用只计算一次"""
+    rng = np.random.default_rng(8)
+    df = feature_cache.tag(make_frame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, 150)))), "ETH-USDT-SWAP", "1H")
+    analyzer = FibonacciSupportAnalyzer()
+    levels, swing_high, swing_low = analyzer.calculate_fibonacci_levels(df)
+    hits = feature_cache.stats["hits"]
+    assert analyzer.calculate_fibonacci_levels(df)[0] == levels
+    assert feature_cache.stats["hits"] == hits + 1
+    assert df["low"].min() <= swing_low < swing_high <= df["high"].max()
+    assert np.isclose(levels[0.5], (swing_high + swing_low) / 2)
+    assert analyzer.calculate_fibonacci_levels(df.head(50)) == (None, None, None)
+
+if __name__ == "__main__":
+    test_zigzag_pivots()
+    test_incremental_matches_replay()
+    test_fibonacci_levels_from_pivots()
+    print("✅ 波段拐点测试通过")
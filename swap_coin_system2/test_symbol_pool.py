@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+测试标的处理线程池：有界并发、单个标的超时隔离、同一标的不被两组同时处理
+"""
+import sys
+import time
+import threading
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+from core.symbol_pool import SymbolWorkerPool
+
+SYMBOLS = [f"C{i}-USDT-SWAP" for i in range(8)]
+
+def test_concurrent_and_bounded():
+    """测试并发执行且同时运行数不超过 max_workers"""
+    pool = SymbolWorkerPool({"max_workers": 4})
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    def work(symbol):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.1)
+        with lock:
+            active["now"] -= 1
+        return symbol.lower()
+
+    start = time.monotonic()
+    results = pool.map(SYMBOLS, work)
+    elapsed = time.monotonic() - start
+    pool.shutdown(wait=True)
+    assert results == {s: s.lower() for s in SYMBOLS}
+    assert active["peak"] == 4
+    assert elapsed < 0.35, elapsed
+
+def test_hung_symbol_isolated():
+    """测试卡住和异常的标的不影响同组其他标的"""
+    pool = SymbolWorkerPool({"max_workers": 4, "symbol_timeout": 0.2})
+    release = threading.Event()
+
+    def work(symbol):
+        if symbol == SYMBOLS[0]:
+            release.wait(2)
+        if symbol == SYMBOLS[1]:
+            raise RuntimeError("boom")
+        return True
+
+    start = time.monotonic()
+    results = pool.map(SYMBOLS, work)
+    assert time.monotonic() - start < 0.6
+    assert set(results) == set(SYMBOLS[2:])
+    assert pool.stats["timeouts"] == 1 and pool.stats["errors"] == 1
+
+    # 卡住的标的仍持有锁，下一轮直接跳过
+    assert pool.map(SYMBOLS[:1], work) == {SYMBOLS[0]: None}
+    assert pool.stats["busy"] == 1
+    release.set()
+    pool.shutdown(wait=True)
+
+def test_group_timeout_cancels_queued():
+    """测试整组超时后取消尚未开始的标的"""
+    pool = SymbolWorkerPool({"max_workers": 1, "symbol_timeout": 10})
+    results = pool.map(SYMBOLS[:4], lambda s: time.sleep(0.15) or s, group_timeout=0.2)
+    pool.shutdown(wait=True)
+    assert list(results) == SYMBOLS[:1]
+    assert pool.stats["cancelled"] == 2 and pool.stats["timeouts"] == 1
+
+def test_concurrent_opens_share_balance(monkeypatch):
+    """测试并发处理的标的依次读取余额开仓，不会按同一余额重复开仓"""
+    import pandas as pd
+    import core.state_manager as sm
+    import modules.trading_execution as te
+
+    account = {"balance": 25.0}
+    opened = []
+    df = pd.DataFrame({"close": [1.0] * 30})
+
+    def fake_open(symbol, direction, size, price, signal_strength, base_leverage):
+        time.sleep(0.05)
+        account["balance"] -= 10
+        opened.append(symbol)
+        return True
+
+    monkeypatch.setitem(te.strategy_state, "running", True)
+    monkeypatch.setitem(te.strategy_state, "positions", {})
+    monkeypatch.setattr(sm, "is_in_low_balance_mode", lambda: False)
+    monkeypatch.setattr(te, "check_enhanced_multi_signal", lambda s: (True, df, 0.8, "long"))
+    monkeypatch.setattr(te, "check_account_drawdown", lambda: False)
+    monkeypatch.setattr(te, "get_coin_total_position_value", lambda coin: 0)
+    monkeypatch.setattr(te, "get_total_equity", lambda: 100.0)
+    monkeypatch.setattr(te, "get_tradable_balance", lambda: account["balance"])
+    monkeypatch.setattr(te, "get_optimal_entry_price", lambda *a: 1.0)
+    monkeypatch.setattr(te, "calculate_position_size", lambda *a: (10, 3))
+    monkeypatch.setattr(te, "can_open_new_position", lambda *a: account["balance"] >= 10)
+    monkeypatch.setattr(te, "execute_open_position", fake_open)
+
+    pool = SymbolWorkerPool({"max_workers": 4})
+    pool.map(SYMBOLS[:4], te.process_symbol)
+    pool.shutdown(wait=True)
+    assert len(opened) == 2 and account["balance"] == 5.0
+
+def test_state_tasks_wait_for_open_lock(monkeypatch, caplog):
+    """测试调度任务重算资产分配与开仓互斥，并发增删仓位时不会遍历出错"""
+    import core.api_client
+    import core.state_manager as sm
+    import modules.trading_execution as te
+
+    monkeypatch.setattr(core.api_client, "get_account_balance", lambda: 100.0)
+    monkeypatch.setattr(sm, "get_pending_orders_margin", lambda: 0.0)
+    monkeypatch.setitem(sm.strategy_state, "positions", {})
+    assert te.open_position_lock is sm.state_lock
+
+    finished = threading.Event()
+    with te.open_position_lock:
+        worker = threading.Thread(target=lambda: sm.recalculate_asset_allocation() or finished.set())
+        worker.start()
+        time.sleep(0.1)
+        assert not finished.is_set()
+        sm.update_position("A-USDT-SWAP", {"margin": 30})
+    worker.join(1)
+    assert finished.is_set() and sm.strategy_state["tradable_balance"] == 70.0
+
+    stop = threading.Event()
+    def churn():
+        i = 0
+        while not stop.is_set():
+            sm.strategy_state["positions"][f"C{i % 50}-USDT-SWAP"] = {"margin": 1}
+            sm.strategy_state["positions"].pop(f"C{(i + 25) % 50}-USDT-SWAP", None)
+            i += 1
+    thread = threading.Thread(target=churn)
+    thread.start()
+    for _ in range(200):
+        sm.recalculate_asset_allocation()
+    stop.set()
+    thread.join()
+    assert "计算资产分配失败" not in caplog.text
+
+if __name__ == "__main__":
+    test_concurrent_and_bounded()
+    test_hung_symbol_isolated()
+    test_group_timeout_cancels_queued()
+    print("✅ 标的线程池测试通过")
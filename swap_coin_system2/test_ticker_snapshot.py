@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+测试实时价格的回退链：推送行情 → TTL 内的全量快照 → 逐个 REST 请求
+"""
+import sys
+import time
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+import core.api_client
+import core.ticker_snapshot as ts
+from core.market_stream import market_stream
+from core.ticker_snapshot import TickerSnapshot
+
+class FakeMarketAPI:
+    def __init__(self, prices):
+        self.prices = prices
+        self.bulk_calls = 0
+        self.single_calls = []
+        self.bulk_ok = True
+
+    def get_tickers(self, instType):
+        self.bulk_calls += 1
+        if not self.bulk_ok:
+            return {"code": "50011", "msg": "Too Many Requests"}
+        return {"code": "0", "data": [{"instId": s, "last": str(p), "ts": "1"} for s, p in self.prices.items()]}
+
+    def get_ticker(self, instId):
+        self.single_calls.append(instId)
+        return {"code": "0", "data": [{"instId": instId, "last": "7.5"}]}
+
+def setup(monkeypatch, stream_prices=None):
+    from modules.trading_execution import get_realtime_price
+    api = FakeMarketAPI({"BTC-USDT-SWAP": 65000.0, "ETH-USDT-SWAP": 3500.0})
+    monkeypatch.setattr(core.api_client, "market_api", api)
+    monkeypatch.setattr(ts, "ticker_snapshot", TickerSnapshot(ttl=10))
+    monkeypatch.setattr(market_stream, "get_last_price", lambda symbol: (stream_prices or {}).get(symbol))
+    return api, get_realtime_price
+
+def test_stream_then_snapshot(monkeypatch):
+    """测试推送价格优先，推送不可用时 TTL 内所有标的共享一次全量请求"""
+    api, get_realtime_price = setup(monkeypatch, {"BTC-USDT-SWAP": 65001.0})
+    assert get_realtime_price("BTC-USDT-SWAP") == 65001.0
+    assert api.bulk_calls == 0
+
+    for _ in range(5):
+        assert get_realtime_price("ETH-USDT-SWAP") == 3500.0
+    assert api.bulk_calls == 1 and api.single_calls == []
+
+    # 快照中没有的标的逐个请求
+    assert get_realtime_price("NEW-USDT-SWAP") == 7.5
+    assert api.single_calls == ["NEW-USDT-SWAP"] and api.bulk_calls == 1
+
+def test_stale_snapshot_expires(monkeypatch):
+    """测试快照过期后重新请求，刷新失败时不使用过期快照而是逐个请求"""
+    api, get_realtime_price = setup(monkeypatch)
+    assert get_realtime_price("ETH-USDT-SWAP") == 3500.0
+
+    ts.ticker_snapshot.last_refresh = time.time() - 11
+    api.prices["ETH-USDT-SWAP"] = 3600.0
+    assert get_realtime_price("ETH-USDT-SWAP") == 3600.0
+    assert api.bulk_calls == 2
+
+    ts.ticker_snapshot.last_refresh = time.time() - 11
+    api.bulk_ok = False
+    assert get_realtime_price("ETH-USDT-SWAP") == 7.5
+    assert api.bulk_calls == 3 and api.single_calls == ["ETH-USDT-SWAP"]
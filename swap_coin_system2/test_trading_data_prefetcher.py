@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+测试交易大数据预取：按周期边界刷新、失败重试、分析器非阻塞读取
+"""
+import sys
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+from modules.trading_data_prefetcher import TradingDataPrefetcher
+
+PERIOD = 3600
+BASE = 1_700_000_000 - 1_700_000_000 % PERIOD     # 某个整点
+
+def make_prefetcher(responses, calls):
+    prefetcher = TradingDataPrefetcher({"delay": 60, "retry": 120, "budget_share": 100})
+
+    def fetcher(kind):
+        def fetch(coin):
+            calls.append((kind, coin))
+            return responses.get((kind, coin))
+        return fetch
+
+    prefetcher.fetchers = lambda: {kind: fetcher(kind) for kind in ("leverage_ratio", "taker_volume")}
+    return prefetcher
+
+def test_refresh_once_per_period():
+    """测试每个周期边界+delay后每个币种每类数据只刷新一次"""
+    responses = {("leverage_ratio", c): [["0", "1.3"]] for c in ("BTC", "ETH")}
+    responses.update({("taker_volume", c): [["0", "10", "20"]] for c in ("BTC", "ETH")})
+    calls = []
+    prefetcher = make_prefetcher(responses, calls)
+    prefetcher.watch(["BTC-USDT-SWAP", "ETH-USDT-SWAP", "BTC-USDT"])
+
+    assert prefetcher.refresh_due(BASE + 100) == 4
+    assert prefetcher.refresh_due(BASE + 1000) == 0
+    assert prefetcher.refresh_due(BASE + PERIOD + 30) == 0       # 新周期但还在 delay 内
+    assert prefetcher.refresh_due(BASE + PERIOD + 61) == 4
+    assert len(calls) == 8
+    assert prefetcher.get("leverage_ratio", "BTC") == [["0", "1.3"]]
+    assert prefetcher.next_wakeup(BASE + PERIOD + 61) == BASE + 2 * PERIOD + 60
+
+def test_failed_fetch_retries_and_keeps_data():
+    """测试获取失败时保留上一期数据，retry 秒后重试"""
+    responses = {("leverage_ratio", "SOL"): [["0", "0.7"]], ("taker_volume", "SOL"): [["0", "5", "5"]]}
+    calls = []
+    prefetcher = make_prefetcher(responses, calls)
+    prefetcher.watch(["SOL-USDT-SWAP"])
+    prefetcher.refresh_due(BASE + 100)
+
+    responses.pop(("taker_volume", "SOL"))
+    now = BASE + PERIOD + 100
+    assert prefetcher.refresh_due(now) == 1
+    assert prefetcher.get("taker_volume", "SOL") == [["0", "5", "5"]]
+    assert prefetcher.next_wakeup(now) == now + 120
+    assert prefetcher.refresh_due(now + 60) == 0
+    assert prefetcher.refresh_due(now + 121) == 0 and calls[-1] == ("taker_volume", "SOL")
+    assert prefetcher.stats["errors"] == 2
+
+def test_analyzer_reads_without_blocking(monkeypatch):
+    """测试预取运行时分析器只读存储，没有数据的组件直接跳过"""
+    import modules.trading_data_prefetcher as tdp
+    from modules.advanced_market_analysis import AdvancedMarketAnalyzer
+
+    prefetcher = make_prefetcher({}, [])
+    prefetcher.running = True
+    prefetcher.store[("leverage_ratio", "BTC")] = {"data": [["0", "1.5"]], "period_start": BASE, "fetched": BASE}
+    monkeypatch.setattr(tdp, "trading_data_prefetcher", prefetcher)
+
+    analyzer = AdvancedMarketAnalyzer()
+    monkeypatch.setattr(analyzer, "get_taker_volume", lambda *a, **k: (_ for _ in ()).throw(AssertionError("阻塞请求")))
+    assert analyzer.analyze_market_sentiment("BTC-USDT-SWAP") == (0.3, 0.2)
+    assert "BTC" in prefetcher.coins and prefetcher.stats["misses"] == 1
+
+if __name__ == "__main__":
+    test_refresh_once_per_period()
+    test_failed_fetch_retries_and_keeps_data()
+    print("✅ 交易大数据预取测试通过")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+测试成交量分布：向量化结果、增量更新与逐档循环一致
+"""
+import sys
+sys.path.insert(0, '/www/python/swap_coin_system2')
+
+import numpy as np
+import pandas as pd
+from modules.volume_profile import compute_profile, profile_levels, RollingVolumeProfile
+from modules.enhanced_strategy import EnhancedStrategy
+
+def make_bars(n=150, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    high = close + rng.random(n)
+    low = close - rng.random(n)
+    low[10] = high[10] = close[10]    # 无波动的K线
+    return high, low, close, rng.random(n) * 10
+
+def test_profile_matches_loop():
+    """测试分摊 / 收盘价两种方式与逐根逐档循环一致"""
+    high, low, close, volume = make_bars()
+    edges, hist = compute_profile(high, low, close, volume, bins=12, half_life=20)
+    weights = 0.5 ** ((len(close) - 1 - np.arange(len(close))) / 20)
+
+    expected = np.zeros(12)
+    for h, l, c, v in zip(high, low, close, volume * weights):
+        for j in range(12):
+            if h > l:
+                expected[j] += max(0.0, min(h, edges[j + 1]) - max(l, edges[j])) / (h - l) * v
+            elif edges[j] <= c < edges[j + 1] or (j == 11 and c >= edges[j + 1]):
+                expected[j] += v
+    assert np.allclose(hist, expected)
+    assert np.isclose(hist.sum(), (volume * weights).sum())
+
+    edges, hist = compute_profile(high, low, close, volume, bins=12, spread=False)
+    counts, _ = np.histogram(close, bins=edges, weights=volume)
+    assert np.allclose(hist, counts)
+
+    levels = profile_levels(edges, hist, 0.7)
+    assert levels["val"] <= levels["poc"] <= levels["vah"]
+    assert levels["value_area_share"] >= 0.7
+
+def test_rolling_matches_batch():
+    """测试逐根追加（含实时K线修正）后与同一窗口批量计算一致"""
+    high, low, close, volume = make_bars(300, 9)
+    profile = RollingVolumeProfile(bin_width=0.5, window=60, half_life=30)
+    for i in range(len(close)):
+        profile.update(i, high[i] + 0.3, low[i], close[i], volume[i] * 2)   # 实时K线
+        profile.update(i, high[i], low[i], close[i], volume[i])             # 修正为最终值
+        if i < 5:
+            continue
+        start = max(0, i + 1 - 60)
+        edges, hist = compute_profile(high[start:i + 1], low[start:i + 1], close[start:i + 1],
+                                      volume[start:i + 1], bin_width=0.5, half_life=30)
+        rolling_edges, rolling_hist = profile.profile()
+        offset = int(round(edges[0] / 0.5)) - profile.base
+        assert np.allclose(rolling_hist[offset:offset + len(hist)], hist, atol=1e-9), i
+        assert np.allclose(np.delete(rolling_hist, np.s_[offset:offset + len(hist)]), 0, atol=1e-9), i
+
+def volume_profile_loop(df):
+    """逐区间筛选的原始写法"""
+    price_levels = np.linspace(df["low"].min(), df["high"].max(), 10)
+    concentration = {}
+    for i in range(len(price_levels) - 1):
+        mask = (df["close"] >= price_levels[i]) & (df["close"] < price_levels[i + 1])
+        concentration[i] = df[mask]["volume"].sum()
+    top = max(concentration, key=concentration.get)
+    total = df["volume"].sum()
+    support = sum(v for k, v in concentration.items() if k <= top) / total
+    resistance = sum(v for k, v in concentration.items() if k >= top) / total
+    return min(support, 1.0), min(resistance, 1.0)
+
+def test_strategy_support_resistance():
+    """测试策略的成交量分布强度与逐区间写法一致，返回格式不变"""
+    for seed in (11, 12, 13):
+        high, low, close, volume = make_bars(100, seed)
+        close[-1] = high.max()            # 收盘价落在最高价上：不计入任何区间
+        df = pd.DataFrame({"open": close, "high": high, "low": low, "close": close, "volume": volume})
+        support_strength, resistance_strength = \
+            EnhancedStrategy().calculate_volume_profile_support_resistance(df)
+        expected = volume_profile_loop(df)
+        assert np.isclose(support_strength, expected[0], rtol=1e-12), seed
+        assert np.isclose(resistance_strength, expected[1], rtol=1e-12), seed
+
+def make_frame(high, low, close, volume):
+    return pd.DataFrame({"time": np.arange(len(close), dtype=np.int64) * 3600000, "open": close,
+                         "high": high, "low": low, "close": close, "volume": volume})
+
+def test_strategy_rolling_profile_matches_batch():
+    """测试策略按轮合并新K线（含实时K线修正）后与同一窗口批量计算一致"""
+    from config.constants import VOLUME_PROFILE_CONFIG as config
+    high, low, close, volume = make_bars(260, 4)
+    full = make_frame(high, low, close, volume)
+    strategy = EnhancedStrategy()
+    for end in range(120, 260, 7):
+        live = full.iloc[end - 100:end + 1].reset_index(drop=True)
+        live.loc[len(live) - 1, "volume"] *= 0.5                 # 未收盘的K线
+        strategy.update_volume_profile("ROLL-USDT-SWAP", live)
+        df = full.iloc[end - 100:end + 1].reset_index(drop=True)
+        profile = strategy.update_volume_profile("ROLL-USDT-SWAP", df)
+
+        window = df.tail(config["window"])
+        edges, hist = compute_profile(window["high"], window["low"], window["close"], window["volume"],
+                                      bin_width=profile.bin_width, spread=config["spread"],
+                                      half_life=config["half_life"])
+        rolling_edges, rolling_hist = profile.profile()
+        offset = int(round(edges[0] / profile.bin_width)) - profile.base
+        assert np.allclose(rolling_hist[offset:offset + len(hist)], hist, atol=1e-9), end
+        assert np.isclose(rolling_hist.sum(), hist.sum()), end
+    assert strategy.volume_profiles["ROLL-USDT-SWAP"].commits > 100
+
+def test_strategy_volume_profile_levels():
+    """测试成交量分布价位：支撑在现价下方、阻力在上方，强度在 0~1"""
+    high, low, close, volume = make_bars(100, 11)
+    (support, support_strength), (resistance, resistance_strength) = \
+        EnhancedStrategy().calculate_volume_profile_levels(make_frame(high, low, close, volume), "LVL-USDT-SWAP")
+    assert support == 0 or support < close[-1]
+    assert resistance == 0 or resistance > close[-1]
+    assert 0 <= support_strength <= 1 and 0 <= resistance_strength <= 1
+    assert support > 0 or resistance > 0
+
+def test_enhanced_support_resistance_pinned():
+    """
+    固定综合支撑阻力的输出（入场定价使用）
+
+    接入成交量分布价位之前，这里总是异常退回20根最低/最高价
+    (96.781 / 104.020)；现在支撑取成交量分布的控制点，阻力取最近的有效阻力。
+    """
+    high, low, close, volume = make_bars(120, 2)
+    df = make_frame(high, low, close, volume)
+    strategy = EnhancedStrategy()
+    support_strength, support, resistance_strength, resistance = \
+        strategy.calculate_enhanced_support_resistance(df, "PIN-USDT-SWAP")
+
+    (volume_support, volume_strength), _ = strategy.calculate_volume_profile_levels(df, "PIN-USDT-SWAP")
+    assert support == volume_support and support_strength == volume_strength
+    assert np.isclose(support, 102.18573023528901) and np.isclose(support_strength, 0.6263994087274141)
+    assert np.isclose(resistance, 104.05274119270955) and np.isclose(resistance_strength, 0.9063910910278937)
+    assert support < close[-1] < resistance
+
+if __name__ == "__main__":
+    test_profile_matches_loop()
+    test_rolling_matches_batch()
+    test_strategy_support_resistance()
+    test_strategy_rolling_profile_matches_batch()
+    test_strategy_volume_profile_levels()
+    test_enhanced_support_resistance_pinned()
+    print("✅ 成交量分布测试通过")
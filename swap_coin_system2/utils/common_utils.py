@@ -329,11 +329,8 @@ class CommonUtils:
         if len(df) < period:
             return 50.0  # 中性值
         
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
+        from core.feature_cache import feature_cache
+        rsi = feature_cache.rsi(df, period)
         
         return rsi.iloc[-1] if not rsi.empty else 50.0
 
@@ -14,24 +14,33 @@ def safe_request(func):
             return None
     return wrapper
 
-def rate_limit(limit_count, limit_seconds):
-    """限流装饰器"""
+def backoff_sleep(attempt, base=0.5, max_delay=8.0):
+    """重试前指数退避：第 attempt 次（从0开始）失败后等待 base * 2^attempt 秒，不超过 max_delay"""
+    delay = min(max_delay, base * (2 ** attempt))
+    if delay > 0:
+        time.sleep(delay)
+    return delay
+
+def rate_limit(limit_count, limit_seconds, group=None):
+    """
+    限流装饰器
+
+    group 非空时共用 rate_limiter 中对应接口分组的令牌桶，
+    否则为被装饰函数单独建一个 limit_count / limit_seconds 的令牌桶。
+    """
     def decorator(func):
-        call_times = []
+        from core.rate_limiter import TokenBucket, rate_limiter
+        bucket = None if group else TokenBucket(limit_count / limit_seconds, limit_count)
         
         @wraps(func)
         def wrapper(*args, **kwargs):
-            now = time.time()
-            # 移除超过时间窗口的调用记录
-            call_times[:] = [t for t in call_times if now - t < limit_seconds]
-            
-            if len(call_times) >= limit_count:
-                sleep_time = limit_seconds - (now - call_times[0])
-                if sleep_time > 0:
-                    logging.warning(f"达到API限流，等待{sleep_time:.2f}秒")
-                    time.sleep(sleep_time)
-            
-            call_times.append(now)
+            if group:
+                rate_limiter.acquire(group)
+            else:
+                wait = bucket.reserve()
+                if wait > 0:
+                    logging.debug(f"达到限流，{func.__name__} 等待{wait:.2f}秒")
+                    time.sleep(wait)
             return func(*args, **kwargs)
         return wrapper
     return decorator
\ No newline at end of file
@@ -52,6 +52,11 @@ class PerformanceMonitor:
     def generate_report(self):
         """生成详细的性能报告"""
         from core.state_manager import strategy_state
+        from core.kline_store import kline_store
+        from core.rate_limiter import rate_limiter
+        from core.feature_cache import feature_cache
+        from core.scheduler import scheduler
+        from core.symbol_pool import symbol_pool
         
         current_time = time.time()
         runtime = current_time - self.start_time
@@ -61,6 +66,16 @@ class PerformanceMonitor:
         total_api_calls = self.get_total_api_calls()
         api_per_minute = self.get_api_calls_per_minute()
         trades_per_hour = self.get_trades_per_hour()
+        kline_stats = kline_store.get_stats()
+        limiter_stats = rate_limiter.get_stats()
+        limiter_waits = sum(s["waits"] for s in limiter_stats.values())
+        limiter_wait_time = sum(s["wait_time"] for s in limiter_stats.values())
+        limiter_throttles = sum(s["throttles"] for s in limiter_stats.values())
+        feature_stats = feature_cache.get_stats()
+        task_stats = scheduler.get_stats().values()
+        task_overruns = sum(s["overruns"] for s in task_stats)
+        task_timeouts = sum(s["timeouts"] for s in task_stats)
+        pool_stats = symbol_pool.get_stats()
         
         # 获取账户余额
         current_balance = strategy_state.get('last_balance', 0)
@@ -96,6 +111,11 @@ class PerformanceMonitor:
     公共数据: {self.api_calls['public_data']} 次
     交易数据: {self.api_calls['trading_data']} 次
     其他: {self.api_calls['other']} 次
+    K线缓存: {kline_stats['fetches']} 次全量 / {kline_stats['incremental_fetches']} 次增量 / {kline_stats['hits']} 次命中 (命中率 {kline_stats['hit_rate']*100:.1f}%)
+    限流等待: {limiter_waits} 次 / 累计 {limiter_wait_time:.1f} 秒 / 触发限流 {limiter_throttles} 次
+    特征缓存: {feature_stats['hits']} 次命中 / {feature_stats['misses']} 次计算 (命中率 {feature_stats['hit_rate']*100:.1f}%)
+    调度任务: 超时 {task_timeouts} 次 / 跳过（上次未结束）{task_overruns} 次
+    标的线程池: 完成 {pool_stats['completed']} / 超时 {pool_stats['timeouts']} / 取消 {pool_stats['cancelled']} / 跳过（其他组处理中）{pool_stats['busy']}
 
     账户状态:
     初始余额: {initial_balance:.2f} USDT
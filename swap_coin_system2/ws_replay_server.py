@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+本地 WebSocket 回放服务器 - 离线测试 market_stream
+
+读取 MARKET_STREAM_CONFIG["record_path"] 录制的原始推送（每行一条），
+模拟 OKX 的订阅应答和 ping/pong，只回放客户端已订阅频道的消息。
+
+用法:
+    python ws_replay_server.py frames.jsonl --port 8765 --interval 0.05 --loop
+然后把 MARKET_STREAM_CONFIG 的 public_url / business_url 改成 ws://127.0.0.1:8765
+"""
+import json
+import asyncio
+import logging
+import argparse
+import websockets
+
+def load_frames(path):
+    """加载录制的推送消息，跳过 pong 和订阅应答"""
+    frames = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line == "pong":
+                continue
+            message = json.loads(line)
+            if "arg" in message and "data" in message:
+                frames.append((message["arg"].get("channel"), message["arg"].get("instId"), line))
+    return frames
+
+class ReplayServer:
+    def __init__(self, frames, interval=0.05, loop=False):
+        self.frames = frames
+        self.interval = interval
+        self.loop = loop
+
+    async def handler(self, ws, path=None):
+        subscribed = set()
+        replay_task = None
+        try:
+            async for raw in ws:
+                if raw == "ping":
+                    await ws.send("pong")
+                    continue
+                request = json.loads(raw)
+                op = request.get("op")
+                for arg in request.get("args", []):
+                    key = (arg.get("channel"), arg.get("instId"))
+                    if op == "subscribe":
+                        subscribed.add(key)
+                    elif op == "unsubscribe":
+                        subscribed.discard(key)
+                    await ws.send(json.dumps({"event": op, "arg": arg}))
+                if replay_task is None:
+                    replay_task = asyncio.ensure_future(self.replay(ws, subscribed))
+        finally:
+            if replay_task is not None:
+                replay_task.cancel()
+
+    async def replay(self, ws, subscribed):
+        while True:
+            for channel, inst_id, raw in self.frames:
+                if (channel, inst_id) in subscribed:
+                    await ws.send(raw)
+                    await asyncio.sleep(self.interval)
+            if not self.loop:
+                return
+
+    async def serve(self, host, port):
+        async with websockets.serve(self.handler, host, port):
+            logging.info(f"回放服务器已启动 ws://{host}:{port}，共 {len(self.frames)} 条消息")
+            await asyncio.Future()
+
+def main():
+    parser = argparse.ArgumentParser(description="OKX WebSocket 推送回放服务器")
+    parser.add_argument("frames", help="录制的推送文件")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--interval", type=float, default=0.05, help="消息间隔秒数")
+    parser.add_argument("--loop", action="store_true", help="循环回放")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    server = ReplayServer(load_frames(args.frames), args.interval, args.loop)
+    asyncio.run(server.serve(args.host, args.port))
+
+if __name__ == "__main__":
+    main()